@@ -1,295 +1,78 @@
+# first, so the "imports" startup phase covers everything below
+from metrics import Metrics
 import os
+import copy
 import dash
-from dash import dcc, html, Input, Output
-import geopandas as gpd
+from dash import dcc, html, Input, Output, State, Patch, ClientsideFunction
+from dash.exceptions import PreventUpdate
 import plotly.graph_objects as go
-from shapely.ops import linemerge
-from datetime import date
 import numpy as np
-import requests
-import pandas as pd
-from shapely import wkt
+from figure_cache import FigureCache, backend_from_env
+from snapshot import SnapshotManager
+from river_lod import view_from_relayout
+from bathy_aggregate import aggregation_level, grid_cells, cell_marker_size
+from river_miles import mile_bounds
+from draft import PROJECT_DEPTH
+from serialize import pack, use_fast_json, compress_responses
 
-# LOAD DATA
-bathy = pd.read_csv("clean_bathymetry.csv")
-dredge = pd.read_csv("dredge_data_2022.csv")
-
-# Ensure year is int
-bathy["year"] = bathy["year"].astype(int)
-dredge["year"] = 2022
-
-years = sorted(bathy["year"].unique())
-years = [int(y) for y in years]
-
-# get center point for bathym measures 
-bathy["geometry"] = bathy["geometry"].apply(wkt.loads)
-bathy = gpd.GeoDataFrame(bathy, geometry="geometry", crs="EPSG:4326")
-bathy["rep_point"] = bathy.geometry.representative_point()
-bathy["LON"] = bathy["rep_point"].apply(lambda p: p.x)
-bathy["LAT"] = bathy["rep_point"].apply(lambda p: p.y)
-
-# get barge rate data  
-url = "https://www.ams.usda.gov/sites/default/files/media/GTRFigure10Table9.xlsx"
-response = requests.get(url, timeout=30)
-with open('freight_rates_southbound.xlsx', 'wb') as file:
-    file.write(response.content)
-freight_rates = pd.read_excel('freight_rates_southbound.xlsx',sheet_name='Table 9_data',header=2,usecols=range(5))
-barge_rates = freight_rates.rename(columns={'All Points':'week','ST LOUIS':'stlrate_per_ton'})
-barge_rates = barge_rates.drop(index=[0,1])
-barge_rates = barge_rates.loc[:,('week','stlrate_per_ton')]
-barge_rates['week'] = pd.to_datetime(barge_rates['week'])
-barge_rates['stlrate_per_ton'] = (barge_rates['stlrate_per_ton']*3.99)/100
-barge_rates['week_no']= barge_rates['week'].dt.isocalendar().week
-barge_rates['year'] = barge_rates['week'].dt.year
-barge_demand = barge_rates.groupby(['week_no'])['stlrate_per_ton'].mean().reset_index().rename(columns={'stlrate_per_ton':'avg_stlrate'})
-barge_std = barge_rates.groupby(['week_no'])['stlrate_per_ton'].std().reset_index().rename(columns={'stlrate_per_ton':'std_stlrate'})
-barge_rates = barge_rates.merge(barge_demand,on='week_no',how='inner')
-barge_rates = barge_rates.merge(barge_std,on='week_no',how='inner')
-barge_rates['plusone'] = barge_rates['avg_stlrate'] + barge_rates['std_stlrate']
-barge_rates['minusone'] = barge_rates['avg_stlrate'] - barge_rates['std_stlrate']
-
-end_date = barge_rates["week"].max()
-start_date = end_date - pd.Timedelta(weeks=52)
-thisyear = date.today().year
-
-# water level 
-greenv = pd.read_excel('greenville_stage.xlsx',header=11,parse_dates=['Date / Time']).rename(columns={'Date / Time':'date','Stage (Ft)':'stage'}).assign(stage=lambda d: pd.to_numeric(d['stage'], errors='coerce'))[:-1]
-greenv['date'] = pd.to_datetime(greenv['date'])
-greenv['year'] = greenv['date'].dt.year
-greenv['week_no'] = greenv['date'].dt.isocalendar().week
-greenmean = greenv.groupby(['week_no'])['stage'].mean().reset_index().rename(columns={'stage':'avg_stage'})
-greenstd = greenv.groupby(['week_no'])['stage'].std().reset_index().rename(columns={'stage':'std_stage'})
-greenv = greenv.merge(greenmean,on='week_no',how='inner')
-greenv = greenv.merge(greenstd,on='week_no',how='inner')
-greenv['plusone'] = greenv['avg_stage'] + greenv['std_stage']
-greenv['minusone'] = greenv['avg_stage'] - greenv['std_stage']
-
-# now getting corn and soy price data 
-url = "https://www.ams.usda.gov/sites/default/files/media/GTRTable2A_B.xlsx"
-response = requests.get(url, timeout=30)
-with open('price_spreads_futures_usda.xlsx', 'wb') as file:
-    file.write(response.content)
-corn_soy_spread = pd.read_excel('price_spreads_futures_usda.xlsx',sheet_name='Data',header=1,usecols=range(9))
-corn_soy_spread = corn_soy_spread[(corn_soy_spread['Origin--destination']=='IL--Gulf')|(corn_soy_spread['Origin--destination']=='IL–Gulf')|(corn_soy_spread['Origin--destination']=='IA–Gulf')|(corn_soy_spread['Origin--destination']=='IA--Gulf')]
-
-corn_spread = corn_soy_spread[corn_soy_spread['Commodity']=='Corn'].rename(columns = {'Unnamed: 0':'date' , 'Destination Price':'gulf_corn_price'})
-corn_spread = corn_spread.loc[:,('date','gulf_corn_price')]
-corn_spread['date'] = pd.to_datetime(corn_spread['date'])
-corn_spread['week_no'] = corn_spread['date'].dt.isocalendar().week
-corn_spread['year'] = corn_spread['date'].dt.year
-corn_price = corn_spread[['date','week_no','year','gulf_corn_price']]
-corn_price['month'] = corn_price['date'].dt.month
-meancorn = corn_price.groupby(['month'])[['gulf_corn_price']].mean().reset_index().rename(columns={'gulf_corn_price':'avg_price'})
-stdcorn = corn_price.groupby(['month'])[['gulf_corn_price']].std().reset_index().rename(columns={'gulf_corn_price':'std_price'})
-corn_price = corn_price.merge(meancorn,on='month',how='inner')
-corn_price = corn_price.merge(stdcorn,on='month',how='inner')
-corn_price['plusone'] = corn_price['avg_price'] + corn_price['std_price']
-corn_price['minusone'] = corn_price['avg_price'] - corn_price['std_price']
-
-
-soy_spread = corn_soy_spread.rename(columns = {'Unnamed: 0':'date','Destination Price':'gulf_soy_price'})
-soy_spread['date'] = soy_spread['date'].shift(1)
-soy_spread = soy_spread[soy_spread['Commodity']=='Soybean']
-soy_spread['date'] = soy_spread['date'].shift(1)
-soy_spread = soy_spread.loc[:,('date','gulf_soy_price')]
-soy_spread['date'] = pd.to_datetime(soy_spread['date'])
-soy_spread['week_no'] = soy_spread['date'].dt.isocalendar().week
-soy_spread['year'] = soy_spread['date'].dt.year
-soy_price = soy_spread[['date','week_no','year','gulf_soy_price']]
-soy_price['month'] = soy_price['date'].dt.month
-meansoy = soy_price.groupby(['month'])[['gulf_soy_price']].mean().reset_index().rename(columns={'gulf_soy_price':'avg_price'})
-stdsoy = soy_price.groupby(['month'])[['gulf_soy_price']].std().reset_index().rename(columns={'gulf_soy_price':'std_price'})
-soy_price = soy_price.merge(meansoy,on='month',how='inner')
-soy_price = soy_price.merge(stdsoy,on='month',how='inner')
-soy_price['plusone'] = soy_price['avg_price'] + soy_price['std_price']
-soy_price['minusone'] = soy_price['avg_price'] - soy_price['std_price']
-
-
-# now get river line 
-rivers = gpd.read_file('rivers_shapefile/rivers.shp')
-rivers = rivers.set_crs('EPSG:4326')
-mississippi = rivers[rivers['PNAME'] == 'MISSISSIPPI R']
-river_line = mississippi.union_all()
-river_line = linemerge(river_line)
-lons = []
-lats = []
-x, y = river_line.xy
-lons = list(x)
-lats = list(y)
-
-# --------------------------------------------------
-# DASH APP
-# --------------------------------------------------
-
-app = dash.Dash(__name__)
-app.title = "Mississippi River Bathymetry & Dredging"
+# startup phases, callback timings and cache hit rates, served on /metrics
+metrics = Metrics()
+metrics.mark("imports")
 
-# --------------------------------------------------
-# LAYOUT
-# --------------------------------------------------
+# orjson for every figure Dash and the figure cache serialize, when installed
+use_fast_json()
 
-app.layout = html.Div(
-    style={"width": "95%", "margin": "auto"},
-    children=[
-        html.H2("Mississippi River Bathymetry & Dredging"),
-
-        ##################################
-        # Parent Div: splits page into left and right columns
-        html.Div(
-            style={"display": "flex", "gap": "20px"}, 
-            children=[
-
-                ################ 
-                # LEFT COLUMN: controls + map
-                html.Div(  
-                    style={"flex": "5","display": "flex", "flex-direction": "column", "gap": "20px","height": "95vh"},
-                    children=[
-
-                        # Top controls row
-                        html.Div(
-                            style={"display": "flex", "gap": "30px", "margin-bottom": "10px", "align-items": "center"},
-                            children=[
-                                # Year dropdown
-                                html.Div(
-                                    style={"width": "90px"},
-                                    children=[
-                                        html.Label("Select Year"),
-                                        dcc.Dropdown(
-                                            id="year-slider",
-                                            options=[{"label": str(y), "value": y} for y in years],
-                                            value=years[0],
-                                            clearable=False,
-                                            style={"height": "40px", "font-size": "15px"}
-                                        )
-                                    ]
-                                ),
-
-                                # Layers checklist
-                                html.Div(
-                                    style={"width": "150px"},
-                                    children=[
-                                        html.Label("Layers"),
-                                        dcc.Checklist(
-                                            id="layer-toggle",
-                                            options=[
-                                                {"label": "Bathymetry", "value": "bathy"},
-                                                {"label": "Dredging", "value": "dredge"},
-                                            ],
-                                            value=["bathy", "dredge"],
-                                            inline=True
-                                        )
-                                    ]
-                                ),
-
-                                # Colorbar
-                                html.Div(
-                                    style={"width": "200px"},
-                                    children=[
-                                        dcc.Graph(
-                                            id="colorbar",
-                                            figure={
-                                                "data": [
-                                                    go.Scatter(
-                                                        x=[None],
-                                                        y=[None],
-                                                        mode='markers',
-                                                        marker=dict(
-                                                            colorscale="YlOrRd",
-                                                            cmin=0,
-                                                            cmax=40,
-                                                            colorbar=dict(
-                                                                title="Depth (ft)",
-                                                                orientation="h",
-                                                                thickness=10,
-                                                                len=1.0,
-                                                            ),
-                                                            size=0
-                                                        ),
-                                                        showlegend=False
-                                                    )
-                                                ],
-                                                "layout": go.Layout(
-                                                    margin=dict(l=0, r=0, t=0, b=0),
-                                                    height=50,
-                                                )
-                                            },
-                                            config={"displayModeBar": False},
-                                            style={"height": "60px"}
-                                        )
-                                    ]
-                                )
-                            ]
-                        ),
-
-                        # Map below controls
-                        html.Div(
-                            style={"height": "80vh"},
-                            children=[
-                                dcc.Graph(id="map", style={"height": "100%"})
-                            ]
-                        )
-
-                    ]
-                ),
-
-                ################
-                # RIGHT COLUMN: plots
-                html.Div(
-                    style={"flex": "4", "display": "flex", "flex-direction": "column", "gap": "20px","height": "90vh","overflow-y": "scroll"},
-                    children=[
-                        dcc.Graph(
-                            id="barge-rate-plot",
-                            style={"height": "300px"}  # fills the column
-                        ),
-                        dcc.Graph(
-                            id="water-plot",
-                            style={"height": "300px"}  # fills the column
-                        ),
-                        dcc.Graph(
-                            id="cornprice-plot",
-                            style={"height": "300px"}  # fills the column
-                        ),
-                        dcc.Graph(
-                            id="soyprice-plot",
-                            style={"height": "300px"}  # fills the column
-                        )
-                        # Additional plots can be added as more children
-                    ]
-                )
-
-            ]
-        )
-    ]
+# LOAD DATA
+# every callback reads the live snapshot; a background thread swaps in a new
+# one when the data store or its sources change (see snapshot.py)
+snapshots = SnapshotManager()
+snapshots.start()
+metrics.mark("data snapshot")
+MAP_ZOOM = 7
+
+# built figures, keyed on callback + inputs + data version
+figure_cache = FigureCache(
+    max_entries=int(os.environ.get("FIGURE_CACHE_ENTRIES", 256)),
+    max_bytes=int(os.environ.get("FIGURE_CACHE_BYTES", 64 * 1024 * 1024)),
+    backend=backend_from_env(),
 )
 
+def cache_version():
+    return snapshots.current().cache_version
 
+# how often open pages check for a new data snapshot (ms)
+DATA_POLL_MS = int(os.environ.get("DATA_POLL_SECONDS", 60)) * 1000
+
+# slice the time-series charts in the browser from a preloaded store
+CLIENTSIDE_PLOTS = os.environ.get("CLIENTSIDE_PLOTS", "0") == "1"
 
 # --------------------------------------------------
-# CALLBACK
+# BASE MAP: river line, trace styling and layout, sent once with the page
 # --------------------------------------------------
 
-@app.callback(
-    Output("map", "figure"),
-    Input("year-slider", "value"),
-    Input("layer-toggle", "value")
+# hover text for single surveys and for grid cells
+BATHY_HOVER = (
+    "Depth: %{marker.color:.1f} ft<br>"
+    "Date: %{customdata[0]}<extra></extra>"
+)
+CELL_HOVER = (
+    "%{customdata[0]} surveys<br>"
+    "Min depth: %{customdata[1]:.1f} ft<br>"
+    "10th pct: %{customdata[2]:.1f} ft<br>"
+    "Mean: %{customdata[3]:.1f} ft<extra></extra>"
+)
+# the day (or "shallowest in <year>") is appended per update
+DRAFT_HOVER = (
+    "Segment %{customdata[0]:.0f}, mile %{customdata[1]:.0f}<br>"
+    "Available depth: %{marker.color:.1f} ft<br>"
 )
-def update_map(year, layers):
 
+
+def base_map_figure(snap):
     fig = go.Figure()
-    if year == thisyear: 
-        df_b = bathy[(bathy["date"] >= start_date) &(bathy["date"] <= end_date)]
-        df_d = dredge[(dredge["date"] >= start_date) &(dredge["date"] <= end_date)]
-    else: 
-        df_b = bathy[bathy['year']==year]
-        df_d = dredge[dredge['year']==year]
-    conditions = [
-    df_b["depth"] > 30,(df_b["depth"] > 25) & (df_b["depth"] <= 30),
-    (df_b["depth"] > 20) & (df_b["depth"] <= 25),(df_b["depth"] > 15) & (df_b["depth"] <= 20),
-    df_b["depth"] <= 15]
-    sizes = [8, 10, 12, 15, 18] 
-    df_b["marker_size"] = np.select(conditions, sizes)
-    
-    # plot river 
+
+    # plot river (detail for the starting zoom; update_map_view refines it)
+    lons, lats = snap.river_lod.coords(MAP_ZOOM)
     fig.add_trace(
     go.Scattermap(
         lon=lons,
@@ -305,15 +88,13 @@ def update_map(year, layers):
     )
 )
     
-    #  bathym layer 
+    #  bathym layer (points filled in by update_map)
     fig.add_trace(
         go.Scattermap(
-            lon=df_b["LON"],
-            lat=df_b["LAT"],
+            lon=[],
+            lat=[],
             mode="markers",
             marker=dict(
-                size=df_b["marker_size"],
-                color=df_b["depth"],
                 colorscale="YlOrRd",
                 reversescale=True,
                 cmin=0,
@@ -322,20 +103,16 @@ def update_map(year, layers):
                 opacity=0.7,
             ),
             showlegend=False,
-            customdata=df_b[["date"]],
             name="Bathymetry",
-            hovertemplate=(
-                "Depth: %{marker.color:.1f} ft<br>"
-                "Date: %{customdata[0]}<extra></extra>"
-            )
+            hovertemplate=BATHY_HOVER
         )
     )
 
     # dredge layer 
     fig.add_trace(
         go.Scattermap(
-            lon=df_d["LON"],
-            lat=df_d["LAT"],
+            lon=[],
+            lat=[],
             mode="markers",
             marker=dict(
                 size=5,
@@ -343,7 +120,6 @@ def update_map(year, layers):
                 #symbol="^",
                 opacity=0.9,
             ),
-            customdata=df_d[["BaseDateTime"]],
             showlegend=False,
             name="Dredging Locations",
             hovertemplate=(
@@ -353,33 +129,387 @@ def update_map(year, layers):
         )
     )
 
+    # available-depth layer: one marker per river segment (click for its plot)
+    fig.add_trace(
+        go.Scattermap(
+            lon=[],
+            lat=[],
+            mode="markers",
+            marker=dict(
+                size=11,
+                colorscale="RdYlGn",
+                cmin=0,
+                cmax=2 * PROJECT_DEPTH,
+                opacity=0.9,
+            ),
+            showlegend=False,
+            name="Available Depth",
+            hovertemplate=DRAFT_HOVER + "<extra></extra>"
+        )
+    )
+
     # map layout 
     fig.update_layout(
-        mapbox=dict(
+        map=dict(
             style="carto-positron",
-            zoom=7,
+            zoom=MAP_ZOOM,
             center=dict(lat=38.5, lon=-90.5),
         ),
         margin=dict(l=0, r=0, t=0, b=0),
         uirevision="keep-map",
         legend=dict(bgcolor="rgba(255,255,255,0.8)")
     )
-    
     return fig
 
-# another callback for the barge rate plot 
+# --------------------------------------------------
+# DASH APP
+# --------------------------------------------------
+
+app = dash.Dash(__name__)
+app.title = "Mississippi River Bathymetry & Dredging"
+# WSGI entry point: gunicorn -c gunicorn.conf.py app:server
+server = app.server
+metrics.instrument(server)
+# registered after the metrics hook so it runs first and metrics sees both sizes
+compress_responses(server)
+metrics.collect("figure_cache", figure_cache.stats)
+metrics.collect("data_snapshot", snapshots.stats)
+
+# --------------------------------------------------
+# LAYOUT
+# --------------------------------------------------
+
+def serve_layout():
+    # built per page load, so new visitors get the live snapshot
+    snap = snapshots.current()
+    return html.Div(
+        style={"width": "95%", "margin": "auto"},
+        children=[
+            html.H2("Mississippi River Bathymetry & Dredging"),
+
+            # live data version; refresh_data swaps the options when it changes
+            dcc.Interval(id="data-poll", interval=DATA_POLL_MS),
+            dcc.Store(id="data-version", data=snap.version),
+            dcc.Store(id="series-store", data=series_store_data() if CLIENTSIDE_PLOTS else None),
+
+            ##################################
+            # Parent Div: splits page into left and right columns
+            html.Div(
+                style={"display": "flex", "gap": "20px"}, 
+                children=[
+
+                    ################ 
+                    # LEFT COLUMN: controls + map
+                    html.Div(  
+                        style={"flex": "5","display": "flex", "flex-direction": "column", "gap": "20px","height": "95vh"},
+                        children=[
+
+                            # Top controls row
+                            html.Div(
+                                style={"display": "flex", "gap": "30px", "margin-bottom": "10px", "align-items": "center"},
+                                children=[
+                                    # Year dropdown
+                                    html.Div(
+                                        style={"width": "90px"},
+                                        children=[
+                                            html.Label("Select Year"),
+                                            dcc.Dropdown(
+                                                id="year-slider",
+                                                options=snap.year_options(),
+                                                value=snap.years[0],
+                                                clearable=False,
+                                                style={"height": "40px", "font-size": "15px"}
+                                            )
+                                        ]
+                                    ),
+
+                                    # Layers checklist
+                                    html.Div(
+                                        style={"width": "150px"},
+                                        children=[
+                                            html.Label("Layers"),
+                                            dcc.Checklist(
+                                                id="layer-toggle",
+                                                options=[
+                                                    {"label": "Bathymetry", "value": "bathy"},
+                                                    {"label": "Dredging", "value": "dredge"},
+                                                    {"label": "Available Depth", "value": "draft"},
+                                                ],
+                                                value=["bathy", "dredge"],
+                                                inline=True
+                                            )
+                                        ]
+                                    ),
+
+                                    # River-mile range
+                                    html.Div(
+                                        style={"width": "260px"},
+                                        children=[
+                                            html.Label("River Miles"),
+                                            dcc.RangeSlider(
+                                                id="mile-range",
+                                                min=snap.mile_range[0],
+                                                max=snap.mile_range[1],
+                                                value=snap.mile_range,
+                                                allowCross=False,
+                                                tooltip={"placement": "bottom"},
+                                                marks=None
+                                            )
+                                        ]
+                                    ),
+
+                                    # Colorbar
+                                    html.Div(
+                                        style={"width": "200px"},
+                                        children=[
+                                            dcc.Graph(
+                                                id="colorbar",
+                                                figure={
+                                                    "data": [
+                                                        go.Scatter(
+                                                            x=[None],
+                                                            y=[None],
+                                                            mode='markers',
+                                                            marker=dict(
+                                                                colorscale="YlOrRd",
+                                                                cmin=0,
+                                                                cmax=40,
+                                                                colorbar=dict(
+                                                                    title="Depth (ft)",
+                                                                    orientation="h",
+                                                                    thickness=10,
+                                                                    len=1.0,
+                                                                ),
+                                                                size=0
+                                                            ),
+                                                            showlegend=False
+                                                        )
+                                                    ],
+                                                    "layout": go.Layout(
+                                                        margin=dict(l=0, r=0, t=0, b=0),
+                                                        height=50,
+                                                    )
+                                                },
+                                                config={"displayModeBar": False},
+                                                style={"height": "60px"}
+                                            )
+                                        ]
+                                    )
+                                ]
+                            ),
+
+                            # Map below controls
+                            html.Div(
+                                style={"height": "80vh"},
+                                children=[
+                                    dcc.Graph(id="map", figure=base_map_figure(snap), style={"height": "100%"}),
+                                    dcc.Store(id="map-view", data={"zoom": MAP_ZOOM}),
+                                    dcc.Store(id="draft-segment")
+                                ]
+                            )
+
+                        ]
+                    ),
+
+                    ################
+                    # RIGHT COLUMN: plots
+                    html.Div(
+                        style={"flex": "4", "display": "flex", "flex-direction": "column", "gap": "20px","height": "90vh","overflow-y": "scroll"},
+                        children=[
+                            dcc.Graph(
+                                id="barge-rate-plot",
+                                style={"height": "300px"}  # fills the column
+                            ),
+                            dcc.Graph(
+                                id="water-plot",
+                                style={"height": "300px"}  # fills the column
+                            ),
+                            dcc.Graph(
+                                id="draft-plot",
+                                style={"height": "300px"}  # fills the column
+                            ),
+                            dcc.Graph(
+                                id="cornprice-plot",
+                                style={"height": "300px"}  # fills the column
+                            ),
+                            dcc.Graph(
+                                id="soyprice-plot",
+                                style={"height": "300px"}  # fills the column
+                            )
+                            # Additional plots can be added as more children
+                        ]
+                    )
+
+                ]
+            )
+        ]
+    )
+
+app.layout = serve_layout
+
+
+# --------------------------------------------------
+# CALLBACK
+# --------------------------------------------------
+
+def _mile_slice(df, miles):
+    # rows are sorted by milemarker, so the range is two binary searches
+    if not miles:
+        return df
+    start, stop = mile_bounds(df["milemarker"].to_numpy(), *miles)
+    return df.iloc[start:stop]
+
+
+def map_frames(year, miles=None):
+    snap = snapshots.current()
+    miles = snap.mile_filter(miles)
+    if year == snap.thisyear: 
+        df_b, df_d = snap.bathy_idx.recent(), snap.dredge_idx.recent()
+    else:
+        df_b, df_d = snap.bathy_idx.get(year), snap.dredge_idx.get(year)
+    return _mile_slice(df_b, miles), _mile_slice(df_d, miles)
+
+
+def map_level(year, zoom, miles=None):
+    # None draws one marker per survey, otherwise the grid zoom level
+    return aggregation_level(len(map_frames(year, miles)[0]), zoom)
+
+
+def bathy_layer_data(df_b, level):
+    if level is None:
+        return {
+            "lon": df_b["LON"].to_numpy(),
+            "lat": df_b["LAT"].to_numpy(),
+            "marker": {"size": df_b["marker_size"].to_numpy(), "color": df_b["depth"].to_numpy()},
+            "customdata": df_b[["date"]].to_numpy(),
+            "hovertemplate": BATHY_HOVER,
+        }
+    # too many points for the browser: one marker per grid cell, coloured by
+    # the shallow end (10th percentile) of the depths in it
+    cells = grid_cells(df_b["LON"], df_b["LAT"], df_b["depth"], level)
+    return {
+        "lon": cells["lon"],
+        "lat": cells["lat"],
+        "marker": {"size": cell_marker_size(cells["count"]), "color": cells["q10"]},
+        "customdata": np.column_stack([cells["count"], cells["min"], cells["q10"], cells["mean"]]),
+        "hovertemplate": CELL_HOVER,
+    }
+
+
+def draft_layer_data(year, miles=None):
+    # latest day with a stage reading this year; the shallowest day of
+    # each segment for past years
+    snap = snapshots.current()
+    eng = snap.draft()
+    if year == snap.thisyear:
+        col = eng.latest()
+        depth = eng.on(col)
+        label = str(eng.dates[col])
+    else:
+        depth = eng.worst(*eng.year_columns(year))
+        label = f"Shallowest in {year}"
+    keep = ~np.isnan(depth)
+    miles = snap.mile_filter(miles)
+    if miles:
+        keep &= (eng.miles >= miles[0]) & (eng.miles <= miles[1])
+    return {
+        "lon": eng.lon[keep],
+        "lat": eng.lat[keep],
+        "marker": {"color": depth[keep]},
+        "customdata": np.column_stack([eng.segments[keep], eng.miles[keep]]),
+        "hovertemplate": DRAFT_HOVER + label + "<extra></extra>",
+    }
+
+
+@figure_cache.memoize("map_layer_data", cache_version)
+def map_layer_data(year, layers, level=None, miles=None):
+    # only the per-year point data; the river and styling are in base_map_figure
+    df_b, df_d = map_frames(year, miles)
+    # numeric arrays go out as binary typed arrays (serialize.py)
+    return pack({
+        "bathy": dict(bathy_layer_data(df_b, level), visible="bathy" in layers),
+        "dredge": {
+            "lon": df_d["LON"].to_numpy(),
+            "lat": df_d["LAT"].to_numpy(),
+            "customdata": df_d[["BaseDateTime"]].to_numpy(),
+            "visible": "dredge" in layers,
+        },
+        # the draft matrix is only touched once the layer is switched on
+        "draft": (dict(draft_layer_data(year, miles), visible=True) if "draft" in layers
+                  else {"lon": [], "lat": [], "visible": False}),
+    })
+
+
+def _patch_trace(target, updates):
+    for prop, value in updates.items():
+        # typed-array specs are values, not nested properties
+        if isinstance(value, dict) and "bdata" not in value:
+            _patch_trace(target[prop], value)
+        else:
+            target[prop] = value
+
+
+@app.callback(
+    Output("map", "figure"),
+    Input("year-slider", "value"),
+    Input("layer-toggle", "value"),
+    Input("mile-range", "value"),
+    State("map-view", "data")
+)
+def update_map(year, layers, miles=None, view=None):
+    # send only the bathy/dredge trace data; the river line stays in the browser
+    zoom = (view or {}).get("zoom", MAP_ZOOM)
+    # the full slider range and no filter share one cache entry
+    miles = snapshots.current().mile_filter(miles)
+    layer_data = map_layer_data(year, layers, map_level(year, zoom, miles), miles)
+    patch = Patch()
+    _patch_trace(patch["data"][1], layer_data["bathy"])
+    _patch_trace(patch["data"][2], layer_data["dredge"])
+    _patch_trace(patch["data"][3], layer_data["draft"])
+    return patch
+
 @app.callback(
-    Output("barge-rate-plot", "figure"),
-    Input("year-slider", "value")
+    Output("map", "figure", allow_duplicate=True),
+    Output("map-view", "data"),
+    Input("map", "relayoutData"),
+    State("year-slider", "value"),
+    State("layer-toggle", "value"),
+    State("mile-range", "value"),
+    State("map-view", "data"),
+    prevent_initial_call=True
 )
+def update_map_view(relayout, year, layers, miles, view):
+    # swap the river trace for the simplification that fits the new zoom,
+    # clipped to the visible area
+    new_view = view_from_relayout(relayout)
+    if new_view is None:
+        raise PreventUpdate
+    zoom, bbox = new_view
+    lons, lats = snapshots.current().river_lod.coords(zoom, bbox)
+    patch = Patch()
+    patch["data"][0]["lon"] = pack(lons)
+    patch["data"][0]["lat"] = pack(lats)
+
+    # re-bin the bathymetry only when the zoom crosses an aggregation level
+    old_zoom = (view or {}).get("zoom", MAP_ZOOM)
+    miles = snapshots.current().mile_filter(miles)
+    level = map_level(year, zoom, miles)
+    if level != map_level(year, old_zoom, miles):
+        _patch_trace(patch["data"][1], map_layer_data(year, layers, level, miles)["bathy"])
+    return patch, {"zoom": zoom}
+
+# another callback for the barge rate plot 
+@figure_cache.memoize("update_barge_rate_plot", cache_version)
 def update_barge_rate_plot(year):
     # filter barge rates by year
-    if year == thisyear: 
-        df52 = barge_rates[(barge_rates["week"] >= start_date) &(barge_rates["week"] <= end_date)]
+    snap = snapshots.current()
+    if year == snap.thisyear: 
+        df52 = snap.barge_idx.recent()
         title = "STL to NOLA Barge Freight Rates: Past 52 Weeks"
     else: 
-        df52 = barge_rates[barge_rates['year']==year]
+        df52 = snap.barge_idx.get(year)
         title = f"STL to NOLA Barge Freight Rates: {year}"
+    mean, lower, upper = snap.bands("barge_rates", df52["week"])
 
     fig = go.Figure()
     fig.add_trace(
@@ -387,21 +517,21 @@ def update_barge_rate_plot(year):
             mode="lines",line=dict(width=2,color='#d95f0e'),name=year,showlegend=False)
     )
     fig.add_trace(
-        go.Scatter(x=df52["week"],y=df52["avg_stlrate"],
+        go.Scatter(x=df52["week"],y=mean,
             mode="lines",line=dict(width=2,color='grey',dash='dash'),name="Mean")
     )
     fig.add_trace(
-        go.Scatter(x=df52["week"],y=df52["plusone"],
+        go.Scatter(x=df52["week"],y=upper,
             mode="lines",line=dict(width=0),hoverinfo="skip",showlegend=False)
     )
     fig.add_trace(
-        go.Scatter(x=df52["week"],y=df52["minusone"],
+        go.Scatter(x=df52["week"],y=lower,
             mode="lines",fill="tonexty",fillcolor="rgba(160,160,160,0.3)",
             name="±1 SD",line=dict(width=0),hoverinfo="skip")
     )
     fig.update_layout(title=title,
         yaxis_title="$/ton",
-        yaxis=dict(range=[barge_rates['stlrate_per_ton'].min(), barge_rates['stlrate_per_ton'].max()]),
+        yaxis=dict(range=[snap.barge_rates['stlrate_per_ton'].min(), snap.barge_rates['stlrate_per_ton'].max()]),
             height=300,legend=dict(
             x=0.02,y=0.98,xanchor="left",yanchor="top",
             bgcolor="rgba(255,255,255,0.6)",bordercolor="black",borderwidth=1),
@@ -411,18 +541,17 @@ def update_barge_rate_plot(year):
     return fig
 
 # water level plot 
-@app.callback(
-    Output("water-plot", "figure"),
-    Input("year-slider", "value")
-)
+@figure_cache.memoize("update_water_plot", cache_version)
 def update_water_plot(year):
     # filter barge rates by year
-    if year == thisyear: 
-        df365 = greenv[(greenv["date"] >= start_date) &(greenv["date"] <= end_date)]
+    snap = snapshots.current()
+    if year == snap.thisyear: 
+        df365 = snap.greenv_idx.recent()
         title = "Greenville River Stage: Past 52 Weeks"
     else: 
-        df365 = greenv[greenv['year']==year]
+        df365 = snap.greenv_idx.get(year)
         title = f"Greenville River Stage: {year}"
+    mean, lower, upper = snap.bands("greenv", df365["date"])
 
     fig = go.Figure()
     fig.add_trace(
@@ -430,21 +559,21 @@ def update_water_plot(year):
             mode="lines",line=dict(width=2,color='#2b8cbe'),showlegend=False,name='Barge Rate')
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["avg_stage"],
+        go.Scatter(x=df365["date"],y=mean,
             mode="lines",line=dict(width=2,color='grey'),name="Mean")
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["plusone"],
+        go.Scatter(x=df365["date"],y=upper,
             mode="lines",line=dict(width=0),hoverinfo="skip",showlegend=False)
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["minusone"],
+        go.Scatter(x=df365["date"],y=lower,
             mode="lines",fill="tonexty",fillcolor="rgba(160,160,160,0.3)",
             name="±1 SD",line=dict(width=0),hoverinfo="skip")
     )
     fig.update_layout(title=title,
         yaxis_title="Stage (ft)",
-        yaxis=dict(range=[greenv['stage'].min(), greenv['stage'].max()]),
+        yaxis=dict(range=[snap.greenv['stage'].min(), snap.greenv['stage'].max()]),
         height=300,legend=dict(
            x=0.02,y=0.98,xanchor="left",yanchor="top",
            bgcolor="rgba(255,255,255,0.6)",bordercolor="black",borderwidth=1),
@@ -455,18 +584,17 @@ def update_water_plot(year):
 
 
 #now a callback for corn price plot 
-@app.callback(
-    Output("cornprice-plot", "figure"),
-    Input("year-slider", "value")
-)
+@figure_cache.memoize("update_cornprice_plot", cache_version)
 def update_cornprice_plot(year):
     # filter barge rates by year
-    if year == thisyear: 
-        df365 = corn_price[(corn_price["date"] >= start_date) &(corn_price["date"] <= end_date)]
+    snap = snapshots.current()
+    if year == snap.thisyear: 
+        df365 = snap.corn_idx.recent()
         title = "Gulf Corn Price: Past 52 Weeks"
     else: 
-        df365 = corn_price[corn_price['year']==year]
+        df365 = snap.corn_idx.get(year)
         title = f"Gulf Corn Price: {year}"
+    mean, lower, upper = snap.bands("corn_price", df365["date"])
 
     fig = go.Figure()
     fig.add_trace(
@@ -474,21 +602,21 @@ def update_cornprice_plot(year):
             mode="lines",line=dict(width=2,color='#006837'),name=year,showlegend=False)
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["avg_price"],
+        go.Scatter(x=df365["date"],y=mean,
             mode="lines",line=dict(width=2,color='grey',dash='dash'),name="Mean")
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["plusone"],
+        go.Scatter(x=df365["date"],y=upper,
             mode="lines",line=dict(width=0),hoverinfo="skip",showlegend=False)
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["minusone"],
+        go.Scatter(x=df365["date"],y=lower,
             mode="lines",fill="tonexty",fillcolor="rgba(160,160,160,0.3)",
             name="±1 SD",line=dict(width=0),hoverinfo="skip")
     )
     fig.update_layout(title=title,
         yaxis_title="Price ($/bushel)",
-        yaxis=dict(range=[corn_price['gulf_corn_price'].min()-0.1, corn_price['gulf_corn_price'].max()+0.1]),
+        yaxis=dict(range=[snap.corn_price['gulf_corn_price'].min()-0.1, snap.corn_price['gulf_corn_price'].max()+0.1]),
         height=300,legend=dict(
            x=0.02,y=0.98,xanchor="left",yanchor="top",
            bgcolor="rgba(255,255,255,0.6)",bordercolor="black",borderwidth=1),
@@ -497,18 +625,17 @@ def update_cornprice_plot(year):
     )
     return fig
 
-@app.callback(
-    Output("soyprice-plot", "figure"),
-    Input("year-slider", "value")
-)
+@figure_cache.memoize("update_soyprice_plot", cache_version)
 def update_soyprice_plot(year):
     # filter barge rates by year
-    if year == thisyear: 
-        df365 = soy_price[(soy_price["date"] >= start_date) &(soy_price["date"] <= end_date)]
+    snap = snapshots.current()
+    if year == snap.thisyear: 
+        df365 = snap.soy_idx.recent()
         title = "Gulf Soy Price: Past 52 Weeks"
     else: 
-        df365 = soy_price[soy_price['year']==year]
+        df365 = snap.soy_idx.get(year)
         title = f"Gulf Soy Price: {year}"
+    mean, lower, upper = snap.bands("soy_price", df365["date"])
 
     fig = go.Figure()
     fig.add_trace(
@@ -516,21 +643,21 @@ def update_soyprice_plot(year):
             mode="lines",line=dict(width=2,color='#f1a340'),name=year,showlegend=False)
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["avg_price"],
+        go.Scatter(x=df365["date"],y=mean,
             mode="lines",line=dict(width=2,color='grey',dash='dash'),name="Mean")
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["plusone"],
+        go.Scatter(x=df365["date"],y=upper,
             mode="lines",line=dict(width=0),hoverinfo="skip",showlegend=False)
     )
     fig.add_trace(
-        go.Scatter(x=df365["date"],y=df365["minusone"],
+        go.Scatter(x=df365["date"],y=lower,
             mode="lines",fill="tonexty",fillcolor="rgba(160,160,160,0.3)",
             name="±1 SD",line=dict(width=0),hoverinfo="skip")
     )
     fig.update_layout(title=title,
         yaxis_title="Price ($/bushel)",
-        yaxis=dict(range=[soy_price['gulf_soy_price'].min()-0.1, soy_price['gulf_soy_price'].max()+0.1]),
+        yaxis=dict(range=[snap.soy_price['gulf_soy_price'].min()-0.1, snap.soy_price['gulf_soy_price'].max()+0.1]),
         height=300,legend=dict(
            x=0.02,y=0.98,xanchor="left",yanchor="top",
            bgcolor="rgba(255,255,255,0.6)",bordercolor="black",borderwidth=1),
@@ -538,6 +665,165 @@ def update_soyprice_plot(year):
         hovermode="x unified"
     )
     return fig
+# clicking a segment on the available-depth layer picks the segment plotted
+@app.callback(
+    Output("draft-segment", "data"),
+    Input("map", "clickData"),
+    prevent_initial_call=True
+)
+def select_draft_segment(click):
+    point = ((click or {}).get("points") or [{}])[0]
+    if point.get("curveNumber") != 3:
+        raise PreventUpdate
+    return int(point["customdata"][0])
+
+
+@app.callback(
+    Output("draft-plot", "figure"),
+    Input("year-slider", "value"),
+    Input("draft-segment", "data")
+)
+@figure_cache.memoize("update_draft_plot", cache_version)
+def update_draft_plot(year, segment=None):
+    snap = snapshots.current()
+    eng = snap.draft()
+    if year == snap.thisyear:
+        stop = eng.latest() + 1
+        start = max(0, stop - 365)
+        span = "Past 52 Weeks"
+    else:
+        start, stop = eng.year_columns(year)
+        span = str(year)
+    # no segment picked yet: the shallowest one at the end of the period
+    if segment is None or segment not in eng:
+        segment = eng.shallowest(max(start, stop - 1))
+    if segment is None:
+        # no surveyed segments: an empty plot rather than an error
+        dates, depth, place = eng.dates[:0], np.array([]), ""
+    else:
+        dates, depth = eng.series(segment, start, stop)
+        place = f", Mile {eng.miles[eng.row(segment)]:.0f}"
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(x=dates,y=depth,
+            mode="lines",line=dict(width=2,color='#1a9850'),name="Available depth",showlegend=False)
+    )
+    fig.add_trace(
+        go.Scatter(x=dates[[0, -1]] if len(dates) else [],y=[PROJECT_DEPTH, PROJECT_DEPTH],
+            mode="lines",line=dict(width=2,color='#d73027',dash='dot'),name=f"{PROJECT_DEPTH:.0f} ft channel")
+    )
+    fig.update_layout(title=f"Available Depth{place}: {span}",
+        yaxis_title="Depth (ft)",
+        height=300,legend=dict(
+           x=0.02,y=0.98,xanchor="left",yanchor="top",
+           bgcolor="rgba(255,255,255,0.6)",bordercolor="black",borderwidth=1),
+        margin=dict(l=50, r=20, t=40, b=40),
+        hovermode="x unified"
+    )
+    return fig
+
+# --------------------------------------------------
+# TIME-SERIES CALLBACKS
+# server-built figures by default; with CLIENTSIDE_PLOTS=1 the browser
+# slices the preloaded series itself (assets/timeseries.js)
+# --------------------------------------------------
+
+# (graph id, server callback, snapshot year index, x column, y column, series name, title prefix)
+TIME_SERIES = [
+    ("barge-rate-plot", update_barge_rate_plot, "barge_idx", "week", "stlrate_per_ton", "barge_rates",
+     "STL to NOLA Barge Freight Rates"),
+    ("water-plot", update_water_plot, "greenv_idx", "date", "stage", "greenv",
+     "Greenville River Stage"),
+    ("cornprice-plot", update_cornprice_plot, "corn_idx", "date", "gulf_corn_price", "corn_price",
+     "Gulf Corn Price"),
+    ("soyprice-plot", update_soyprice_plot, "soy_idx", "date", "gulf_soy_price", "soy_price",
+     "Gulf Soy Price"),
+]
+
+
+def series_store_data():
+    # built once per snapshot, then handed to every page load
+    return snapshots.current().derived("series_store", _series_store_data)
+
+
+def _series_store_data(snap):
+    data = {"thisyear": snap.thisyear, "version": snap.version}
+    for graph_id, fn, idx_name, x, y, series, prefix in TIME_SERIES:
+        idx = getattr(snap, idx_name)
+        # figure styling from the server callback, minus its data
+        template = copy.deepcopy(fn(snap.years[0]))
+        for trace in template["data"]:
+            trace.pop("x", None)
+            trace.pop("y", None)
+        df = idx.frame
+        mean, lower, upper = snap.bands(series, df[x])
+        data[graph_id] = {
+            "template": template,
+            "prefix": prefix,
+            "template_year": snap.years[0],
+            "x": df[x].dt.strftime("%Y-%m-%d").to_numpy(),
+            "y": [df[y].to_numpy(), mean, upper, lower],
+            "year": df["year"].to_numpy(),
+            "recent": idx.recent_mask,
+        }
+    return data
+
+
+if CLIENTSIDE_PLOTS:
+    for graph_id, *_ in TIME_SERIES:
+        app.clientside_callback(
+            ClientsideFunction(namespace="timeseries", function_name="render"),
+            Output(graph_id, "figure"),
+            Input("year-slider", "value"),
+            State("series-store", "data"),
+            State(graph_id, "id"),
+        )
+else:
+    for graph_id, fn, *_ in TIME_SERIES:
+        app.callback(
+            Output(graph_id, "figure"),
+            Input("year-slider", "value")
+        )(fn)
+
+
+# new snapshot: swap the year options and re-select the year, which redraws
+# the map and charts from the new data
+@app.callback(
+    Output("year-slider", "options"),
+    Output("year-slider", "value"),
+    Output("mile-range", "min"),
+    Output("mile-range", "max"),
+    Output("mile-range", "value"),
+    Output("data-version", "data"),
+    Output("series-store", "data"),
+    Input("data-poll", "n_intervals"),
+    State("data-version", "data"),
+    State("year-slider", "value"),
+    State("mile-range", "value"),
+    State("mile-range", "min"),
+    State("mile-range", "max"),
+    prevent_initial_call=True
+)
+def refresh_data(_, version, year, miles, lo, hi):
+    snap = snapshots.current()
+    if snap.version == version:
+        raise PreventUpdate
+    if year not in snap.years:
+        year = snap.years[0]
+    new_lo, new_hi = snap.mile_range
+    # unfiltered stays unfiltered when the range widens; a filter is kept,
+    # clipped to the new bounds
+    full = not miles or (miles[0] <= lo and miles[1] >= hi)
+    if not full:
+        miles = [max(miles[0], new_lo), min(miles[1], new_hi)]
+    if full or miles[0] > miles[1]:
+        miles = [new_lo, new_hi]
+    return (snap.year_options(), year, new_lo, new_hi, miles, snap.version,
+            series_store_data() if CLIENTSIDE_PLOTS else dash.no_update)
+
+metrics.mark("dash app")
+
 # --------------------------------------------------
 # RUN
 # --------------------------------------------------
@@ -0,0 +1,30 @@
+// Clientside year slicing for the time-series charts (CLIENTSIDE_PLOTS=1).
+// The series-store holds every row once; a year change never hits the server.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    timeseries: {
+        render: function (year, store, graphId) {
+            const s = store[graphId];
+            const recent = year === store.thisyear;
+            const keep = [];
+            for (let i = 0; i < s.x.length; i++) {
+                if (recent ? s.recent[i] : s.year[i] === year) {
+                    keep.push(i);
+                }
+            }
+            const pick = (arr) => keep.map((i) => arr[i]);
+            const xs = pick(s.x);
+
+            const fig = JSON.parse(JSON.stringify(s.template));
+            fig.data.forEach((trace, k) => {
+                trace.x = xs;
+                trace.y = pick(s.y[k]);
+            });
+            if (String(fig.data[0].name) === String(s.template_year)) {
+                fig.data[0].name = String(year);
+            }
+            const title = s.prefix + ": " + (recent ? "Past 52 Weeks" : year);
+            fig.layout.title = Object.assign({}, fig.layout.title, {text: title});
+            return fig;
+        }
+    }
+});
@@ -0,0 +1,70 @@
+import os
+import numpy as np
+
+from river_lod import degrees_per_pixel
+
+# above this many points in the selected year the map switches to grid cells
+MAX_RAW_POINTS = int(os.environ.get("MAP_MAX_RAW_POINTS", 5000))
+# at or past this zoom raw points are always drawn
+RAW_ZOOM = 12
+# zoom levels are snapped to whole numbers, and never coarser than this
+MIN_LEVEL = 4
+# approximate cell width on screen (px)
+CELL_PIXELS = 14
+
+
+def aggregation_level(n_points, zoom, max_raw=MAX_RAW_POINTS, raw_zoom=RAW_ZOOM):
+    """Whole-number zoom to bin at, or None to draw raw markers."""
+    if n_points <= max_raw or zoom is None or zoom >= raw_zoom:
+        return None
+    return max(MIN_LEVEL, int(np.floor(zoom)))
+
+
+def cell_size(level):
+    # degrees per cell at a given (whole) zoom
+    return CELL_PIXELS * degrees_per_pixel(level)
+
+
+def grid_cells(lon, lat, depth, level):
+    """Square-grid summary of points: per-cell count, min/q10/mean depth and centroid."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    depth = np.asarray(depth, dtype=float)
+    ok = ~(np.isnan(lon) | np.isnan(lat) | np.isnan(depth))
+    lon, lat, depth = lon[ok], lat[ok], depth[ok]
+    if len(depth) == 0:
+        empty = np.empty(0)
+        return {"lon": empty, "lat": empty, "count": empty.astype(int),
+                "min": empty, "q10": empty, "mean": empty}
+
+    size = cell_size(level)
+    ix = np.floor(lon / size).astype(np.int64)
+    iy = np.floor(lat / size).astype(np.int64)
+    ix -= ix.min()
+    iy -= iy.min()
+    _, cell = np.unique(ix * (iy.max() + 1) + iy, return_inverse=True)
+    n_cells = cell.max() + 1
+
+    count = np.bincount(cell, minlength=n_cells)
+    mean = np.bincount(cell, weights=depth, minlength=n_cells) / count
+    c_lon = np.bincount(cell, weights=lon, minlength=n_cells) / count
+    c_lat = np.bincount(cell, weights=lat, minlength=n_cells) / count
+
+    # sort by cell then depth: each cell is a run, its min is the first value and
+    # the q10 is interpolated inside the run the same way np.percentile does
+    order = np.lexsort((depth, cell))
+    sorted_depth = depth[order]
+    starts = np.concatenate([[0], np.cumsum(count)[:-1]])
+    pos = starts + 0.1 * (count - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, starts + count - 1)
+    frac = pos - lo
+    q10 = sorted_depth[lo] * (1 - frac) + sorted_depth[hi] * frac
+
+    return {"lon": c_lon, "lat": c_lat, "count": count,
+            "min": sorted_depth[starts], "q10": q10, "mean": mean}
+
+
+# cell marker size grows with the number of surveys in it
+def cell_marker_size(count):
+    return np.clip(8 + 3 * np.log2(np.maximum(count, 1)), 8, 26)
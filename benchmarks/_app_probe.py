@@ -0,0 +1,54 @@
+"""Child process for run_suite.py: import the app on a prepared store and
+time its callbacks.  Writes one JSON object to <out.json>.
+
+    python benchmarks/_app_probe.py <out.json> [n_years_to_time]
+"""
+import os
+import sys
+import json
+import time
+import resource
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main(out_path, n_years=3):
+    t0 = time.perf_counter()
+    import app
+    t_import = time.perf_counter() - t0
+
+    snap = app.snapshots.latest
+    years = snap.years[-n_years:]
+    layers = ["bathy", "dredge"]
+    callbacks = {
+        "update_map": lambda y: app.update_map(y, layers),
+        "update_barge_rate_plot": app.update_barge_rate_plot,
+        "update_water_plot": app.update_water_plot,
+        "update_cornprice_plot": app.update_cornprice_plot,
+        "update_soyprice_plot": app.update_soyprice_plot,
+    }
+    out = {"import_s": t_import, "years": years, "callbacks": {}}
+    for name, fn in callbacks.items():
+        cold, warm = [], []
+        for y in years:
+            app.figure_cache.clear()
+            cold.append(timed(fn, y))
+            warm.append(timed(fn, y))
+        out["callbacks"][name] = {"cold_s": cold, "warm_s": warm}
+    out["layout_s"] = timed(app.serve_layout)
+    # Linux reports KB
+    out["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    Path(out_path).write_text(json.dumps(out))
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    main(sys.argv[1], *(int(a) for a in sys.argv[2:3]))
@@ -0,0 +1,59 @@
+"""Seasonal bands: groupby + merge onto every row vs running per-period sums
+(tests/test_climatology.py checks they agree).
+
+    python benchmarks/bench_climatology.py [n_years]
+"""
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import synthetic  # noqa: E402
+from climatology import Climatology  # noqa: E402
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def merged_bands(df):
+    # what data_sources used to do for each series
+    mean = df.groupby(["week_no"])["stage"].mean().reset_index().rename(columns={"stage": "avg_stage"})
+    std = df.groupby(["week_no"])["stage"].std().reset_index().rename(columns={"stage": "std_stage"})
+    df = df.merge(mean, on="week_no", how="inner").merge(std, on="week_no", how="inner")
+    df["plusone"] = df["avg_stage"] + df["std_stage"]
+    df["minusone"] = df["avg_stage"] - df["std_stage"]
+    return df
+
+
+def main(n_years=40):
+    stage = synthetic.series(list(range(2026 - n_years, 2026)))[1]
+    old, new = stage.iloc[:-7], stage.iloc[-7:]
+    print(f"{len(stage)} daily stage rows, {n_years} years")
+
+    merged, t_merge = timed(merged_bands, stage)
+    print(f"  groupby + merge    {t_merge * 1000:9.1f} ms  "
+          f"({merged.memory_usage().sum() / 2**20:.1f} MB with bands on every row)")
+    clim, t_build = timed(Climatology.from_series, stage["date"], stage["stage"])
+    print(f"  running sums       {t_build * 1000:9.1f} ms  ({clim._n.nbytes * 3 / 2**10:.1f} KB of sums)")
+
+    base = Climatology.from_series(old["date"], old["stage"])
+    base.bands()
+    _, t_upd = timed(base.updated, stage["date"], stage["stage"])
+    print(f"  +1 week (series)   {t_upd * 1000:9.1f} ms")
+    appended, t_add = timed(base.append, new["date"], new["stage"])
+    _, t_bands = timed(appended.bands)
+    print(f"  +1 week (append)   {t_add * 1000:9.1f} ms, bands {t_bands * 1000:.2f} ms")
+    _, t_roll = timed(appended.bands, 5)
+    print(f"  last-5-year bands  {t_roll * 1000:9.2f} ms")
+    _, t_look = timed(appended.lookup, stage["date"].iloc[-365:])
+    print(f"  lookup, 1 year     {t_look * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
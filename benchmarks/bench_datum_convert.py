@@ -0,0 +1,67 @@
+"""LWRP -> NAVD88 conversion: one nearest gauge per survey vs a per-point
+plane interpolated along river mile.
+
+    python benchmarks/bench_datum_convert.py [n_points] [survey_miles]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "update_bathym"))
+from datum_convert import DatumOffsets  # noqa: E402
+
+
+def synthetic(n_points, survey_miles, seed=0):
+    rng = np.random.default_rng(seed)
+    # a gauge every ~5 miles, plane dropping ~0.4 ft per mile downstream
+    gauge_miles = np.arange(0, 1000, 5.0)
+    table = pd.DataFrame({
+        "datum": np.repeat(["LWRP2007", "LWRP2014", "DredgingRef"], len(gauge_miles)),
+        "NAVD88_ft": np.concatenate([gauge_miles * 0.4 + off for off in (10, 11, 8)]),
+    })
+    miles = np.tile(gauge_miles, 3)
+    start = rng.uniform(100, 800)
+    point_miles = start + rng.uniform(0, survey_miles, n_points)
+    z = rng.uniform(5, 60, n_points)
+    return table, miles, point_miles, z
+
+
+def main(n_points=200_000, survey_miles=40):
+    table, miles, point_miles, z = synthetic(n_points, survey_miles)
+
+    t0 = time.perf_counter()
+    offsets = DatumOffsets.from_table(table, miles)
+    t_build = time.perf_counter() - t0
+
+    # old: the gauge nearest the survey centroid for every point
+    t0 = time.perf_counter()
+    lw = table[table["datum"] == "LWRP2007"]
+    lw_miles = miles[table["datum"].to_numpy() == "LWRP2007"]
+    nearest = lw.iloc[int(np.argmin(np.abs(lw_miles - point_miles.mean())))]
+    old = nearest["NAVD88_ft"] - z
+    t_old = time.perf_counter() - t0
+
+    # per-row Python, what a naive per-point version would cost
+    n_loop = min(n_points, 20_000)
+    t0 = time.perf_counter()
+    for m, v in zip(point_miles[:n_loop], z[:n_loop]):
+        np.interp(m, lw_miles, lw["NAVD88_ft"].to_numpy()) - v
+    t_loop = (time.perf_counter() - t0) * n_points / n_loop
+
+    t0 = time.perf_counter()
+    new = offsets.to_navd88("LWRP2007", z, point_miles)
+    t_new = time.perf_counter() - t0
+
+    print(f"points={n_points} survey length={survey_miles} mi  table build {t_build * 1000:.1f} ms")
+    print(f"  nearest gauge   {t_old * 1000:9.1f} ms")
+    print(f"  per-row interp  {t_loop * 1000:9.1f} ms (extrapolated)")
+    print(f"  vectorized      {t_new * 1000:9.1f} ms")
+    diff = np.abs(new - old)
+    print(f"  nearest-gauge error vs interpolated plane: mean {diff.mean():.2f} ft, max {diff.max():.2f} ft")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
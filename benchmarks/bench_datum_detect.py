@@ -0,0 +1,91 @@
+"""Datum detection: pdfplumber on every PDF vs the tiered detector.
+
+Builds synthetic survey ZIPs (XYZ header with or without a datum line, a
+one-page PDF with the datum in the title block) and reports per-tier hit
+rates and timings.
+
+    python benchmarks/bench_datum_detect.py [n_surveys]
+"""
+import io
+import sys
+import time
+import zlib
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "update_bathym"))
+import datum_detect  # noqa: E402
+from datum_detect import DatumDetector, get_datum_from_pdf, zip_digest  # noqa: E402
+
+DATUMS = {
+    "NAVD88": "Vertical datum NAVD88",
+    "LWRP2007": "Referenced to the 2007 Low Water Reference Plane",
+    "LWRP2014": "Referenced to the 2014 Low Water Reference Plane",
+}
+
+
+def tiny_pdf(title_text):
+    # one page, text drawn in the bottom-right corner, Flate-compressed stream
+    content = zlib.compress(f"BT /F1 9 Tf 450 60 Td ({title_text}) Tj ET".encode())
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref))
+    return out.getvalue()
+
+
+def synthetic_zip(i):
+    datum, phrase = list(DATUMS.items())[i % len(DATUMS)]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        # a third of the surveys say nothing useful in the XYZ header
+        header = f"# Survey {i}\n" + (f"# Datum: {phrase}\n" if i % 3 else "# Units: feet\n")
+        z.writestr(f"S{i}/S{i}.XYZ", header + "700000.0 3700000.0 12.3\n" * 2000)
+        z.writestr(f"S{i}/S{i}.pdf", tiny_pdf(phrase))
+    return datum, buf.getvalue()
+
+
+def main(n_surveys=60):
+    surveys = [synthetic_zip(i) for i in range(n_surveys)]
+
+    if datum_detect.pdfplumber is None:
+        print("pdfplumber every PDF  skipped (pdfplumber not installed)")
+    else:
+        t0 = time.perf_counter()
+        old_ok = 0
+        for datum, data in surveys:
+            with zipfile.ZipFile(io.BytesIO(data)) as z:
+                name = [n for n in z.namelist() if n.endswith(".pdf")][0]
+                with z.open(name) as f:
+                    old_ok += get_datum_from_pdf(f) == datum
+        t_old = time.perf_counter() - t0
+        print(f"pdfplumber every PDF  {t_old * 1000:8.1f} ms  correct {old_ok}/{n_surveys}")
+
+    detector = DatumDetector()
+    for label in ("cold", "cached"):
+        t0 = time.perf_counter()
+        ok = 0
+        for i, (datum, data) in enumerate(surveys):
+            with zipfile.ZipFile(io.BytesIO(data)) as z:
+                ok += detector.detect(f"S{i}", z, zip_digest(data))[0] == datum
+        print(f"tiered ({label:6s})       {(time.perf_counter() - t0) * 1000:8.1f} ms  correct {ok}/{n_surveys}")
+    detector.report()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
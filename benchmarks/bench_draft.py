@@ -0,0 +1,56 @@
+"""Available-draft matrix: full build, incremental stage update and queries
+(tests/test_draft.py checks the numbers).
+
+    python benchmarks/bench_draft.py [n_segments] [n_years] [n_surveys]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import synthetic  # noqa: E402
+from draft import DraftEngine  # noqa: E402
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main(n_segments=400, n_years=30, n_surveys=200_000):
+    years = list(range(2026 - n_years, 2026))
+    bathy = synthetic.bathy(n_surveys, years)
+    bathy["segment_id"] = np.random.default_rng(5).integers(0, n_segments, n_surveys)
+    stage = synthetic.series(years)[1]
+
+    # everything but the last week, which then arrives as new rows
+    cut = stage["date"].max() - pd.Timedelta(days=7)
+    old, new = stage[stage["date"] <= cut], stage[stage["date"] > cut]
+
+    eng, t_build = timed(DraftEngine.from_frames, bathy, old)
+    print(f"{n_segments} segments x {eng.n_days} days, {n_surveys} survey polygons")
+    print(f"  full build        {t_build * 1000:9.1f} ms")
+    _, t_key = timed(DraftEngine.survey_key, bathy)
+    print(f"  survey key        {t_key * 1000:9.1f} ms")
+    eng2, t_upd = timed(eng.with_stage, new["date"], new["stage"])
+    print(f"  +7 days of stage  {t_upd * 1000:9.1f} ms")
+    _, t_full = timed(eng2.available)
+    print(f"  whole matrix      {t_full * 1000:9.1f} ms")
+    col = eng2.latest()
+    _, t_on = timed(eng2.on, col)
+    print(f"  one day (map)     {t_on * 1000:9.3f} ms")
+    _, t_worst = timed(eng2.worst, *eng2.year_columns(years[-2]))
+    print(f"  year minimum      {t_worst * 1000:9.3f} ms")
+    _, t_series = timed(eng2.series, eng2.shallowest(col), col - 365, col + 1)
+    print(f"  segment, 1 year   {t_series * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
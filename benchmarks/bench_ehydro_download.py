@@ -0,0 +1,144 @@
+"""eHydro ZIP downloads against a local mock blob store: one request at a
+time vs the pooled downloader (tests/test_ehydro_download.py checks its
+retry, probe and streaming paths against the same store).
+
+    python benchmarks/bench_ehydro_download.py [n_surveys] [zip_kb] [latency_ms]
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "update_bathym"))
+from ehydro_download import EHydroDownloader  # noqa: E402
+
+DISTRICTS = ["mvn/", "mvk/", "mvm/", "mvs/"]
+
+
+class MockBlobStore(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, blobs, latency):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.blobs = blobs  # "/<district><id>.ZIP" -> bytes
+        self.latency = latency
+        self.allow_head = True
+        self.fail = {}  # path -> 503s still to send before it answers
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def take_failure(self, path):
+        with self._lock:
+            self.hits += 1
+            if self.fail.get(path, 0) > 0:
+                self.fail[path] -= 1
+                return True
+        return False
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _status(self, code):
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        time.sleep(self.server.latency)
+        if self.server.take_failure(self.path):
+            return self._status(503)
+        if not self.server.allow_head:
+            return self._status(405)
+        body = self.server.blobs.get(self.path)
+        if body is None:
+            return self._status(404)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        if self.server.take_failure(self.path):
+            return self._status(503)
+        body = self.server.blobs.get(self.path)
+        if body is None:
+            return self._status(404)
+        rng = self.headers.get("Range")
+        if rng:
+            # only the "bytes=a-b" form the probe sends
+            a, b = (int(x) for x in rng.split("=")[1].split("-"))
+            part = body[a:b + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {a}-{a + len(part) - 1}/{len(body)}")
+            body = part
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def synthetic_blobs(n, size):
+    # each survey lives under one district, spread over all of them
+    ids, blobs = [], {}
+    for i in range(n):
+        sid = f"LM_{i % 7:02d}_ABC_20240{1 + i % 9}01_CS_{i}"
+        ids.append(sid)
+        blobs[f"/{DISTRICTS[i % len(DISTRICTS)]}{sid}.ZIP"] = os.urandom(64) * (size // 64)
+    return ids, blobs
+
+
+def legacy_fetch(base_url, survey_id):
+    # what read_in_surveys.py used to do: a fresh GET per district until one answers
+    for dist in DISTRICTS:
+        r = requests.get(f"{base_url}{dist}{survey_id}.ZIP", timeout=60)
+        if r.status_code == 200:
+            return r.content
+    return None
+
+
+def main(n_surveys=40, zip_kb=512, latency_ms=30):
+    ids, blobs = synthetic_blobs(n_surveys, zip_kb * 1024)
+    server = MockBlobStore(blobs, latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def run(name, fn):
+        server.hits = 0
+        t0 = time.perf_counter()
+        n = fn()
+        print(f"  {name:22s} {n:4d} zips {server.hits:5d} requests {(time.perf_counter() - t0) * 1000:8.1f} ms")
+
+    print(f"surveys={n_surveys} zip={zip_kb}KB latency={latency_ms}ms districts={len(DISTRICTS)}")
+    run("legacy", lambda: sum(legacy_fetch(server.url, s) is not None for s in ids))
+    with tempfile.TemporaryDirectory() as tmp:
+        dl = EHydroDownloader(server.url, max_workers=4, backoff=0, cache_file=Path(tmp) / "districts.json")
+
+        def pooled(dest_dir=None):
+            n = 0
+            for _, _, content in dl.fetch_all(ids, DISTRICTS, dest_dir):
+                if isinstance(content, Path):
+                    content.unlink()
+                n += content is not None
+            return n
+
+        run("pooled, cold cache", pooled)
+        run("pooled, warm cache", pooled)
+        run("pooled, streamed", lambda: pooled(tmp))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
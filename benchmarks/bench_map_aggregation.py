@@ -0,0 +1,49 @@
+"""Map bathymetry layer as the survey data grows: raw markers vs grid cells.
+
+    python benchmarks/bench_map_aggregation.py
+"""
+import sys
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from plotly.utils import PlotlyJSONEncoder
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bathy_aggregate import grid_cells, cell_marker_size  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+ZOOM = 7
+
+
+def synthetic_points(n, seed=0):
+    # points strung along a wandering channel from Cairo to Baton Rouge
+    rng = np.random.default_rng(seed)
+    t = rng.uniform(0, 1, n)
+    lat = 37.0 - 6.5 * t + rng.normal(0, 0.01, n)
+    lon = -89.2 - 2.0 * t + 0.3 * np.sin(40 * t) + rng.normal(0, 0.01, n)
+    depth = rng.gamma(6, 5, n)
+    return lon, lat, depth
+
+
+def payload(trace):
+    return len(json.dumps(trace, cls=PlotlyJSONEncoder))
+
+
+def main():
+    print(f"{'points':>9} {'raw KB':>9} {'cells':>7} {'cell KB':>8} {'bin ms':>7}")
+    for n in SIZES:
+        lon, lat, depth = synthetic_points(n)
+        raw = payload({"lon": lon, "lat": lat, "marker": {"color": depth}})
+        t0 = time.perf_counter()
+        cells = grid_cells(lon, lat, depth, ZOOM)
+        dt = time.perf_counter() - t0
+        agg = payload({"lon": cells["lon"], "lat": cells["lat"],
+                       "marker": {"size": cell_marker_size(cells["count"]), "color": cells["q10"]},
+                       "customdata": np.column_stack([cells["count"], cells["min"], cells["q10"], cells["mean"]])})
+        print(f"{n:>9} {raw / 1024:9.0f} {len(cells['count']):>7} {agg / 1024:8.1f} {dt * 1000:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
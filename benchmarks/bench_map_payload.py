@@ -0,0 +1,44 @@
+"""Map callback payload: full figure per year change vs the Patch delta.
+
+    python benchmarks/bench_map_payload.py
+"""
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+import app  # noqa: E402
+
+
+def full_figure(year, layers):
+    # what update_map used to return: river + both layers every time
+    fig = app.base_map_figure(app.snapshots.latest)
+    data = app.map_layer_data(year, layers)
+    fig.update_traces(selector=1, **data["bathy"])
+    fig.update_traces(selector=2, **data["dredge"])
+    return fig
+
+
+def main():
+    layers = ["bathy", "dredge"]
+    print(f"{'year':>6} {'full KB':>9} {'patch KB':>9} {'ratio':>6} {'full ms':>8} {'patch ms':>9}")
+    for year in app.snapshots.latest.years:
+        t0 = time.perf_counter()
+        full = pio.to_json(full_figure(year, layers), validate=False)
+        t1 = time.perf_counter()
+        patch = json.dumps(app.update_map(year, layers).to_plotly_json(), cls=PlotlyJSONEncoder)
+        t2 = time.perf_counter()
+        print(f"{year:>6} {len(full) / 1024:9.1f} {len(patch) / 1024:9.1f} "
+              f"{len(full) / len(patch):6.1f} {(t1 - t0) * 1000:8.1f} {(t2 - t1) * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
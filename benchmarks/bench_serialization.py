@@ -0,0 +1,126 @@
+"""Callback payloads before and after the serialization fast path.
+
+For each of the five figure callbacks: serialize time with plotly's json
+and orjson engines, with and without typed arrays, and the bytes on the
+wire raw, gzipped and (if installed) brotli-compressed.  Each TYPED_ARRAYS
+setting runs in its own interpreter on one synthetic store.
+
+    python benchmarks/bench_serialization.py [n_surveys] [n_years_to_time]
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def best_of(fn, n=5):
+    best = float("inf")
+    for _ in range(n):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def child(out_path, n_years):
+    # runs inside a fresh interpreter with TYPED_ARRAYS already set
+    import app
+    from plotly.io.json import to_json_plotly
+    from serialize import COMPRESS_MIN_BYTES
+
+    snap = app.snapshots.latest
+    years = snap.years[-n_years:]
+    layers = ["bathy", "dredge"]
+    callbacks = {
+        "update_map": lambda y: app.update_map(y, layers),
+        "update_barge_rate_plot": app.update_barge_rate_plot,
+        "update_water_plot": app.update_water_plot,
+        "update_cornprice_plot": app.update_cornprice_plot,
+        "update_soyprice_plot": app.update_soyprice_plot,
+    }
+    engines = ["json"]
+    try:
+        import orjson  # noqa: F401
+        engines.append("orjson")
+    except ImportError:
+        pass
+
+    out = {}
+    for name, fn in callbacks.items():
+        row = {}
+        for y in years:
+            value = fn(y)
+            # Dash wraps the callback output in its response, then serializes it
+            body = {"response": {"map" if name == "update_map" else name: {"figure": value}}}
+            for engine in engines:
+                text, seconds = best_of(lambda: to_json_plotly(body, engine=engine))
+                r = row.setdefault(engine, {"seconds": 0.0, "raw": 0, "gzip": 0, "br": 0})
+                data = text.encode()
+                r["seconds"] += seconds
+                r["raw"] += len(data)
+                small = len(data) < COMPRESS_MIN_BYTES
+                r["gzip"] += len(data) if small else len(gzip.compress(data, compresslevel=6))
+                if brotli is not None:
+                    r["br"] += len(data) if small else len(brotli.compress(data, quality=5))
+        out[name] = {engine: {k: v / len(years) for k, v in r.items()} for engine, r in row.items()}
+    Path(out_path).write_text(json.dumps(out))
+
+
+def run(n_surveys=100_000, n_years=3):
+    import synthetic
+    from data_store import build_store
+    from snapshot import prepare_frames
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        build_store(prepare_frames(synthetic.frames(n_surveys)), work / "app_store")
+        cache = work / "source_cache"
+        cache.mkdir()
+        for name in ("freight_rates_southbound", "price_spreads_futures_usda"):
+            (cache / f"{name}.json").write_text(json.dumps({"checked": time.time()}))
+        env = dict(os.environ, DATA_STORE=str(work / "app_store"), SOURCE_CACHE_DIR=str(cache),
+                   DATA_REFRESH_SECONDS="0", BATHY_STORE=str(work / "no_bathy_store"),
+                   USDA_BASE_URL="http://127.0.0.1:9/")
+        env.pop("FIGURE_CACHE_BACKEND", None)
+        results = {}
+        for typed in ("0", "1"):
+            out_path = work / f"serialize-{typed}.json"
+            subprocess.run([sys.executable, __file__, "--child", str(out_path), str(n_years)],
+                           env=dict(env, TYPED_ARRAYS=typed), check=True, cwd=ROOT,
+                           stdout=subprocess.DEVNULL)
+            results[typed] = json.loads(out_path.read_text())
+
+    print(f"{n_surveys} survey polygons, mean over the last {n_years} years; sizes in KB")
+    print(f"{'callback':<24} {'arrays':<6} {'engine':<6} {'ms':>8} {'raw':>9} {'gzip':>8} {'br':>8}")
+    for name in results["0"]:
+        for typed, label in (("0", "lists"), ("1", "typed")):
+            for engine, r in results[typed][name].items():
+                br = f"{r['br'] / 1024:8.1f}" if brotli is not None else f"{'-':>8}"
+                print(f"{name:<24} {label:<6} {engine:<6} {r['seconds'] * 1000:8.2f} "
+                      f"{r['raw'] / 1024:9.1f} {r['gzip'] / 1024:8.1f} {br}")
+        before = results["0"][name]["json"]
+        after = results["1"][name].get("orjson", results["1"][name]["json"])
+        wire = after["br"] if brotli is not None else after["gzip"]
+        print(f"{'':<24} before {before['seconds'] * 1000:.2f} ms / {before['raw'] / 1024:.1f} KB, "
+              f"after {after['seconds'] * 1000:.2f} ms / {wire / 1024:.1f} KB on the wire")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        os.chdir(ROOT)
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        run(*(int(a) for a in sys.argv[1:3]))
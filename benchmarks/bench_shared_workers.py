@@ -0,0 +1,86 @@
+"""Memory per worker: frames mapped from the shared store vs private copies.
+
+Starts N worker processes the way gunicorn.conf.py runs them (DATA_LOADER=
+external, snapshot from the store), touches every year's slices, then reads
+each worker's Rss / Pss / Private from /proc/<pid>/smaps_rollup.  "copy"
+mode deep-copies the frames first, which is what every worker used to hold.
+
+    python benchmarks/bench_shared_workers.py [n_workers] [n_surveys]
+"""
+import os
+import sys
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+
+def smaps(pid):
+    out = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, value = line.split(":", 1)
+        out[key] = int(value.split()[0]) / 1024  # MB
+    out["Private"] = out.get("Private_Clean", 0) + out.get("Private_Dirty", 0)
+    return out
+
+
+def child(mode):
+    # runs inside a worker: build the snapshot, touch every slice, wait
+    import numpy as np
+    from snapshot import DataSnapshot, load_frames
+    frames, version = load_frames()
+    if mode == "copy":
+        frames = {k: v.copy(deep=True) for k, v in frames.items()}
+    snap = DataSnapshot(frames, version)
+    total = 0.0
+    for y in snap.years:
+        b = snap.bathy_idx.get(y)
+        total += float(np.nansum(b["depth"].to_numpy()) + np.nansum(b["LON"].to_numpy()))
+    print("ready", flush=True)
+    sys.stdin.read()
+
+
+def run(mode, n_workers, store):
+    env = dict(os.environ, DATA_STORE=str(store), DATA_LOADER="external",
+               DATA_REFRESH_SECONDS="0", BATHY_STORE=str(store / "no_bathy_store"))
+    procs = []
+    for _ in range(n_workers):
+        p = subprocess.Popen([sys.executable, __file__, "--child", mode], env=env, cwd=ROOT,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        p.stdout.readline()
+        procs.append(p)
+    # Pss splits shared pages between the workers mapping them
+    stats = [smaps(p.pid) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return stats
+
+
+def main(n_workers=4, n_surveys=500_000):
+    import synthetic
+    from data_store import build_store
+    from snapshot import prepare_frames
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Path(tmp)
+        build_store(prepare_frames(synthetic.frames(n_surveys)), store)
+        print(f"{n_surveys} surveys, {n_workers} workers (MB)")
+        print(f"{'mode':6s} {'Rss/worker':>11s} {'Private/worker':>15s} {'Pss total':>10s}")
+        for mode in ("copy", "mmap"):
+            stats = run(mode, n_workers, store)
+            rss = sum(s["Rss"] for s in stats) / n_workers
+            private = sum(s["Private"] for s in stats) / n_workers
+            pss = sum(s["Pss"] for s in stats)
+            print(f"{mode:6s} {rss:11.1f} {private:15.1f} {pss:10.1f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        os.chdir(ROOT)
+        child(sys.argv[2])
+    else:
+        main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,106 @@
+"""Source cache against a local stand-in for the USDA server: a cold
+download, then the cached copy served while the slow server is revalidated
+(tests/test_source_cache.py checks the behaviour).
+
+    python benchmarks/bench_source_cache.py [latency_ms]
+"""
+import sys
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from source_cache import CachedSource  # noqa: E402
+
+
+class StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, body):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.body = body
+        self.latency = 0.0
+        self.status = 200
+        self.hits = 0
+        self.not_modified = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/GTRTable.csv"
+
+    @property
+    def etag(self):
+        return '"%s"' % hashlib.md5(self.body).hexdigest()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.hits += 1
+        time.sleep(self.server.latency)
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == self.server.etag:
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+
+def parse_rows(path):
+    # stands in for the openpyxl parsers: reads the file by path, raises on junk
+    rows = [line.split(",") for line in Path(path).read_text().splitlines()]
+    if not rows or rows[0] != ["week", "rate"]:
+        raise ValueError("not a rate table")
+    return rows[1:]
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main(latency_ms=500):
+    good = b"week,rate\n1,20.5\n2,21.0\n"
+    server = StandIn(good)
+    server.latency = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def run(name, fn):
+        server.hits = 0
+        _, dt = timed(fn)
+        print(f"  {name:34s} {dt * 1000:8.1f} ms {server.hits:3d} requests")
+
+    print(f"server latency {latency_ms} ms")
+    with tempfile.TemporaryDirectory() as tmp:
+        src = CachedSource("rates", server.url, parse_rows, suffix=".csv", cache_dir=tmp, fresh_for=3600)
+        run("cold cache (download)", src.get)
+        run("fresh copy", src.get)
+        # stale: get() answers from the cache and revalidates behind it
+        src.fresh_for = 0
+        run("stale copy, refresh in background", src.get)
+        src._thread.join()
+        run("revalidate, unchanged (304)", src.revalidate)
+        server.body = good + b"3,22.3\n"
+        run("revalidate, new copy", src.revalidate)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
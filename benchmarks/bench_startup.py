@@ -0,0 +1,58 @@
+"""Dashboard data load: raw sources vs the columnar store.
+
+    python benchmarks/bench_startup.py
+"""
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import data_sources  # noqa: E402
+from data_store import DataStore, build_store  # noqa: E402
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    os.chdir(ROOT)  # the loaders use relative paths
+    loaders = {
+        "bathy": data_sources.load_bathy,
+        "dredge": data_sources.load_dredge,
+        "barge_rates": data_sources.load_barge_rates,
+        "greenv": data_sources.load_stage,
+        "corn_soy": data_sources.load_corn_soy,
+        "river": lambda: data_sources.river_frame(data_sources.load_river_line()),
+    }
+    frames, total = {}, 0.0
+    print("raw sources")
+    for name, fn in loaders.items():
+        try:
+            out, dt = timed(fn)
+        except Exception as e:  # missing file or no network
+            print(f"  {name:12s} unavailable ({type(e).__name__})")
+            continue
+        total += dt
+        if name == "corn_soy":
+            frames["corn_price"], frames["soy_price"] = out
+        else:
+            frames[name] = out
+        print(f"  {name:12s} {dt * 1000:9.1f} ms")
+    print(f"  {'total':12s} {total * 1000:9.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, dt = timed(build_store, frames, tmp)
+        print(f"build store    {dt * 1000:9.1f} ms")
+        _, t_open = timed(lambda: DataStore(tmp).load_all())
+        print(f"store load     {t_open * 1000:9.1f} ms  ({total / t_open:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
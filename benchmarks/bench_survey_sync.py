@@ -0,0 +1,128 @@
+"""eHydro id sync against a local mock FeatureServer: old page loop vs
+parallel pages vs an incremental (high-water mark) run.
+
+    python benchmarks/bench_survey_sync.py [n_records] [latency_ms]
+"""
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "update_bathym"))
+from survey_sync import FeatureServerSync, SyncState  # noqa: E402
+
+# like the real service: pages are capped below what the old loop asks for
+MAX_RECORD_COUNT = 1000
+
+
+class MockFeatureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, records, latency):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.records = records
+        self.latency = latency
+        self.hits = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/query"
+
+    def select(self, where):
+        # just enough of the SQL the clients send
+        prefixes = re.findall(r"LIKE '(\w+)%'", where)
+        after = re.search(r"OBJECTID > (\d+)", where)
+        rows = self.records
+        if prefixes:
+            rows = [r for r in rows if r["surveyjobidpk"].startswith(tuple(prefixes))]
+        if after:
+            rows = [r for r in rows if r["OBJECTID"] > int(after.group(1))]
+        return rows
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.hits += 1
+        time.sleep(self.server.latency)
+        q = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        rows = self.server.select(q.get("where", "1=1"))
+        if q.get("returnCountOnly") == "true":
+            body = {"count": len(rows)}
+        else:
+            offset = int(q.get("resultOffset", 0))
+            n = min(int(q.get("resultRecordCount", MAX_RECORD_COUNT)), MAX_RECORD_COUNT)
+            page = rows[offset:offset + n]
+            body = {"features": [{"attributes": r} for r in page],
+                    "exceededTransferLimit": offset + n < len(rows)}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def synthetic_records(n, start=1):
+    reach = ["LM", "UM", "MR", "OH"]
+    return [{"OBJECTID": i, "surveyjobidpk": f"{reach[i % 4]}_{i % 30:02d}_ABC_2024{1 + i % 12:02d}01_CS_{i}",
+             "surveydatestart": 1_700_000_000_000 + i * 86_400_000} for i in range(start, start + n)]
+
+
+def legacy_loop(url):
+    # what check_for_surveys.py used to do: every record, one page at a time
+    params = {"f": "json", "where": "1=1", "outFields": "surveyjobidpk", "resultOffset": 0,
+              "resultRecordCount": 2000, "returnGeometry": "false"}
+    ids = []
+    while True:
+        r = requests.get(url, params=params)
+        r.raise_for_status()
+        feats = r.json().get("features", [])
+        if not feats:
+            break
+        ids.extend(f["attributes"]["surveyjobidpk"] for f in feats)
+        params["resultOffset"] += params["resultRecordCount"]
+    return [i for i in ids if i.startswith(("LM", "UM"))]
+
+
+def main(n_records=20000, latency_ms=50):
+    server = MockFeatureServer(synthetic_records(n_records), latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def run(name, fn):
+        server.hits = 0
+        t0 = time.perf_counter()
+        ids = fn()
+        print(f"  {name:12s} {len(ids):7d} ids {server.hits:4d} requests {(time.perf_counter() - t0) * 1000:8.1f} ms")
+        return ids
+
+    print(f"records={n_records} latency={latency_ms}ms maxRecordCount={MAX_RECORD_COUNT}")
+    # the old loop asks for 2000 but gets 1000 per page, so it skips records
+    run("legacy", lambda: legacy_loop(server.url))
+    with tempfile.TemporaryDirectory() as tmp:
+        state = SyncState(Path(tmp) / "state.json")
+        sync = FeatureServerSync(server.url, backoff=0)
+
+        def synced(full):
+            rows = sync.sync(state=state, full=full)
+            state.advance(sync.url, ("LM", "UM"), rows)
+            return rows
+
+        run("full", lambda: synced(True))
+        run("incremental", lambda: synced(False))
+        server.records = server.records + synthetic_records(40, start=n_records + 1)
+        run("+40 records", lambda: synced(False))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,68 @@
+"""Vessel-to-survey depth sampling: old per-ping loop vs the STRtree engine.
+
+    python benchmarks/bench_vessel_sampling.py [n_points] [n_pings]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import geopandas as gpd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "update_bathym"))
+from vessel_sampling import SurveyDepthSampler, depth_summary  # noqa: E402
+
+UTM = "EPSG:26915"
+
+
+def synthetic_survey(n_points, n_pings, seed=0):
+    # a 10 km x 400 m channel reach with pings scattered along it
+    rng = np.random.default_rng(seed)
+    x0, y0 = 700_000.0, 3_700_000.0
+    px = x0 + rng.uniform(0, 10_000, n_points)
+    py = y0 + rng.uniform(0, 400, n_points)
+    survey = gpd.GeoDataFrame(
+        {"Z_navd88": rng.normal(250, 10, n_points)},
+        geometry=gpd.points_from_xy(px, py), crs=UTM,
+    ).to_crs("EPSG:4326")
+    vx = x0 + rng.uniform(0, 10_000, n_pings)
+    vy = y0 + rng.uniform(0, 400, n_pings)
+    vessels = gpd.GeoDataFrame(geometry=gpd.points_from_xy(vx, vy), crs=UTM)
+    return survey, vessels
+
+
+def legacy_loop(gdf, vessels_in):
+    vessel_bathyms = []
+    for pt in vessels_in.geometry:
+        buf = pt.buffer(50)
+        intersecting = gdf.to_crs(UTM)[gdf.to_crs(UTM).intersects(buf)]
+        if not intersecting.empty:
+            vessel_bathyms.append(intersecting["Z_navd88"].mean())
+    return depth_summary(vessel_bathyms)
+
+
+def engine(gdf, vessels_in):
+    sampler = SurveyDepthSampler(gdf, UTM)
+    return depth_summary(sampler.vessel_means(np.asarray(vessels_in.geometry.array), gdf["Z_navd88"]))
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main(n_points=2000, n_pings=500):
+    survey, vessels = synthetic_survey(n_points, n_pings)
+    old, t_old = timed(legacy_loop, survey, vessels)
+    new, t_new = timed(engine, survey, vessels)
+    print(f"points={n_points} pings={n_pings}")
+    print(f"  loop    {t_old * 1000:10.1f} ms")
+    print(f"  engine  {t_new * 1000:10.1f} ms  ({t_old / t_new:.0f}x)")
+    for k in old:
+        # the buffer polygon is slightly smaller than the exact radius
+        print(f"  {k:12s} loop={old[k]:.3f} engine={new[k]:.3f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
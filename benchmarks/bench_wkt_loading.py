@@ -0,0 +1,68 @@
+"""Bathymetry geometry loading: per-row WKT/lambda path vs shapely 2 arrays.
+
+    python benchmarks/bench_wkt_loading.py [max_legacy_rows]
+
+The legacy path is skipped above max_legacy_rows (default 100k) since it
+takes minutes at 1M rows.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely import wkt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from data_sources import representative_xy  # noqa: E402
+import shapely  # noqa: E402
+
+SIZES = (1_000, 100_000, 1_000_000)
+
+
+def synthetic_boxes(n, seed=0):
+    # survey boxes a few km across scattered along the lower river
+    rng = np.random.default_rng(seed)
+    minx = rng.uniform(-91.5, -89.0, n)
+    miny = rng.uniform(30.0, 37.0, n)
+    w = rng.uniform(0.005, 0.05, n)
+    h = rng.uniform(0.005, 0.05, n)
+    return pd.DataFrame({"geometry": shapely.to_wkt(shapely.box(minx, miny, minx + w, miny + h))})
+
+
+def legacy(df):
+    bathy = df.copy()
+    bathy["geometry"] = bathy["geometry"].apply(wkt.loads)
+    bathy = gpd.GeoDataFrame(bathy, geometry="geometry", crs="EPSG:4326")
+    bathy["rep_point"] = bathy.geometry.representative_point()
+    bathy["LON"] = bathy["rep_point"].apply(lambda p: p.x)
+    bathy["LAT"] = bathy["rep_point"].apply(lambda p: p.y)
+    return bathy["LON"].to_numpy(), bathy["LAT"].to_numpy()
+
+
+def vectorized(df):
+    geoms = shapely.from_wkt(df["geometry"].to_numpy())
+    return representative_xy(geoms, shapely.bounds(geoms))
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main(max_legacy_rows=100_000):
+    print(f"{'rows':>9} {'legacy s':>9} {'vector s':>9} {'speedup':>8}")
+    for n in SIZES:
+        df = synthetic_boxes(n)
+        new, t_new = timed(vectorized, df)
+        if n <= max_legacy_rows:
+            _, t_old = timed(legacy, df)
+            print(f"{n:>9} {t_old:9.3f} {t_new:9.3f} {t_old / t_new:7.0f}x")
+        else:
+            print(f"{n:>9} {'-':>9} {t_new:9.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,230 @@
+"""Benchmark suite: data store, snapshot, callbacks and the survey pipeline
+on synthetic data at several sizes, with peak memory per stage.
+
+    python benchmarks/run_suite.py                      # small + medium
+    python benchmarks/run_suite.py --sizes large
+    python benchmarks/run_suite.py --baseline benchmarks/results/<sha>.json
+
+Nothing touches the network: the app runs on a prebuilt store with its
+remote sources marked fresh.  Results go to benchmarks/results/<commit>.json
+so runs on different commits can be compared with --baseline.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "update_bathym"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import synthetic  # noqa: E402
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# surveys in the dashboard / points in one survey / AIS pings near it
+SIZES = {
+    "small": {"surveys": 2_000, "points": 2_000, "pings": 500, "dredge": 200},
+    "medium": {"surveys": 20_000, "points": 20_000, "pings": 5_000, "dredge": 2_000},
+    "large": {"surveys": 200_000, "points": 200_000, "pings": 50_000, "dredge": 20_000},
+}
+
+# slower than the baseline by more than this is reported as a regression
+REGRESSION = 1.2
+
+
+def measure(fn, repeat=3):
+    """Best-of-n wall time, then one extra run under tracemalloc for peak memory."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 2**20}
+
+
+# ---------------------------
+# STAGES: name -> function(size spec, workdir) returning {metric: value}
+def stage_store(spec, work):
+    from data_store import DataStore, build_store
+    from snapshot import prepare_frames
+    frames = prepare_frames(synthetic.frames(spec["surveys"], n_dredge=spec["dredge"]))
+    path = work / "store"
+    out = {"build": measure(lambda: build_store(frames, path), repeat=1)}
+    out["load"] = measure(lambda: DataStore(path).load_all())
+    return out
+
+
+def stage_snapshot(spec, work):
+    from snapshot import DataSnapshot, prepare_frames
+    raw = synthetic.frames(spec["surveys"], n_dredge=spec["dredge"])
+    frames = prepare_frames(raw)
+    return {"prepare": measure(lambda: prepare_frames(raw), repeat=1),
+            "build": measure(lambda: DataSnapshot(frames, "bench"), repeat=1)}
+
+
+def stage_map_aggregation(spec, work):
+    from bathy_aggregate import grid_cells
+    b = synthetic.bathy(spec["surveys"], [2024])
+    return {f"zoom{z}": measure(lambda z=z: grid_cells(b["LON"], b["LAT"], b["depth"], z))
+            for z in (5, 8)}
+
+
+def stage_vessel_sampling(spec, work):
+    import numpy as np
+    import geopandas as gpd
+    import shapely
+    from vessel_sampling import SurveyDepthSampler, depth_summary
+    x, y, z = synthetic.survey_points(spec["points"])
+    gdf = gpd.GeoDataFrame({"Z_navd88": z}, geometry=gpd.points_from_xy(x, y), crs="EPSG:26915")
+    vx, vy = synthetic.vessel_pings(spec["pings"])
+    pings = shapely.points(vx, vy)
+
+    def run():
+        sampler = SurveyDepthSampler(gdf, "EPSG:26915")
+        return depth_summary(sampler.vessel_means(pings, gdf["Z_navd88"].to_numpy()))
+    return {"sample": measure(run), "pings": len(pings), "hit": bool(np.isfinite(run()["bathym_mean"]))}
+
+
+def stage_datum_convert(spec, work):
+    import numpy as np
+    import pandas as pd
+    import shapely
+    from river_miles import RiverMileIndex
+    from datum_convert import DatumOffsets
+    x, y, z = synthetic.survey_points(spec["points"])
+    line = shapely.LineString([(690_000, 3_700_200), (720_000, 3_700_200)])
+    index = RiverMileIndex(line)
+    gauges = shapely.points(np.linspace(690_000, 720_000, 8), np.full(8, 3_700_200.0))
+    table = pd.DataFrame({"datum": "LWRP2007", "NAVD88_ft": np.linspace(250, 240, 8)})
+    offsets = DatumOffsets.from_table(table, index.miles(gauges))
+    pts = shapely.points(x, y)
+    return {"miles": measure(lambda: index.miles(pts)),
+            "convert": measure(lambda: offsets.to_navd88("LWRP2007", z, index.miles(pts)))}
+
+
+def stage_app(spec, work):
+    # a fresh interpreter per size: import time and callbacks on a prepared store
+    from data_store import build_store
+    from snapshot import prepare_frames
+    build_store(prepare_frames(synthetic.frames(spec["surveys"], n_dredge=spec["dredge"])),
+                work / "app_store")
+    cache = work / "source_cache"
+    cache.mkdir(exist_ok=True)
+    for name in ("freight_rates_southbound", "price_spreads_futures_usda"):
+        (cache / f"{name}.json").write_text(json.dumps({"checked": time.time()}))
+    env = dict(os.environ, DATA_STORE=str(work / "app_store"), SOURCE_CACHE_DIR=str(cache),
+               DATA_REFRESH_SECONDS="0", BATHY_STORE=str(work / "no_bathy_store"),
+               USDA_BASE_URL="http://127.0.0.1:9/")
+    env.pop("FIGURE_CACHE_BACKEND", None)
+    out_path = work / "app_probe.json"
+    subprocess.run([sys.executable, str(ROOT / "benchmarks" / "_app_probe.py"), str(out_path)],
+                   env=env, check=True, cwd=ROOT, stdout=subprocess.DEVNULL)
+    probe = json.loads(out_path.read_text())
+    out = {"import": {"seconds": probe["import_s"], "peak_mb": probe["peak_rss_mb"]},
+           "layout": {"seconds": probe["layout_s"]}}
+    for name, t in probe["callbacks"].items():
+        out[f"{name}.cold"] = {"seconds": sum(t["cold_s"]) / len(t["cold_s"])}
+        out[f"{name}.warm"] = {"seconds": sum(t["warm_s"]) / len(t["warm_s"])}
+    return out
+
+
+STAGES = {
+    "store": stage_store,
+    "snapshot": stage_snapshot,
+    "map_aggregation": stage_map_aggregation,
+    "vessel_sampling": stage_vessel_sampling,
+    "datum_convert": stage_datum_convert,
+    "app": stage_app,
+}
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes, stages):
+    results = {}
+    for size in sizes:
+        for name in stages:
+            key = f"{size}/{name}"
+            with tempfile.TemporaryDirectory() as tmp:
+                try:
+                    results[key] = STAGES[name](SIZES[size], Path(tmp))
+                except ImportError as e:
+                    results[key] = {"skipped": f"missing dependency: {e.name}"}
+                except Exception as e:
+                    results[key] = {"error": f"{type(e).__name__}: {e}"}
+            print_stage(key, results[key])
+    return results
+
+
+def print_stage(key, metrics):
+    if "skipped" in metrics or "error" in metrics:
+        print(f"{key:34s} {metrics.get('skipped') or metrics.get('error')}")
+        return
+    for metric, value in metrics.items():
+        if isinstance(value, dict):
+            mem = f"{value['peak_mb']:8.1f} MB" if "peak_mb" in value else ""
+            print(f"{key + '.' + metric:34s} {value['seconds'] * 1000:10.1f} ms {mem}")
+
+
+def compare(results, baseline):
+    print(f"\ncompared with {baseline.get('commit')} (regression > {REGRESSION:.0%} of baseline)")
+    worse = 0
+    for key, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline["results"].get(key, {}).get(metric)
+            if not isinstance(value, dict) or not isinstance(old, dict):
+                continue
+            ratio = value["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+            flag = "  REGRESSION" if ratio > REGRESSION else ""
+            worse += bool(flag)
+            print(f"{key + '.' + metric:34s} {ratio:6.2f}x{flag}")
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(SIZES))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--baseline", type=Path, help="earlier results JSON to compare with")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    results = run(args.sizes, args.stages)
+    doc = {"commit": git_commit(), "when": time.time(), "python": platform.python_version(),
+           "machine": platform.platform(), "sizes": {s: SIZES[s] for s in args.sizes},
+           "results": results}
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{doc['commit']}.json"
+        path.write_text(json.dumps(doc, indent=1))
+        print(f"\nsaved {path}")
+    if args.baseline:
+        sys.exit(1 if compare(results, json.loads(args.baseline.read_text())) else 0)
+
+
+if __name__ == "__main__":
+    main()
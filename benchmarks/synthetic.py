@@ -0,0 +1,115 @@
+"""Synthetic dashboard and pipeline data at a chosen size.
+
+Shapes and column names match what data_sources.load_all() produces, so
+the store, the app and the callbacks run on it unchanged.
+"""
+import numpy as np
+import pandas as pd
+
+# a rough Mississippi: Cairo (mile ~950) down to Baton Rouge, lon/lat
+RIVER_LON = np.array([-89.17, -89.53, -90.05, -90.58, -91.06, -91.15, -91.19])
+RIVER_LAT = np.array([37.00, 36.20, 35.10, 34.00, 33.00, 31.60, 30.45])
+RIVER_MILES = (950.0, 230.0)
+
+
+def river(n_vertices=20_000, seed=0):
+    # densified, slightly wiggly line so LOD and clipping have work to do
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, len(RIVER_LON) - 1, n_vertices)
+    lon = np.interp(t, np.arange(len(RIVER_LON)), RIVER_LON) + rng.normal(0, 0.002, n_vertices)
+    lat = np.interp(t, np.arange(len(RIVER_LAT)), RIVER_LAT)
+    return pd.DataFrame({"lon": lon, "lat": lat})
+
+
+def _along_river(frac, rng, jitter=0.01):
+    t = frac * (len(RIVER_LON) - 1)
+    lon = np.interp(t, np.arange(len(RIVER_LON)), RIVER_LON) + rng.normal(0, jitter, len(frac))
+    lat = np.interp(t, np.arange(len(RIVER_LAT)), RIVER_LAT) + rng.normal(0, jitter, len(frac))
+    return lon, lat
+
+
+def bathy(n_surveys, years, seed=0):
+    rng = np.random.default_rng(seed)
+    frac = rng.uniform(0, 1, n_surveys)
+    lon, lat = _along_river(frac, rng)
+    year = rng.choice(years, n_surveys)
+    day = rng.integers(0, 365, n_surveys)
+    date = pd.to_datetime(year.astype(str), format="%Y", utc=True) + pd.to_timedelta(day, unit="D")
+    mile = RIVER_MILES[0] + frac * (RIVER_MILES[1] - RIVER_MILES[0])
+    mean = rng.normal(240, 15, n_surveys)
+    water = rng.normal(280, 5, n_surveys)
+    # like the real rows: about half the surveys report the bed sign-flipped
+    raw = np.where(rng.uniform(0, 1, n_surveys) < 0.5, -mean, mean)
+    return pd.DataFrame({
+        "file": [f"LM_{i % 40:02d}_SYN_{d:%Y%m%d}_CS_{i}.gpkg" for i, d in enumerate(date)],
+        "date": date.astype(str),
+        "bathym_mean": raw,
+        "bathym_q25": raw - 5,
+        "bathym_q10": raw - 10,
+        "milemarker": np.round(mile / 10) * 10,
+        "segment_id": (frac * 72).astype(int),
+        "water_elev": water,
+        "bathym_fixed": mean,
+        "depth": water - mean,
+        "year": year.astype(int),
+        "LON": lon,
+        "LAT": lat,
+    })
+
+
+def dredge(n_sites, seed=1):
+    rng = np.random.default_rng(seed)
+    lon, lat = _along_river(rng.uniform(0, 1, n_sites), rng, jitter=0.005)
+    when = pd.Timestamp("2022-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 365 * 24, n_sites), unit="h")
+    return pd.DataFrame({"LON": lon, "LAT": lat, "BaseDateTime": when.astype(str),
+                         "date": when.astype(str), "year": 2022})
+
+
+def _dated(dates, value, name):
+    df = pd.DataFrame({"date": dates, name: value})
+    df["week_no"] = df["date"].dt.isocalendar().week.astype("int64")
+    df["year"] = df["date"].dt.year
+    df["month"] = df["date"].dt.month
+    return df
+
+
+def series(years, seed=2):
+    rng = np.random.default_rng(seed)
+    start, end = f"{min(years)}-01-01", f"{max(years)}-12-31"
+    weeks = pd.date_range(start, end, freq="W-TUE")
+    days = pd.date_range(start, end, freq="D")
+    barge = _dated(weeks, 20 + np.cumsum(rng.normal(0, 0.5, len(weeks))),
+                   "stlrate_per_ton").rename(columns={"date": "week"})
+    stage = _dated(days, 20 + 15 * np.sin(np.arange(len(days)) / 58) + rng.normal(0, 1, len(days)), "stage")
+    corn = _dated(weeks, 5 + np.cumsum(rng.normal(0, 0.05, len(weeks))), "gulf_corn_price")
+    soy = _dated(weeks, 12 + np.cumsum(rng.normal(0, 0.1, len(weeks))), "gulf_soy_price")
+    return barge, stage, corn, soy
+
+
+def frames(n_surveys=2000, n_years=10, n_dredge=500, seed=0):
+    """Everything the app loads, like data_sources.load_all()."""
+    years = list(range(2026 - n_years, 2026))
+    barge, stage, corn, soy = series(years, seed + 2)
+    return {
+        "bathy": bathy(n_surveys, years, seed),
+        "dredge": dredge(n_dredge, seed + 1),
+        "barge_rates": barge,
+        "greenv": stage,
+        "corn_price": corn,
+        "soy_price": soy,
+        "river": river(seed=seed),
+    }
+
+
+def survey_points(n_points, seed=3):
+    # one survey reach in UTM 15N: 10 km along, 400 m across
+    rng = np.random.default_rng(seed)
+    x = 700_000.0 + rng.uniform(0, 10_000, n_points)
+    y = 3_700_000.0 + rng.uniform(0, 400, n_points)
+    z = rng.normal(30, 8, n_points)
+    return x, y, z
+
+
+def vessel_pings(n_pings, seed=4):
+    rng = np.random.default_rng(seed)
+    return 700_000.0 + rng.uniform(0, 10_000, n_pings), 3_700_000.0 + rng.uniform(0, 400, n_pings)
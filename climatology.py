@@ -0,0 +1,136 @@
+"""Seasonal mean ±1 SD bands for the time-series charts.
+
+Rows are folded into a count, sum and sum of squares per (year, period),
+where the period is the ISO week or the month.  Adding rows touches only
+their cells, a band over all years or over the last N years is a sum over
+a few year rows, and the bands are kept once per period rather than
+repeated on every row of the series.  A series that only grew at the end
+is updated from its new rows alone: only those are parsed and folded in.
+"""
+import numpy as np
+import pandas as pd
+
+PERIODS = {"week": 53, "month": 12}
+
+
+def periods(dates, kind):
+    """Calendar year and period number (ISO week 1-53 or month 1-12) of each date; 0 for NaT."""
+    d = pd.to_datetime(pd.Series(dates))
+    period = d.dt.isocalendar().week if kind == "week" else d.dt.month
+    return (d.dt.year.fillna(0).to_numpy(dtype=np.int64),
+            period.fillna(0).to_numpy(dtype=np.int64))
+
+
+class Climatology:
+    """Running per-period sums of one series; bands for any span of years."""
+
+    def __init__(self, kind="week"):
+        self.kind = kind
+        self.n_periods = PERIODS[kind]
+        self.years = np.empty(0, dtype=np.int64)
+        # (year, period) cells, period 1 at column 0; values are stored
+        # shifted by the first one seen so the sums of squares stay accurate
+        self._n = np.zeros((0, self.n_periods))
+        self._sum = np.zeros((0, self.n_periods))
+        self._sq = np.zeros((0, self.n_periods))
+        self._shift = None
+        self._bands = {}
+        # what has been folded in: rows, their sum and the latest date
+        self.rows = 0
+        self.total = 0.0
+        self.last = None
+        # input rows consumed (NaN ones too), their sum and the last one's
+        # date: how updated() recognises the same series with rows appended
+        self.position = 0
+        self._seen_sum = 0.0
+        self._seen_last = None
+
+    @classmethod
+    def from_series(cls, dates, values, kind="week"):
+        clim = cls(kind)
+        clim.add(dates, values)
+        return clim
+
+    def copy(self):
+        new = object.__new__(Climatology)
+        new.__dict__.update(self.__dict__)
+        new._n, new._sum, new._sq = self._n.copy(), self._sum.copy(), self._sq.copy()
+        new._bands = {}
+        return new
+
+    def add(self, dates, values):
+        """Fold new rows into the sums; cost grows with the rows added, not the history."""
+        values = np.asarray(values, dtype=float)
+        dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+        if len(values):
+            self.position += len(values)
+            self._seen_sum += float(np.nansum(values))
+            self._seen_last = dates.iloc[-1]
+        year, period = periods(dates, self.kind)
+        ok = ~np.isnan(values) & (period > 0)
+        if not ok.any():
+            return
+        last = dates[ok].max()
+        self.last = last if self.last is None else max(self.last, last)
+        year, period, values = year[ok], period[ok] - 1, values[ok]
+        self.rows += len(values)
+        self.total += float(values.sum())
+        if self._shift is None:
+            self._shift = float(values[0])
+        values = values - self._shift
+
+        new_years = np.setdiff1d(year, self.years)
+        if len(new_years):
+            self.years = np.concatenate([self.years, new_years])
+            order = np.argsort(self.years, kind="stable")
+            self.years = self.years[order]
+            pad = np.zeros((len(new_years), self.n_periods))
+            self._n, self._sum, self._sq = (np.concatenate([a, pad])[order]
+                                            for a in (self._n, self._sum, self._sq))
+        rows = np.searchsorted(self.years, year)
+        np.add.at(self._n, (rows, period), 1)
+        np.add.at(self._sum, (rows, period), values)
+        np.add.at(self._sq, (rows, period), values * values)
+        self._bands = {}
+
+    def append(self, dates, values):
+        """A copy with rows added at the end of the series; costs the new rows only."""
+        new = self.copy()
+        new.add(dates, values)
+        return new
+
+    def updated(self, dates, values):
+        """Climatology of the whole series, reusing these sums if it only gained rows at the end."""
+        values = np.asarray(values, dtype=float)
+        dates = pd.Series(dates).reset_index(drop=True)
+        n = self.position
+        # the leading rows are the ones folded in: same sum and same last date
+        if (0 < n <= len(values)
+                and np.isclose(np.nansum(values[:n]), self._seen_sum, rtol=1e-9, atol=1e-9)
+                and pd.to_datetime(dates.iloc[n - 1]) == self._seen_last):
+            # nothing new: these sums (and their cached bands) still hold
+            return self if n == len(values) else self.append(dates.iloc[n:], values[n:])
+        return Climatology.from_series(dates, values, self.kind)
+
+    def bands(self, last_years=None):
+        """(mean, std) per period, over all years or the last `last_years` of them."""
+        if last_years not in self._bands:
+            rows = slice(None) if not last_years else slice(-int(last_years), None)
+            n = self._n[rows].sum(axis=0)
+            s = self._sum[rows].sum(axis=0)
+            sq = self._sq[rows].sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = s / n
+                # sample SD (ddof=1), like pandas' std
+                var = np.clip(sq - s * mean, 0, None) / (n - 1)
+                std = np.where(n > 1, np.sqrt(var), np.nan)
+            self._bands[last_years] = (mean + (self._shift or 0.0), std)
+        return self._bands[last_years]
+
+    def lookup(self, dates, last_years=None):
+        """Mean, mean - SD and mean + SD for each date's period."""
+        mean, std = self.bands(last_years)
+        _, period = periods(dates, self.kind)
+        m = np.where(period > 0, mean[period - 1], np.nan)
+        sd = np.where(period > 0, std[period - 1], np.nan)
+        return m, m - sd, m + sd
@@ -0,0 +1,170 @@
+import os
+import numpy as np
+import geopandas as gpd
+import shapely
+from shapely.ops import linemerge
+import pandas as pd
+from source_cache import CachedSource
+from update_bathym.bathy_store import BathyStore, survey_reach
+
+# --------------------------------------------------
+# RAW INPUTS
+# --------------------------------------------------
+BATHY_FILE = "clean_bathymetry.csv"
+# partitioned Parquet history (update_bathym/bathy_store.py); used instead of
+# BATHY_FILE once it exists
+BATHY_STORE = BathyStore()
+DREDGE_FILE = "dredge_data_2022.csv"
+STAGE_FILE = "greenville_stage.xlsx"
+RIVERS_FILE = "rivers_shapefile/rivers.shp"
+# USDA Grain Transportation Report tables (USDA_BASE_URL points at a stand-in server)
+USDA_BASE_URL = os.environ.get("USDA_BASE_URL", "https://www.ams.usda.gov/sites/default/files/media/")
+BARGE_RATES_URL = f"{USDA_BASE_URL}GTRFigure10Table9.xlsx"
+PRICE_SPREADS_URL = f"{USDA_BASE_URL}GTRTable2A_B.xlsx"
+
+
+# bathymetry survey summaries, one row per survey polygon
+def load_bathy(years=None, reaches=None):
+    if BATHY_STORE.exists():
+        # only the requested year/reach partitions are read; geometry is WKB
+        bathy = BATHY_STORE.read(years, reaches)
+        geoms = bathy["geometry"].to_numpy()
+    else:
+        bathy = pd.read_csv(BATHY_FILE)
+        if years is not None:
+            bathy = bathy[bathy["year"].isin(list(years))].reset_index(drop=True)
+        if reaches is not None:
+            # same partition key as the store: the reach prefix of the file name
+            bathy = bathy[pd.Series(survey_reach(bathy["file"])).isin(list(reaches)).to_numpy()].reset_index(drop=True)
+        geoms = shapely.from_wkt(bathy["geometry"].to_numpy())
+    # Ensure year is int
+    bathy["year"] = bathy["year"].astype(int)
+
+    # get center point for bathym measures
+    bathy["geometry"] = geoms
+    bathy = gpd.GeoDataFrame(bathy, geometry="geometry", crs="EPSG:4326")
+    bounds = shapely.bounds(geoms)
+    bathy[["minx", "miny", "maxx", "maxy"]] = bounds
+    bathy["LON"], bathy["LAT"] = representative_xy(geoms, bounds)
+    return bathy
+
+
+def representative_xy(geoms, bounds):
+    # survey polygons are axis-aligned boxes, whose representative point is
+    # the box centre; anything else goes through GEOS, still vectorized
+    minx, miny, maxx, maxy = bounds.T
+    x = (minx + maxx) / 2
+    y = (miny + maxy) / 2
+    is_box = (shapely.get_num_coordinates(geoms) == 5) & np.isclose(
+        shapely.area(geoms), (maxx - minx) * (maxy - miny))
+    if not is_box.all():
+        pts = shapely.point_on_surface(geoms[~is_box])
+        x[~is_box] = shapely.get_x(pts)
+        y[~is_box] = shapely.get_y(pts)
+    return x, y
+
+
+def load_dredge():
+    dredge = pd.read_csv(DREDGE_FILE)
+    dredge["year"] = 2022
+    return dredge
+
+
+# get barge rate data
+def parse_barge_rates(path):
+    freight_rates = pd.read_excel(path,sheet_name='Table 9_data',header=2,usecols=range(5))
+    barge_rates = freight_rates.rename(columns={'All Points':'week','ST LOUIS':'stlrate_per_ton'})
+    barge_rates = barge_rates.drop(index=[0,1])
+    barge_rates = barge_rates.loc[:,('week','stlrate_per_ton')]
+    barge_rates['week'] = pd.to_datetime(barge_rates['week'])
+    barge_rates['stlrate_per_ton'] = (barge_rates['stlrate_per_ton']*3.99)/100
+    barge_rates['week_no']= barge_rates['week'].dt.isocalendar().week
+    barge_rates['year'] = barge_rates['week'].dt.year
+    return barge_rates
+
+
+# water level
+def load_stage():
+    greenv = pd.read_excel(STAGE_FILE,header=11,parse_dates=['Date / Time']).rename(columns={'Date / Time':'date','Stage (Ft)':'stage'}).assign(stage=lambda d: pd.to_numeric(d['stage'], errors='coerce'))[:-1]
+    greenv['date'] = pd.to_datetime(greenv['date'])
+    greenv['year'] = greenv['date'].dt.year
+    greenv['week_no'] = greenv['date'].dt.isocalendar().week
+    return greenv
+
+
+# now getting corn and soy price data
+def parse_corn_soy(path):
+    corn_soy_spread = pd.read_excel(path,sheet_name='Data',header=1,usecols=range(9))
+    corn_soy_spread = corn_soy_spread[(corn_soy_spread['Origin--destination']=='IL--Gulf')|(corn_soy_spread['Origin--destination']=='IL–Gulf')|(corn_soy_spread['Origin--destination']=='IA–Gulf')|(corn_soy_spread['Origin--destination']=='IA--Gulf')]
+
+    corn_spread = corn_soy_spread[corn_soy_spread['Commodity']=='Corn'].rename(columns = {'Unnamed: 0':'date' , 'Destination Price':'gulf_corn_price'})
+    corn_spread = corn_spread.loc[:,('date','gulf_corn_price')]
+    corn_spread['date'] = pd.to_datetime(corn_spread['date'])
+    corn_spread['week_no'] = corn_spread['date'].dt.isocalendar().week
+    corn_spread['year'] = corn_spread['date'].dt.year
+    corn_price = corn_spread[['date','week_no','year','gulf_corn_price']]
+    corn_price['month'] = corn_price['date'].dt.month
+
+    soy_spread = corn_soy_spread.rename(columns = {'Unnamed: 0':'date','Destination Price':'gulf_soy_price'})
+    soy_spread['date'] = soy_spread['date'].shift(1)
+    soy_spread = soy_spread[soy_spread['Commodity']=='Soybean']
+    soy_spread['date'] = soy_spread['date'].shift(1)
+    soy_spread = soy_spread.loc[:,('date','gulf_soy_price')]
+    soy_spread['date'] = pd.to_datetime(soy_spread['date'])
+    soy_spread['week_no'] = soy_spread['date'].dt.isocalendar().week
+    soy_spread['year'] = soy_spread['date'].dt.year
+    soy_price = soy_spread[['date','week_no','year','gulf_soy_price']]
+    soy_price['month'] = soy_price['date'].dt.month
+    return corn_price, soy_price
+
+
+# cached downloads: served from disk at once, revalidated with conditional GETs
+BARGE_RATES_SOURCE = CachedSource("freight_rates_southbound", BARGE_RATES_URL, parse_barge_rates)
+PRICE_SPREADS_SOURCE = CachedSource("price_spreads_futures_usda", PRICE_SPREADS_URL, parse_corn_soy)
+REMOTE_SOURCES = [BARGE_RATES_SOURCE, PRICE_SPREADS_SOURCE]
+
+
+def load_barge_rates():
+    return BARGE_RATES_SOURCE.get()
+
+
+def load_corn_soy():
+    return PRICE_SPREADS_SOURCE.get()
+
+
+# FUNCTION FOR THE FILES THE DERIVED FRAMES DEPEND ON
+def local_sources():
+    # asked again at every staleness check: the bathymetry store can appear
+    # after start-up, and a background refresh rewrites the cached
+    # spreadsheets, which marks the data store stale
+    bathy = BATHY_STORE.manifest_path if BATHY_STORE.exists() else BATHY_FILE
+    return [bathy, DREDGE_FILE, STAGE_FILE, RIVERS_FILE] + [s.raw_path for s in REMOTE_SOURCES]
+
+
+# now get river line
+def load_river_line():
+    rivers = gpd.read_file(RIVERS_FILE)
+    rivers = rivers.set_crs('EPSG:4326')
+    mississippi = rivers[rivers['PNAME'] == 'MISSISSIPPI R']
+    river_line = mississippi.union_all()
+    river_line = linemerge(river_line)
+    return river_line
+
+
+def river_frame(river_line):
+    x, y = river_line.xy
+    return pd.DataFrame({"lon": list(x), "lat": list(y)})
+
+
+# every derived frame the dashboard uses
+def load_all():
+    corn_price, soy_price = load_corn_soy()
+    return {
+        "bathy": load_bathy(),
+        "dredge": load_dredge(),
+        "barge_rates": load_barge_rates(),
+        "greenv": load_stage(),
+        "corn_price": corn_price,
+        "soy_price": soy_price,
+        "river": river_frame(load_river_line()),
+    }
@@ -0,0 +1,180 @@
+"""Columnar on-disk copy of the dashboard's derived frames.
+
+Each frame is a folder of uncompressed ``.npy`` columns so loading is a
+memory map rather than a parse.  Builds go to a fresh version folder and
+the ``CURRENT`` pointer is swapped last, so readers never see a partial
+store.
+
+The files are shared by every process that maps them: gunicorn workers
+opening the same version read one copy from the page cache instead of each
+holding its own frames (see gunicorn.conf.py).
+
+    python data_store.py            # rebuild from the raw sources
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from safe_io import atomic_write
+
+STORE_DIR = Path(os.environ.get("DATA_STORE", "data_store"))
+
+# how many old versions to keep next to the current one
+KEEP_VERSIONS = 2
+
+# rebuild after this long even if no local file changed (USDA data is weekly)
+MAX_AGE = float(os.environ.get("DATA_STORE_MAX_AGE", 24 * 3600))
+
+# bumped when the stored frames change shape; older stores are rebuilt
+FORMAT = 2
+
+
+# FUNCTION FOR ONE COLUMN -> plain numpy array
+def _column_array(s: pd.Series):
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        return s.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(), str(s.dtype.tz)
+    if pd.api.types.is_extension_array_dtype(s.dtype):
+        # nullable ints (e.g. isocalendar().week) -> int64, or float if there are gaps
+        if pd.api.types.is_numeric_dtype(s.dtype):
+            dtype = "float64" if s.isna().any() else "int64"
+            return s.to_numpy(dtype=dtype, na_value=np.nan), None
+        s = s.astype(object)
+    if s.dtype == object:
+        return s.astype(str).to_numpy(dtype=str), None
+    return s.to_numpy(), None
+
+
+def source_stamps(paths):
+    stamps = {}
+    for p in paths:
+        try:
+            st = os.stat(p)
+            stamps[str(p)] = [st.st_size, st.st_mtime]
+        except OSError:
+            stamps[str(p)] = None
+    return stamps
+
+
+def build_store(frames, path=STORE_DIR, sources=()):
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".build-", dir=path))
+    digest = hashlib.sha1()
+    manifest = {"format": FORMAT, "built": time.time(), "sources": source_stamps(sources), "frames": {}}
+    for name, df in frames.items():
+        (tmp / name).mkdir()
+        cols = []
+        for i, col in enumerate(df.columns):
+            if str(df[col].dtype) == "geometry":
+                continue  # shapely objects: the app only needs LON/LAT
+            arr, tz = _column_array(df[col])
+            fname = f"{i}.npy"
+            np.save(tmp / name / fname, arr, allow_pickle=False)
+            digest.update(f"{name}.{col}".encode())
+            digest.update(arr.tobytes())
+            cols.append({"name": str(col), "file": fname, "tz": tz})
+        manifest["frames"][name] = {"rows": len(df), "columns": cols}
+    version = digest.hexdigest()[:12]
+    manifest["version"] = version
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=1))
+
+    final = path / version
+    if final.exists():
+        # same content as a stored version: keep its files, but record this
+        # build's time and source stamps so the store stops looking stale
+        shutil.rmtree(tmp)
+        old = json.loads((final / "manifest.json").read_text())
+        old.update(built=manifest["built"], sources=manifest["sources"])
+        atomic_write(final / "manifest.json", json.dumps(old, indent=1))
+    else:
+        os.replace(tmp, final)
+    atomic_write(path / "CURRENT", version)
+    _prune(path, version)
+    return version
+
+
+def _prune(path, keep):
+    versions = sorted((p for p in path.iterdir() if p.is_dir() and not p.name.startswith(".")),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in versions[KEEP_VERSIONS:]:
+        if old.name != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+class DataStore:
+    """Read side of the store; frames are memory-mapped on first access."""
+
+    def __init__(self, path=STORE_DIR, version=None):
+        self.root = Path(path)
+        self.version = version or (self.root / "CURRENT").read_text().strip()
+        self.path = self.root / self.version
+        self.manifest = json.loads((self.path / "manifest.json").read_text())
+        self._frames = {}
+
+    @classmethod
+    def open(cls, path=STORE_DIR):
+        # None when no store has been built yet
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+
+    def is_stale(self, sources=None, max_age=MAX_AGE):
+        # too old for the remote sources, a local source changed since the
+        # build, or the data now comes from different files than it was built from
+        if self.manifest.get("format") != FORMAT:
+            return True
+        if time.time() - self.manifest["built"] > max_age:
+            return True
+        recorded = self.manifest.get("sources", {})
+        if recorded and sources is not None and set(map(str, sources)) != set(recorded):
+            return True
+        return bool(recorded) and source_stamps(recorded) != recorded
+
+    @property
+    def names(self):
+        return list(self.manifest["frames"])
+
+    def _specs(self, name, columns=None):
+        specs = self.manifest["frames"][name]["columns"]
+        if columns is None:
+            return specs
+        return [c for c in specs if c["name"] in columns]
+
+    def arrays(self, name, columns=None):
+        # raw read-only column arrays, no pandas copy
+        return {c["name"]: np.load(self.path / name / c["file"], mmap_mode="r")
+                for c in self._specs(name, columns)}
+
+    def frame(self, name, columns=None):
+        # numeric columns stay views of the mapped files (copy=False also skips
+        # block consolidation); text and tz-aware columns become per-process
+        # objects, so load only the ones a reader needs
+        key = (name, None if columns is None else tuple(columns))
+        if key not in self._frames:
+            df = pd.DataFrame(self.arrays(name, columns), copy=False)
+            for c in self._specs(name, columns):
+                if c["tz"]:
+                    df[c["name"]] = df[c["name"]].dt.tz_localize("UTC").dt.tz_convert(c["tz"])
+            self._frames[key] = df
+        return self._frames[key]
+
+    def load_all(self, columns=None):
+        # columns: {frame name: [column, ...]} to load a subset of some frames
+        columns = columns or {}
+        return {name: self.frame(name, columns.get(name)) for name in self.names}
+
+
+if __name__ == "__main__":
+    from snapshot import update_store
+
+    t0 = time.perf_counter()
+    version = update_store(force=True)
+    print(f"Built data store {version} in {time.perf_counter() - t0:.1f}s -> {STORE_DIR}")
@@ -0,0 +1,209 @@
+"""Available channel depth for every river segment on every day.
+
+A segment's reference depth is the segment's water_elev (the low water
+reference plane) minus its bed, taken from the latest survey on or before
+the day and from the shallowest survey polygon in it.  Greenville stage
+above its own low-water reading moves the water surface on every segment.
+
+The segments x days matrix of reference depths is filled in one pass, and
+the available depth on any day is that column plus the day's stage, so new
+stage rows update it without touching the surveys.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# bed elevation used for each survey polygon: the cleaned one, so that
+# water_elev - bed is the row's depth (bathym_mean is sign-flipped on some
+# surveys)
+BED_COLUMN = "bathym_fixed"
+
+# the LWRP is the stage exceeded 97% of the time, so the Greenville stage
+# that matches the segments' water_elev is the 3rd percentile of its record
+LWRP_PERCENTILE = 3
+
+# authorized channel depth below Cairo (ft)
+PROJECT_DEPTH = 9.0
+
+
+def _day_numbers(dates):
+    # datetimes (any tz, or text) -> whole days since 1970-01-01 UTC
+    s = pd.to_datetime(pd.Series(dates), errors="coerce", utc=True)
+    days = s.dt.tz_localize(None).to_numpy().astype("datetime64[D]")
+    return days.astype(np.int64), ~np.isnat(days)
+
+
+def _survey_events(bathy, bed_col):
+    """One (segment, day, reference depth) per segment survey, sorted."""
+    day, ok = _day_numbers(bathy["date"].to_numpy())
+    seg = bathy["segment_id"].to_numpy()
+    ref = bathy["water_elev"].to_numpy(dtype=float) - bathy[bed_col].to_numpy(dtype=float)
+    ok &= ~np.isnan(ref) & ~pd.isna(seg)
+    seg, day, ref = seg[ok].astype(np.int64), day[ok], ref[ok]
+    if not len(seg):
+        return seg, day, ref
+    # shallowest polygon of each segment's survey day
+    order = np.lexsort((ref, day, seg))
+    seg, day, ref = seg[order], day[order], ref[order]
+    first = np.r_[True, (seg[1:] != seg[:-1]) | (day[1:] != day[:-1])]
+    return seg[first], day[first], ref[first]
+
+
+def _segment_places(bathy):
+    # mean position and river mile of each segment's survey polygons
+    seg = bathy["segment_id"].to_numpy()
+    ok = ~pd.isna(seg)
+    ids, inverse = np.unique(seg[ok].astype(np.int64), return_inverse=True)
+    counts = np.bincount(inverse)
+    mean = {c: np.bincount(inverse, weights=bathy[c].to_numpy(dtype=float)[ok]) / counts
+            for c in ("LON", "LAT", "milemarker")}
+    return ids, mean["LON"], mean["LAT"], mean["milemarker"]
+
+
+class DraftEngine:
+    """Segments x days matrix of reference depth plus the daily stage."""
+
+    def __init__(self, segments, lon, lat, miles, events, stage_days, stage, key=""):
+        self.segments = np.asarray(segments)
+        self.lon, self.lat, self.miles = lon, lat, miles
+        self.key = key
+        self._row = {int(s): i for i, s in enumerate(self.segments)}
+        seg, day, ref = events
+
+        # daily axis from the first stage day to the last stage or survey day;
+        # earlier surveys apply from the first column.  With neither, one
+        # empty column for today.
+        if len(stage_days):
+            self.day0 = int(stage_days.min())
+        elif len(day):
+            self.day0 = int(day.min())
+        else:
+            self.day0 = int(_day_numbers([pd.Timestamp.now(tz="UTC")])[0][0])
+        last = max(int(stage_days.max()) if len(stage_days) else self.day0,
+                   int(day.max()) if len(day) else self.day0)
+        self.n_days = last - self.day0 + 1
+
+        # latest survey per (segment, column): events are sorted by segment
+        # then day, so the last of each run wins
+        ref_m = np.full((len(self.segments), self.n_days), np.nan, dtype=np.float32)
+        if len(seg):
+            rows = np.searchsorted(self.segments, seg)
+            cols = np.clip(day - self.day0, 0, None)
+            last_in_cell = np.r_[(rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1]), True]
+            ref_m[rows[last_in_cell], cols[last_in_cell]] = ref[last_in_cell]
+
+        # forward-fill along days: each cell takes the last surveyed column
+        filled = np.where(np.isnan(ref_m), 0, np.arange(self.n_days))
+        np.maximum.accumulate(filled, axis=1, out=filled)
+        self._ref = np.take_along_axis(ref_m, filled, axis=1)
+
+        self._stage = np.full(self.n_days, np.nan)
+        self.reference_stage = np.nan
+        self.update_stage(stage_days, stage, days=True)
+
+    @classmethod
+    def from_frames(cls, bathy, greenv, bed_col=BED_COLUMN):
+        events = _survey_events(bathy, bed_col)
+        segments, lon, lat, miles = _segment_places(bathy)
+        stage_days, ok = _day_numbers(greenv["date"].to_numpy())
+        stage = greenv["stage"].to_numpy(dtype=float)
+        return cls(segments, lon, lat, miles, events, stage_days[ok], stage[ok],
+                   key=cls.survey_key(bathy, bed_col, events))
+
+    @staticmethod
+    def survey_key(bathy, bed_col=BED_COLUMN, events=None):
+        # fingerprint of the survey inputs; equal keys -> same reference matrix
+        seg, day, ref = events if events is not None else _survey_events(bathy, bed_col)
+        h = hashlib.sha1(bed_col.encode())
+        for arr in (seg, day, ref):
+            h.update(np.ascontiguousarray(arr).tobytes())
+        return h.hexdigest()
+
+    # ---- stage updates
+    def _grow(self, n_days):
+        # new columns repeat the last column's reference depth
+        extra = n_days - self.n_days
+        self._ref = np.concatenate([self._ref, np.repeat(self._ref[:, -1:], extra, axis=1)], axis=1)
+        self._stage = np.concatenate([self._stage, np.full(extra, np.nan)])
+        self.n_days = n_days
+
+    def update_stage(self, dates, stage, days=False):
+        """Add or replace daily stage; sub-daily readings are averaged per day."""
+        day = np.asarray(dates, dtype=np.int64) if days else _day_numbers(dates)[0]
+        stage = np.asarray(stage, dtype=float)
+        ok = ~np.isnan(stage) & (day >= self.day0)
+        if not ok.any():
+            return
+        cols, inverse = np.unique(day[ok] - self.day0, return_inverse=True)
+        means = np.bincount(inverse, weights=stage[ok]) / np.bincount(inverse)
+        if cols[-1] >= self.n_days:
+            self._grow(int(cols[-1]) + 1)
+        self._stage[cols] = means
+        self.reference_stage = float(np.nanpercentile(self._stage, LWRP_PERCENTILE))
+
+    def with_stage(self, dates, stage):
+        """A copy with new stage rows; shares the reference matrix when no day is added."""
+        new = object.__new__(DraftEngine)
+        new.__dict__.update(self.__dict__)
+        new._stage = self._stage.copy()
+        new.update_stage(dates, stage)
+        return new
+
+    # ---- queries
+    def __contains__(self, segment):
+        return int(segment) in self._row
+
+    def row(self, segment):
+        return self._row[int(segment)]
+
+    @property
+    def dates(self):
+        return np.datetime64(self.day0, "D") + np.arange(self.n_days)
+
+    def columns(self, first, last):
+        # [start, stop) columns covering the dates first..last, clipped to the axis
+        (a, b), _ = _day_numbers([first, last])
+        return (int(np.clip(a - self.day0, 0, self.n_days)),
+                int(np.clip(b - self.day0 + 1, 0, self.n_days)))
+
+    def latest(self):
+        # last day with a stage reading
+        have = np.flatnonzero(~np.isnan(self._stage))
+        return int(have[-1]) if len(have) else self.n_days - 1
+
+    def available(self, start=0, stop=None):
+        """Available depth for every segment over columns [start, stop)."""
+        cols = slice(start, stop)
+        lift = (self._stage[cols] - self.reference_stage).astype(np.float32)
+        return self._ref[:, cols] + lift[None, :]
+
+    def on(self, col):
+        return self.available(col, col + 1)[:, 0]
+
+    def worst(self, start, stop):
+        # shallowest available depth of each segment over the columns
+        with np.errstate(invalid="ignore"):
+            depth = self.available(start, stop)
+            out = np.full(len(self.segments), np.nan, dtype=np.float32)
+            has = ~np.isnan(depth).all(axis=1)
+            out[has] = np.nanmin(depth[has], axis=1)
+        return out
+
+    def series(self, segment, start=0, stop=None):
+        row = self.row(segment)
+        cols = slice(start, stop)
+        depth = self._ref[row, cols] + (self._stage[cols] - self.reference_stage)
+        return self.dates[cols], depth
+
+    def year_columns(self, year):
+        return self.columns(f"{year}-01-01", f"{year}-12-31")
+
+    def shallowest(self, col):
+        # None when there are no segments at all
+        if not len(self.segments):
+            return None
+        depth = self.on(col)
+        if np.isnan(depth).all():
+            return int(self.segments[0])
+        return int(self.segments[np.nanargmin(depth)])
@@ -0,0 +1,209 @@
+"""Memoized figures for the Dash callbacks.
+
+Figures are keyed on (callback, arguments, data version) and kept as
+serialized JSON in an in-process LRU bounded by entry count and bytes.
+An optional shared backend lets every gunicorn worker reuse figures
+another worker already built:
+
+    FIGURE_CACHE_BACKEND=file:/tmp/figcache   (FIGURE_CACHE_FILE_BYTES caps its size)
+    FIGURE_CACHE_BACKEND=redis://localhost:6379/0
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+
+import plotly.io as pio
+
+from safe_io import atomic_write
+
+
+def _freeze(value):
+    # callback args -> hashable, order-insensitive for layer lists
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted((_freeze(v) for v in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def key_digest(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+# ---------------------------
+# SHARED BACKENDS
+class FileBackend:
+    """One JSON file per figure; safe for several processes on one box.
+
+    Like the Redis backend's expiry, files unused for `ttl` seconds are
+    removed, and the least recently used go first once the directory holds
+    more than `max_bytes`.  A hit touches the file's mtime; the directory is
+    scanned at most every `prune_every` seconds per process.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024, ttl=7 * 24 * 3600, prune_every=60):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self._pruned = 0.0
+
+    def get(self, digest):
+        path = self.path / f"{digest}.json"
+        try:
+            payload = path.read_text()
+            os.utime(path)
+        except OSError:
+            return None
+        return payload
+
+    def set(self, digest, payload):
+        atomic_write(self.path / f"{digest}.json", payload)
+        if time.monotonic() - self._pruned >= self.prune_every:
+            self.prune()
+
+    def prune(self):
+        self._pruned = time.monotonic()
+        files = []
+        for path in self.path.iterdir():
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # another worker removed it
+            files.append((st.st_mtime, st.st_size, path))
+        files.sort()
+        cutoff = time.time() - self.ttl
+        total = sum(size for _, size, _ in files)
+        # expired files, then the least recently used until under the size cap
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class RedisBackend:
+    def __init__(self, url, ttl=7 * 24 * 3600, prefix="figcache:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, digest):
+        try:
+            payload = self.client.get(self.prefix + digest)
+        except Exception as e:
+            print(f"Figure cache backend error: {e}")
+            return None
+        return payload.decode() if payload is not None else None
+
+    def set(self, digest, payload):
+        try:
+            self.client.set(self.prefix + digest, payload, ex=self.ttl)
+        except Exception as e:
+            print(f"Figure cache backend error: {e}")
+
+
+def backend_from_env(spec=None):
+    spec = spec if spec is not None else os.environ.get("FIGURE_CACHE_BACKEND", "")
+    if not spec:
+        return None
+    if spec.startswith("file:"):
+        return FileBackend(spec[len("file:"):],
+                           max_bytes=int(os.environ.get("FIGURE_CACHE_FILE_BYTES", 512 * 1024 * 1024)))
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(spec)
+    raise ValueError(f"Unknown FIGURE_CACHE_BACKEND {spec!r}")
+
+
+# ---------------------------
+# IN-PROCESS LRU
+class FigureCache:
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, backend=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._entries = OrderedDict()  # key -> (figure dict, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.shared_hits = 0
+        self._calls = {}  # memoized name -> [hits, misses]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _put_local(self, key, fig, size):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (fig, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        if self.backend is not None:
+            payload = self.backend.get(key_digest(key))
+            if payload is not None:
+                fig = json.loads(payload)
+                self._put_local(key, fig, len(payload))
+                with self._lock:
+                    self.shared_hits += 1
+                return fig
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, fig):
+        payload = fig if isinstance(fig, str) else pio.to_json(fig, validate=False)
+        value = json.loads(payload)
+        self._put_local(key, value, len(payload))
+        if self.backend is not None:
+            self.backend.set(key_digest(key), payload)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            looked_up = self.hits + self.shared_hits + self.misses
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits,
+                    "shared_hits": self.shared_hits, "misses": self.misses,
+                    "hit_rate": (self.hits + self.shared_hits) / looked_up if looked_up else 0.0,
+                    "callback_hits": {n: c[0] for n, c in self._calls.items()},
+                    "callback_misses": {n: c[1] for n, c in self._calls.items()}}
+
+    def _count(self, name, hit):
+        with self._lock:
+            self._calls.setdefault(name, [0, 0])[0 if hit else 1] += 1
+
+    def memoize(self, name, version=lambda: None):
+        """Cache a callback's figure under (name, args, version())."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args):
+                key = (name, _freeze(args), version())
+                fig = self.get(key)
+                self._count(name, fig is not None)
+                if fig is None:
+                    fig = self.set(key, fn(*args))
+                return fig
+            return wrapper
+        return decorator
@@ -0,0 +1,46 @@
+"""gunicorn settings: one data loader, many workers sharing its store.
+
+    gunicorn -c gunicorn.conf.py app:server
+
+The master builds the data store once before any worker starts, and a
+loader process rebuilds it when the sources change.  Workers never parse
+or download anything; they memory-map the store (DATA_LOADER=external), so
+every worker reads the same page-cache copy of the arrays and an extra
+worker costs little more than its Python heap.
+"""
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8050)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+# each worker imports the app itself and maps the store; nothing to fork-share
+preload_app = False
+raw_env = ["DATA_LOADER=external"]
+
+# fresh interpreters, so the loader inherits none of the master's signal handlers
+_mp = multiprocessing.get_context("spawn")
+_loader = None
+
+
+def on_starting(server):
+    # build (or confirm) the store before the first worker maps it; in a child
+    # so the master never holds the frames
+    from snapshot import update_store
+    build = _mp.Process(target=update_store, name="data-store-build")
+    build.start()
+    build.join()
+    if build.exitcode:
+        server.log.warning("Data store build failed; workers will load the raw sources")
+
+
+def when_ready(server):
+    global _loader
+    from snapshot import run_loader, REFRESH_EVERY
+    if REFRESH_EVERY > 0:
+        _loader = _mp.Process(target=run_loader, name="data-loader", daemon=True)
+        _loader.start()
+
+
+def on_exit(server):
+    if _loader is not None and _loader.is_alive():
+        _loader.terminate()
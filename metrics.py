@@ -0,0 +1,258 @@
+"""Callback timings, payload sizes, cache hit rates and startup phases.
+
+Dash posts every callback to one Flask route, so timing that route per
+callback output covers the callback, the cache lookup and the figure
+serialization; response sizes are recorded before and after compression.
+Everything is served on ``/metrics`` in the Prometheus text format
+(``/metrics?format=json`` for JSON); under gunicorn each worker reports
+its own numbers.
+
+    PROFILE_CALLBACKS=20         # profile the next 20 callback requests
+    PROFILE_DIR=profiles         # where the profiles are written
+    PROFILE_TOOL=pyinstrument    # HTML profiles instead of cProfile .prof
+"""
+import os
+import re
+import json
+import time
+import bisect
+import cProfile
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from flask import Response, g, request
+
+# process start as far as the metrics can tell: when this module is first
+# imported (app.py imports it before anything else)
+STARTED = time.perf_counter()
+
+CALLBACK_PATH = "/_dash-update-component"
+
+# histogram bucket upper bounds: seconds, and response bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 3e5, 1e6, 3e6, 1e7)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        out, running = [], 0
+        for bound, n in zip(list(self.bounds) + ["+Inf"], self.counts):
+            running += n
+            out.append((bound, running))
+        return out
+
+
+# ---------------------------
+# PROFILER FOR THE NEXT N CALLBACKS
+class CallbackProfiler:
+    """Profiles the next `remaining` callback requests, one at a time.
+
+    Python allows one active profiler per process, so a request that
+    arrives while another is being profiled just runs unprofiled.
+    """
+
+    def __init__(self, remaining=0, out_dir="profiles", tool="cprofile"):
+        self.remaining = remaining
+        self.out_dir = Path(out_dir)
+        self.tool = tool
+        self.written = []
+        self._active = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(int(os.environ.get("PROFILE_CALLBACKS", 0)),
+                   os.environ.get("PROFILE_DIR", "profiles"),
+                   os.environ.get("PROFILE_TOOL", "cprofile"))
+
+    def start(self):
+        with self._lock:
+            if self.remaining <= 0 or self._active:
+                return None
+            self.remaining -= 1
+            self._active = True
+        try:
+            if self.tool == "pyinstrument":
+                from pyinstrument import Profiler  # optional dependency
+                prof = Profiler()
+                prof.start()
+            else:
+                prof = cProfile.Profile()
+                prof.enable()
+            return prof
+        except Exception as e:
+            print(f"Could not start profiler: {e}")
+            with self._lock:
+                self._active = False
+            return None
+
+    def stop(self, prof, label):
+        if prof is None:
+            return None
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{len(self.written)}-{_safe(label)}"
+            if self.tool == "pyinstrument":
+                prof.stop()
+                path = self.out_dir / f"{name}.html"
+                path.write_text(prof.output_html())
+            else:
+                prof.disable()
+                path = self.out_dir / f"{name}.prof"
+                prof.dump_stats(path)
+            self.written.append(str(path))
+            return path
+        finally:
+            with self._lock:
+                self._active = False
+
+
+def _safe(label):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", label)[:80] or "callback"
+
+
+def callback_label():
+    # Dash names a callback by its output(s): "map.figure", "..a.b...c.d.."
+    body = request.get_json(silent=True) or {}
+    return str(body.get("output", "unknown")).strip(".") or "unknown"
+
+
+# ---------------------------
+# REGISTRY
+class Metrics:
+    def __init__(self, started=None):
+        self.started = started if started is not None else STARTED
+        self._last_mark = self.started
+        self.phases = {}
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.wire = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.errors = defaultdict(int)
+        self.profiler = CallbackProfiler.from_env()
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    # ---- startup
+    def mark(self, phase):
+        # time since the previous mark (or since `started`) goes to `phase`
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last_mark
+        self._last_mark = now
+
+    # ---- requests
+    def observe(self, callback, seconds, nbytes, status=200, wire_bytes=None):
+        with self._lock:
+            self.latency[callback].observe(seconds)
+            self.size[callback].observe(nbytes)
+            self.wire[callback].observe(nbytes if wire_bytes is None else wire_bytes)
+            if status >= 400:
+                self.errors[callback] += 1
+
+    def collect(self, prefix, fn):
+        """Add gauges from fn() -> {name: number, or {callback: number}} under `prefix`."""
+        self._collectors.append((prefix, fn))
+
+    def instrument(self, server):
+        """Time the Dash callback route on `server` and serve /metrics."""
+        @server.before_request
+        def _start_timer():
+            if request.path == CALLBACK_PATH:
+                g.metrics_t0 = time.perf_counter()
+                g.metrics_profile = self.profiler.start()
+
+        @server.after_request
+        def _record(response):
+            t0 = g.pop("metrics_t0", None)
+            if t0 is not None:
+                label = callback_label()
+                self.profiler.stop(g.pop("metrics_profile", None), label)
+                wire = response.calculate_content_length() or 0
+                # set by serialize.compress_responses when it compressed the body
+                nbytes = g.pop("uncompressed_bytes", wire)
+                self.observe(label, time.perf_counter() - t0, nbytes, response.status_code, wire)
+            return response
+
+        @server.teardown_request
+        def _stop_profile(_exc):
+            # the callback raised: after_request never ran
+            self.profiler.stop(g.pop("metrics_profile", None), "error")
+
+        @server.route("/metrics")
+        def _metrics():
+            if request.args.get("format") == "json":
+                return Response(json.dumps(self.snapshot(), default=float), mimetype="application/json")
+            return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    # ---- output
+    def _gauges(self):
+        out = {}
+        for prefix, fn in self._collectors:
+            try:
+                out[prefix] = fn()
+            except Exception as e:
+                out[prefix] = {"error": str(e)}
+        return out
+
+    def snapshot(self):
+        with self._lock:
+            callbacks = {
+                name: {
+                    "count": h.count,
+                    "seconds_sum": h.sum,
+                    "seconds_mean": h.sum / h.count if h.count else None,
+                    "seconds_buckets": h.cumulative(),
+                    "bytes_sum": self.size[name].sum,
+                    "bytes_mean": self.size[name].sum / h.count if h.count else None,
+                    "wire_bytes_sum": self.wire[name].sum,
+                    "errors": self.errors[name],
+                }
+                for name, h in self.latency.items()
+            }
+        return {"pid": os.getpid(), "uptime_seconds": time.perf_counter() - self.started,
+                "startup_seconds": dict(self.phases), "callbacks": callbacks,
+                "profiles": {"remaining": self.profiler.remaining, "written": self.profiler.written},
+                **self._gauges()}
+
+    def render(self):
+        lines = ["# TYPE dash_uptime_seconds gauge",
+                 f"dash_uptime_seconds {time.perf_counter() - self.started:.3f}"]
+        if self.phases:
+            lines.append("# TYPE dash_startup_seconds gauge")
+        for phase, seconds in self.phases.items():
+            lines.append(f'dash_startup_seconds{{phase="{phase}"}} {seconds:.6f}')
+        with self._lock:
+            for metric, table in (("dash_callback_seconds", self.latency),
+                                  ("dash_callback_response_bytes", self.size),
+                                  ("dash_callback_wire_bytes", self.wire)):
+                lines.append(f"# TYPE {metric} histogram")
+                for name, h in table.items():
+                    for bound, n in h.cumulative():
+                        lines.append(f'{metric}_bucket{{callback="{name}",le="{bound}"}} {n}')
+                    lines.append(f'{metric}_sum{{callback="{name}"}} {h.sum:.6f}')
+                    lines.append(f'{metric}_count{{callback="{name}"}} {h.count}')
+            if self.errors:
+                lines.append("# TYPE dash_callback_errors_total counter")
+            for name, n in self.errors.items():
+                lines.append(f'dash_callback_errors_total{{callback="{name}"}} {n}')
+        for prefix, values in self._gauges().items():
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    lines.append(f"# TYPE dash_{prefix}_{key} gauge")
+                    for label, v in value.items():
+                        lines.append(f'dash_{prefix}_{key}{{callback="{label}"}} {v}')
+                elif isinstance(value, (int, float)):
+                    lines.append(f"# TYPE dash_{prefix}_{key} gauge")
+                    lines.append(f"dash_{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
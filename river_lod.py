@@ -0,0 +1,94 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+import shapely
+
+# simplification tolerances (degrees), finest first; 0 keeps every vertex
+TOLERANCES = (0.0, 0.0002, 0.0008, 0.003, 0.01, 0.03)
+
+# extra area kept around the visible box so small pans don't show a gap
+CLIP_MARGIN = 0.5
+
+
+def degrees_per_pixel(zoom):
+    # web-mercator tiles are 256 px wide at zoom 0
+    return 360.0 / (256.0 * 2 ** zoom)
+
+
+def _line_coords(geom):
+    # (multi)line -> lon/lat arrays, parts separated by NaN so Plotly breaks the line
+    parts = [np.asarray(g.coords) for g in getattr(geom, "geoms", [geom]) if not g.is_empty]
+    if not parts:
+        return np.empty(0), np.empty(0)
+    gap = np.array([[np.nan, np.nan]])
+    xy = np.concatenate([p for part in parts for p in (part, gap)][:-1])
+    return xy[:, 0], xy[:, 1]
+
+
+class RiverLOD:
+    """Precomputed Douglas-Peucker simplifications of the river line."""
+
+    def __init__(self, line, tolerances=TOLERANCES):
+        self.line = line
+        self.levels = [(tol, line if tol == 0 else shapely.simplify(line, tol, preserve_topology=False))
+                       for tol in tolerances]
+        self._clip = lru_cache(maxsize=256)(self._clip_uncached)
+
+    def level_for_zoom(self, zoom):
+        # coarsest level whose error stays under about one screen pixel
+        px = degrees_per_pixel(zoom)
+        best = 0
+        for i, (tol, _) in enumerate(self.levels):
+            if tol <= px:
+                best = i
+        return best
+
+    def _clip_uncached(self, level, bbox):
+        geom = self.levels[level][1]
+        if bbox is not None:
+            geom = shapely.clip_by_rect(geom, *bbox)
+        return _line_coords(geom)
+
+    def coords(self, zoom, bbox=None):
+        """lon/lat for a view; bbox (minx, miny, maxx, maxy) clips to it plus a margin."""
+        level = self.level_for_zoom(zoom)
+        if bbox is not None:
+            bbox = snap_bbox(bbox)
+        return self._clip(level, bbox)
+
+    def vertex_counts(self):
+        return [(tol, shapely.get_num_coordinates(g)) for tol, g in self.levels]
+
+
+def snap_bbox(bbox, margin=CLIP_MARGIN):
+    # pad and round outwards to a grid of a quarter of the view size, so nearby
+    # views share one cached clip
+    minx, miny, maxx, maxy = bbox
+    w, h = maxx - minx, maxy - miny
+    step = max(w, h, 1e-6) / 4
+    step = 2.0 ** math.floor(math.log2(step))
+    minx, maxx = minx - w * margin, maxx + w * margin
+    miny, maxy = miny - h * margin, maxy + h * margin
+    return (math.floor(minx / step) * step, math.floor(miny / step) * step,
+            math.ceil(maxx / step) * step, math.ceil(maxy / step) * step)
+
+
+# FUNCTION FOR THE VIEW IN A MAP relayoutData EVENT
+def view_from_relayout(relayout):
+    """(zoom, bbox) from a Scattermap relayoutData dict, or None if the view didn't change."""
+    if not relayout:
+        return None
+    for sub in ("map", "mapbox"):
+        zoom = relayout.get(f"{sub}.zoom")
+        if zoom is None:
+            continue
+        bbox = None
+        derived = relayout.get(f"{sub}._derived") or {}
+        corners = derived.get("coordinates")
+        if corners:
+            lons = [c[0] for c in corners]
+            lats = [c[1] for c in corners]
+            bbox = (min(lons), min(lats), max(lons), max(lats))
+        return float(zoom), bbox
+    return None
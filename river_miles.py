@@ -0,0 +1,127 @@
+import numpy as np
+import shapely
+from shapely.ops import linemerge
+
+METERS_PER_MILE = 1609.344
+
+
+# FUNCTION FOR A SLICE OF A SORTED MILE ARRAY
+def mile_bounds(sorted_miles, lo, hi):
+    """[start, stop) positions of the values within [lo, hi] -- two binary searches."""
+    sorted_miles = np.asarray(sorted_miles)
+    return (int(np.searchsorted(sorted_miles, lo, side="left")),
+            int(np.searchsorted(sorted_miles, hi, side="right")))
+
+
+class SortedMiles:
+    """Things positioned by river mile, kept sorted for binary-search lookups."""
+
+    def __init__(self, miles, ids=None):
+        miles = np.asarray(miles, dtype=float)
+        ids = np.arange(len(miles)) if ids is None else np.asarray(ids)
+        order = np.argsort(miles, kind="stable")
+        self.miles = miles[order]
+        self.ids = ids[order]
+
+    def __len__(self):
+        return len(self.miles)
+
+    def nearest(self, mile):
+        """Id(s) of the closest entry to each mile."""
+        mile = np.asarray(mile, dtype=float)
+        if len(self.miles) == 1:
+            return self.ids[np.zeros(mile.shape, dtype=int)]
+        i = np.clip(np.searchsorted(self.miles, mile), 1, len(self.miles) - 1)
+        left = self.miles[i - 1]
+        right = self.miles[i]
+        return self.ids[np.where(mile - left <= right - mile, i - 1, i)]
+
+    def between(self, lo, hi):
+        start, stop = mile_bounds(self.miles, lo, hi)
+        return self.ids[start:stop]
+
+
+class SortedRanges:
+    """Non-overlapping [start, end] mile ranges, e.g. river segments."""
+
+    def __init__(self, starts, ends, ids):
+        starts, ends = np.asarray(starts, dtype=float), np.asarray(ends, dtype=float)
+        starts, ends = np.minimum(starts, ends), np.maximum(starts, ends)
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.ids = np.asarray(ids)[order]
+        self._centres = SortedMiles((self.starts + self.ends) / 2, self.ids)
+
+    def containing(self, mile):
+        """Id of the range holding each mile, or of the nearest range centre in a gap."""
+        mile = np.asarray(mile, dtype=float)
+        i = np.clip(np.searchsorted(self.starts, mile, side="right") - 1, 0, len(self.starts) - 1)
+        inside = (mile >= self.starts[i]) & (mile <= self.ends[i])
+        return np.where(inside, self.ids[i], self._centres.nearest(mile))
+
+
+class RiverMileIndex:
+    """Projects geometries onto the river centerline and reports river miles.
+
+    Without anchors the mile is the distance along the line from its first
+    vertex.  Anchors (positions with known river miles, e.g. gauges or
+    segment milemarkers) calibrate it piecewise-linearly so the numbers
+    match the Corps' mile system.
+    """
+
+    def __init__(self, centerline, anchor_geoms=None, anchor_miles=None):
+        self.line = _single_line(centerline)
+        self._anchor_pos = self._anchor_miles = None
+        if anchor_geoms is not None and len(anchor_geoms):
+            pos = self.position(anchor_geoms)
+            order = np.argsort(pos)
+            self._anchor_pos = pos[order]
+            self._anchor_miles = np.asarray(anchor_miles, dtype=float)[order]
+
+    def position(self, geoms):
+        # distance along the line in line units, one vectorized GEOS call
+        pts = shapely.centroid(np.asarray(geoms, dtype=object))
+        return shapely.line_locate_point(self.line, pts)
+
+    def miles(self, geoms, units_per_mile=METERS_PER_MILE):
+        return self._to_miles(self.position(geoms), units_per_mile)
+
+    def _to_miles(self, pos, units_per_mile):
+        if self._anchor_pos is None:
+            return pos / units_per_mile
+        # extrapolate past the outer anchors with the line's own scale
+        miles = np.interp(pos, self._anchor_pos, self._anchor_miles)
+        slope = np.sign(self._anchor_miles[-1] - self._anchor_miles[0]) / units_per_mile
+        below = pos < self._anchor_pos[0]
+        above = pos > self._anchor_pos[-1]
+        miles[below] = self._anchor_miles[0] + (pos[below] - self._anchor_pos[0]) * slope
+        miles[above] = self._anchor_miles[-1] + (pos[above] - self._anchor_pos[-1]) * slope
+        return miles
+
+    def ranges(self, geoms, ids, units_per_mile=METERS_PER_MILE):
+        """SortedRanges of river features (segment lines or polygons) by mile extent."""
+        geoms = np.asarray(geoms, dtype=object)
+        # lines: their own vertices; polygons: the stretch of centerline inside them
+        is_line = np.isin(shapely.get_type_id(geoms), [1, 5])
+        parts = np.where(is_line, geoms, shapely.intersection(self.line, geoms))
+        coords, idx = shapely.get_coordinates(parts, return_index=True)
+        pos = shapely.line_locate_point(self.line, shapely.points(coords))
+        lo = np.full(len(geoms), np.inf)
+        hi = np.full(len(geoms), -np.inf)
+        np.minimum.at(lo, idx, pos)
+        np.maximum.at(hi, idx, pos)
+        # features that miss the centerline collapse to their centroid
+        miss = ~np.isfinite(lo)
+        if miss.any():
+            lo[miss] = hi[miss] = self.position(geoms[miss])
+        return SortedRanges(self._to_miles(lo, units_per_mile), self._to_miles(hi, units_per_mile), ids)
+
+
+def _single_line(geom):
+    merged = linemerge(geom) if geom.geom_type.startswith("Multi") else geom
+    if merged.geom_type == "LineString":
+        return merged
+    # gaps left after merging: chain the parts in order so positions stay monotonic
+    coords = np.concatenate([np.asarray(g.coords) for g in merged.geoms])
+    return shapely.LineString(coords)
@@ -0,0 +1,64 @@
+"""Atomic file writes and retried HTTP requests.
+
+Shared by the app modules and the update_bathym scripts (which put this
+directory on sys.path, as for river_miles.py).
+"""
+import os
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+import requests
+
+# status codes worth retrying; anything else is a definite answer
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+# ---------------------------
+# ATOMIC WRITES
+@contextmanager
+def replacing(path):
+    """Yield a temp path next to `path`; it replaces `path` if the block succeeds.
+
+    Readers see the old file or the new one, never part of either, and a
+    failed write leaves no temp file.  The temp name keeps the suffix, for
+    writers and parsers that go by it (to_parquet, openpyxl).
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp{path.suffix}")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def atomic_write(path, data):
+    # text or bytes
+    with replacing(path) as tmp:
+        if isinstance(data, str):
+            tmp.write_text(data)
+        else:
+            tmp.write_bytes(data)
+
+
+# ---------------------------
+# RETRIES
+def with_retries(send, retries=3, backoff=1.0):
+    """Call send() until its response has a definite status.
+
+    Retryable statuses (RETRY_STATUS), connection errors and timeouts are
+    tried again after backoff * 2**attempt seconds; the last attempt's
+    response is returned, or its error raised.
+    """
+    for attempt in range(retries + 1):
+        try:
+            r = send()
+            if r.status_code not in RETRY_STATUS or attempt == retries:
+                return r
+            r.close()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
@@ -0,0 +1,117 @@
+"""Smaller, faster payloads for the browser.
+
+- Numeric arrays go out as Plotly typed-array specs (base64 binary,
+  ``{"dtype": "f4", "bdata": ...}``), which plotly.js decodes directly,
+  instead of long JSON number lists.
+- Figures are serialized with orjson when it is installed.
+- Text responses are brotli- (if installed) or gzip-compressed.
+
+    TYPED_ARRAYS=0       # send plain JSON lists (for comparisons)
+"""
+import os
+import gzip
+import base64
+
+import numpy as np
+import plotly.io as pio
+from flask import g, request
+
+try:
+    import brotli  # optional: smaller than gzip for JSON
+except ImportError:
+    brotli = None
+
+TYPED_ARRAYS = os.environ.get("TYPED_ARRAYS", "1") == "1"
+
+# dtypes plotly.js reads from a typed-array spec
+_TYPED = {"float32": "f4", "float64": "f8", "int8": "i1", "uint8": "u1", "int16": "i2",
+          "uint16": "u2", "int32": "i4", "uint32": "u4"}
+
+COMPRESSIBLE = {"application/json", "text/html", "text/css", "text/plain",
+                "application/javascript", "text/javascript"}
+COMPRESS_MIN_BYTES = 1024
+
+
+def typed_array(arr, float_dtype="f4"):
+    """Numeric array -> typed-array spec; None for arrays plotly.js can't take binary."""
+    arr = np.asarray(arr)
+    if arr.dtype == bool:
+        arr = arr.astype(np.uint8)
+    elif arr.dtype.kind == "f":
+        # map coordinates and depths: float32 is well under a metre / 0.01 ft
+        arr = arr.astype(np.float32 if float_dtype == "f4" else np.float64)
+    elif arr.dtype.kind in "iu" and arr.dtype.name not in _TYPED:
+        info = np.iinfo(np.int32)
+        small = arr.size == 0 or (arr.min() >= info.min and arr.max() <= info.max)
+        arr = arr.astype(np.int32 if small else np.float64)
+    if arr.dtype.name not in _TYPED or arr.ndim > 2:
+        return None
+    spec = {"dtype": _TYPED[arr.dtype.name],
+            "bdata": base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode("ascii")}
+    if arr.ndim == 2:
+        spec["shape"] = f"{arr.shape[0]},{arr.shape[1]}"
+    return spec
+
+
+def pack(value, float_dtype="f4"):
+    """Replace numeric NumPy arrays inside dicts/lists with typed-array specs."""
+    if isinstance(value, dict):
+        return {k: pack(v, float_dtype) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [pack(v, float_dtype) for v in value]
+    if isinstance(value, np.ndarray) and value.dtype.kind == "M":
+        return datetime_strings(value)
+    if isinstance(value, np.ndarray) and TYPED_ARRAYS:
+        spec = typed_array(value, float_dtype)
+        return spec if spec is not None else value.tolist()
+    return value
+
+
+def datetime_strings(arr):
+    # datetime64 -> ISO strings (tolist() would give integer nanoseconds); NaT -> None
+    text = np.datetime_as_string(arr).astype(object)
+    text[np.isnat(arr)] = None
+    return text.tolist()
+
+
+def use_fast_json():
+    # Dash and plotly.io both serialize through plotly's JSON layer
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return False
+    pio.json.config.default_engine = "orjson"
+    return True
+
+
+def compress_responses(server, min_bytes=COMPRESS_MIN_BYTES, gzip_level=6, brotli_quality=5):
+    """Compress text responses on `server` for clients that accept it.
+
+    The uncompressed size is left in g.uncompressed_bytes for the metrics
+    hook, which must be registered before this one (Flask runs
+    after_request hooks last-registered first).
+    """
+    @server.after_request
+    def _compress(response):
+        if (response.direct_passthrough or response.status_code in (204, 304)
+                or response.status_code < 200 or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE):
+            return response
+        response.vary.add("Accept-Encoding")
+        if brotli is not None and request.accept_encodings["br"]:
+            encoding = "br"
+        elif request.accept_encodings["gzip"]:
+            encoding = "gzip"
+        else:
+            return response
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        if encoding == "br":
+            body = brotli.compress(data, quality=brotli_quality)
+        else:
+            body = gzip.compress(data, compresslevel=gzip_level)
+        g.uncompressed_bytes = len(data)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        return response
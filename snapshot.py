@@ -0,0 +1,343 @@
+"""Versioned, immutable view of the dashboard data, swapped in while running.
+
+A ``DataSnapshot`` holds every frame and index the callbacks read.  The
+``SnapshotManager`` rebuilds one in a background thread when the data
+store or its sources change and publishes it with a single reference
+swap.  Each request pins the snapshot it started with, so a callback never
+mixes two versions even if a swap lands halfway through it.
+
+Under gunicorn (gunicorn.conf.py) one loader process builds the store and
+the workers only map it: ``DATA_LOADER=external`` tells them never to
+rebuild, just to follow the versions the loader publishes.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import shapely
+from flask import g, has_request_context
+
+from data_sources import load_all, local_sources, REMOTE_SOURCES
+from data_store import DataStore, build_store, source_stamps
+from year_index import YearIndex, depth_marker_size, year_order
+from river_lod import RiverLOD
+from draft import DraftEngine
+from climatology import Climatology
+from river_miles import RiverMileIndex
+
+# how often the background thread looks for new data (seconds, 0 = never)
+REFRESH_EVERY = float(os.environ.get("DATA_REFRESH_SECONDS", 300))
+
+# another process keeps the store current; this one only maps it
+EXTERNAL_LOADER = os.environ.get("DATA_LOADER") == "external"
+
+# version prefix of a snapshot loaded from the raw sources because the
+# store could not be written
+UNVERSIONED = "unversioned-"
+
+# columns the callbacks read from the big frames; the rest (file names,
+# survey statistics) stay on disk instead of in every process
+SNAPSHOT_COLUMNS = {
+    "bathy": ["year", "date", "milemarker", "LON", "LAT", "depth", "marker_size",
+              "segment_id", "water_elev", "bathym_fixed"],
+    "dredge": ["year", "date", "milemarker", "LON", "LAT", "BaseDateTime"],
+}
+
+# time series: frame -> (date column, value column, band period)
+SERIES = {
+    "barge_rates": ("week", "stlrate_per_ton", "week"),
+    "greenv": ("date", "stage", "week"),
+    "corn_price": ("date", "gulf_corn_price", "month"),
+    "soy_price": ("date", "gulf_soy_price", "month"),
+}
+
+# mean ±1 SD bands over the last N years of each series (0 = all years)
+BASELINE_YEARS = int(os.environ.get("CLIMATOLOGY_YEARS", 0)) or None
+
+# dredge sites are placed on the river line (in degrees), ~69 miles per
+# degree past the outermost surveys
+DEGREES_PER_MILE = 1 / 69.0
+
+
+# FUNCTION FOR THE DERIVED COLUMNS AND ROW ORDER THE SNAPSHOT READS
+def prepare_frames(frames):
+    """Raw frames -> snapshot frames, done once before the store is written.
+
+    Adds map marker sizes and dredge river miles and sorts rows the way the
+    year indexes slice them, so a process mapping the store uses the
+    columns in place instead of building its own sorted copies.
+    """
+    bathy = frames["bathy"]
+    bathy = bathy.assign(marker_size=depth_marker_size(bathy["depth"]))
+
+    # dredge sites have no river mile; place them on the line, calibrated
+    # by the survey milemarkers
+    river = frames["river"]
+    mile_index = RiverMileIndex(
+        shapely.linestrings(np.column_stack([river["lon"], river["lat"]])),
+        anchor_geoms=shapely.points(bathy["LON"].to_numpy(), bathy["LAT"].to_numpy()),
+        anchor_miles=bathy["milemarker"].to_numpy(),
+    )
+    dredge = frames["dredge"]
+    dredge = dredge.assign(milemarker=mile_index.miles(
+        shapely.points(dredge["LON"].to_numpy(), dredge["LAT"].to_numpy()),
+        units_per_mile=DEGREES_PER_MILE))
+
+    out = dict(frames)
+    out["bathy"] = _sorted(bathy, "milemarker")
+    out["dredge"] = _sorted(dredge, "milemarker")
+    for name in SERIES:
+        out[name] = _sorted(frames[name])
+    return out
+
+
+def _sorted(df, order_col=None):
+    return df.iloc[year_order(df, order_col=order_col)].reset_index(drop=True)
+
+
+# FUNCTION FOR (RE)BUILDING THE STORE FROM THE RAW SOURCES
+def update_store(force=False):
+    """Rebuild the store if it is missing or stale; returns the current version."""
+    store = DataStore.open()
+    if store is not None and not (force or store.is_stale(local_sources())):
+        return store.version
+    return build_store(prepare_frames(load_all()), sources=local_sources())
+
+
+# FUNCTION FOR THE LOADER PROCESS: the only one that downloads and builds
+def run_loader(interval=REFRESH_EVERY):
+    while True:
+        time.sleep(interval)
+        # a new USDA release changes a source file, which marks the store stale
+        for src in REMOTE_SOURCES:
+            if not src.is_fresh():
+                src.refresh_in_background().join()
+        try:
+            update_store()
+        except Exception as e:
+            print(f"Data store rebuild failed: {e}")
+
+
+def _refresh_remote():
+    # keep the USDA download cache warm; a new release changes its raw file
+    for src in REMOTE_SOURCES:
+        if not src.is_fresh():
+            src.refresh_in_background()
+
+
+# FUNCTION FOR THE VERSION OF FRAMES LOADED WITHOUT A STORE
+def unversioned():
+    # derived from the source files, so it only changes when one of them does
+    stamps = json.dumps(source_stamps(local_sources()), sort_keys=True).encode()
+    return f"{UNVERSIONED}{hashlib.sha1(stamps).hexdigest()[:12]}"
+
+
+# FUNCTION FOR THE CURRENT FRAMES + THEIR VERSION
+def load_frames():
+    # prefer the prebuilt columnar store (python data_store.py); fall back to
+    # the raw sources and write the store so the next start is fast
+    store = DataStore.open()
+    if store is not None and (EXTERNAL_LOADER or not store.is_stale(local_sources())):
+        if not EXTERNAL_LOADER:
+            _refresh_remote()
+        return store.load_all(SNAPSHOT_COLUMNS), store.version
+    # stamped before reading, so a change during the load brings another one
+    fallback = unversioned()
+    frames = prepare_frames(load_all())
+    try:
+        version = build_store(frames, sources=local_sources())
+    except OSError as e:
+        print(f"Could not write data store: {e}")
+        return frames, fallback
+    # map what was just written rather than keep the build copies
+    return DataStore(version=version).load_all(SNAPSHOT_COLUMNS), version
+
+
+class DataSnapshot:
+    """Frames, per-year indexes and derived values for one data version.
+
+    Expects frames from prepare_frames(); rows already in index order are
+    sliced in place, so mapped store columns are never copied.
+    """
+
+    def __init__(self, frames, version, previous=None):
+        self.version = version
+        self.built = time.time()
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+        bathy = frames["bathy"]
+        dredge = frames["dredge"]
+        self.barge_rates = frames["barge_rates"]
+        self.greenv = frames["greenv"]
+        self.corn_price = frames["corn_price"]
+        self.soy_price = frames["soy_price"]
+
+        self.years = [int(y) for y in sorted(bathy["year"].unique())]
+        self.end_date = self.barge_rates["week"].max()
+        self.start_date = self.end_date - pd.Timedelta(weeks=52)
+        self.thisyear = date.today().year
+
+        # river line, pre-simplified for each zoom level
+        river = frames["river"]
+        river_line = shapely.linestrings(np.column_stack([river["lon"], river["lat"]]))
+        self.river_lod = RiverLOD(river_line)
+
+        # slider bounds cover the dredge sites too: they can sit past the
+        # outermost surveys
+        miles = np.concatenate([bathy["milemarker"].to_numpy(dtype=float),
+                                dredge["milemarker"].to_numpy(dtype=float)])
+        self.mile_range = [float(np.floor(np.nanmin(miles))), float(np.ceil(np.nanmax(miles)))]
+
+        # per-year slices, sorted by river mile inside each year; "past 52
+        # weeks" is precomputed as well
+        window = (self.start_date, self.end_date)
+        self.bathy_idx = YearIndex(bathy, date_col="date", window=window, order_col="milemarker")
+        self.dredge_idx = YearIndex(dredge, date_col="date", window=window, order_col="milemarker")
+        self.barge_idx = YearIndex(self.barge_rates, date_col="week", window=window)
+        self.greenv_idx = YearIndex(self.greenv, date_col="date", window=window)
+        self.corn_idx = YearIndex(self.corn_price, date_col="date", window=window)
+        self.soy_idx = YearIndex(self.soy_price, date_col="date", window=window)
+
+        # seasonal bands per series; the previous snapshot's sums are reused
+        # when a series only gained new rows
+        self.climate = {}
+        for name, (date_col, value_col, kind) in SERIES.items():
+            df = frames[name]
+            old = previous.climate.get(name) if previous is not None else None
+            if old is not None and old.kind == kind:
+                self.climate[name] = old.updated(df[date_col], df[value_col])
+            else:
+                self.climate[name] = Climatology.from_series(df[date_col], df[value_col], kind)
+
+        # the draft matrix of the snapshot this one replaces, if it was built;
+        # reused when the surveys are unchanged
+        self._draft_seed = previous._derived.get("draft") if previous is not None else None
+
+    @property
+    def cache_version(self):
+        # the "past 52 weeks" window also depends on today's year
+        return f"{self.version}:{self.thisyear}"
+
+    def derived(self, name, build):
+        # values computed from this snapshot once, on first use
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = build(self)
+            return self._derived[name]
+
+    def bands(self, name, dates):
+        # (mean, mean - SD, mean + SD) of series `name` for each date
+        return self.climate[name].lookup(dates, BASELINE_YEARS)
+
+    def draft(self):
+        return self.derived("draft", _build_draft)
+
+    def year_options(self):
+        return [{"label": str(y), "value": y} for y in self.years]
+
+    def mile_filter(self, miles):
+        # the slider at its full range means no filter: rows without a river
+        # mile (or past the bounds) stay on the map until the user narrows it
+        if not miles or (miles[0] <= self.mile_range[0] and miles[1] >= self.mile_range[1]):
+            return None
+        return miles
+
+
+def _build_draft(snap):
+    # same surveys as the previous snapshot: only the new stage rows go in
+    bathy = snap.bathy_idx.frame
+    seed, snap._draft_seed = snap._draft_seed, None
+    if seed is not None and seed.key == DraftEngine.survey_key(bathy):
+        return seed.with_stage(snap.greenv["date"], snap.greenv["stage"])
+    return DraftEngine.from_frames(bathy, snap.greenv)
+
+
+class SnapshotManager:
+    """Holds the live snapshot and replaces it when the data changes."""
+
+    def __init__(self, load=load_frames, interval=REFRESH_EVERY):
+        self._load = load
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self.refreshes = 0
+        self.timings = {}
+        self._latest = self._build(None)
+
+    @property
+    def latest(self):
+        return self._latest
+
+    def current(self):
+        # inside a request: the snapshot the request started with
+        if not has_request_context():
+            return self._latest
+        snap = getattr(g, "data_snapshot", None)
+        if snap is None:
+            snap = g.data_snapshot = self._latest
+        return snap
+
+    def changed(self):
+        store = DataStore.open()
+        if self._latest.version.startswith(UNVERSIONED) and not EXTERNAL_LOADER:
+            # the store couldn't be written last time: reload when a usable
+            # store shows up or a source file changes, not every round
+            if store is not None and not store.is_stale(local_sources()):
+                return True
+            _refresh_remote()
+            return unversioned() != self._latest.version
+        if store is not None and store.version != self._latest.version:
+            return True
+        # with an external loader a stale store is its job, not ours
+        return not EXTERNAL_LOADER and (store is None or store.is_stale(local_sources()))
+
+    def refresh(self, force=False):
+        """Build a new snapshot if the data changed; returns True when swapped."""
+        with self._lock:
+            if not (force or self.changed()):
+                return False
+            snap = self._build(self._latest, force)
+            if snap is None:
+                return False
+            # fully built before anyone can see it; the swap is one assignment
+            self._latest = snap
+            self.refreshes += 1
+            print(f"Data snapshot {snap.version} loaded")
+            return True
+
+    def _build(self, previous, force=False):
+        # None when the loaded version is the one already live
+        t0 = time.perf_counter()
+        frames, version = self._load()
+        t1 = time.perf_counter()
+        if previous is not None and version == previous.version and not force:
+            return None
+        snap = DataSnapshot(frames, version, previous=previous)
+        self.timings = {"load_seconds": t1 - t0, "build_seconds": time.perf_counter() - t1}
+        return snap
+
+    def stats(self):
+        return {"age_seconds": time.time() - self._latest.built, "refreshes": self.refreshes,
+                **self.timings}
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                # keep serving the old snapshot; try again next round
+                print(f"Data refresh failed: {e}")
+
+    def start(self):
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return self._thread
+        self._thread = threading.Thread(target=self._run, name="data-refresh", daemon=True)
+        self._thread.start()
+        return self._thread
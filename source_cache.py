@@ -0,0 +1,131 @@
+"""Local cache for remote spreadsheets, revalidated with conditional GETs.
+
+The last good download is kept as the raw file plus its parsed result and
+the server's ETag/Last-Modified.  ``get()`` answers from the cache straight
+away and refreshes in a background thread; only a cold cache waits on the
+network.
+"""
+import os
+import json
+import time
+import pickle
+import threading
+from pathlib import Path
+
+import requests
+
+from safe_io import atomic_write, replacing
+
+CACHE_DIR = Path(os.environ.get("SOURCE_CACHE_DIR", "source_cache"))
+
+# don't revalidate more often than this (seconds)
+FRESH_FOR = float(os.environ.get("SOURCE_CACHE_FRESH_FOR", 6 * 3600))
+
+
+class CachedSource:
+    def __init__(self, name, url, parse, suffix=".xlsx", cache_dir=CACHE_DIR,
+                 timeout=30, fresh_for=FRESH_FOR):
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.timeout = timeout
+        self.fresh_for = fresh_for
+        self.cache_dir = Path(cache_dir)
+        self.raw_path = self.cache_dir / f"{name}{suffix}"
+        self.meta_path = self.cache_dir / f"{name}.json"
+        self.parsed_path = self.cache_dir / f"{name}.pkl"
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # ---- cache files
+    def meta(self):
+        try:
+            return json.loads(self.meta_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def cached(self):
+        # parsed copy from the last good fetch, or None.  Any pickle that
+        # won't load (missing, truncated, from another pandas version) is a
+        # miss: the raw file is parsed again instead
+        try:
+            with open(self.parsed_path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return self._reparse()
+
+    def _reparse(self):
+        with self._lock:
+            try:
+                parsed = self.parse(self.raw_path)
+            except Exception:
+                # nothing usable: drop the pickle so the next revalidate
+                # downloads in full instead of getting a 304
+                self.parsed_path.unlink(missing_ok=True)
+                return None
+            atomic_write(self.parsed_path, pickle.dumps(parsed))
+            return parsed
+
+    # ---- network
+    def revalidate(self):
+        """Conditional GET; returns True when a new copy was stored."""
+        with self._lock:
+            meta = self.meta()
+            headers = {}
+            if self.parsed_path.exists():
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+            r = requests.get(self.url, headers=headers, timeout=self.timeout)
+            if r.status_code == 304:
+                meta["checked"] = time.time()
+                atomic_write(self.meta_path, json.dumps(meta).encode())
+                return False
+            r.raise_for_status()
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # parse the download under a temp name (same suffix, for the
+            # parser) and only then replace the raw file and the pickle, so a
+            # bad download never replaces the good copy or its ETag
+            with replacing(self.raw_path) as tmp:
+                tmp.write_bytes(r.content)
+                parsed = self.parse(tmp)
+                atomic_write(self.parsed_path, pickle.dumps(parsed))
+            meta = {
+                "url": self.url,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "fetched": time.time(),
+                "checked": time.time(),
+            }
+            atomic_write(self.meta_path, json.dumps(meta).encode())
+            return True
+
+    def _revalidate_quietly(self):
+        try:
+            if self.revalidate():
+                print(f"Refreshed {self.name} from {self.url}")
+        except Exception as e:
+            print(f"Could not refresh {self.name}, keeping cached copy: {e}")
+
+    def refresh_in_background(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._thread = threading.Thread(target=self._revalidate_quietly,
+                                        name=f"refresh-{self.name}", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def is_fresh(self):
+        return time.time() - self.meta().get("checked", 0) < self.fresh_for
+
+    def get(self):
+        parsed = self.cached()
+        if parsed is not None:
+            if not self.is_fresh():
+                self.refresh_in_background()
+            return parsed
+        # cold cache: nothing to serve until the first download lands
+        self.revalidate()
+        return self.cached()
@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# the app modules sit at the root; the pipeline scripts import their siblings by name
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "update_bathym"))
+# synthetic data and the local stand-in servers the benchmarks time against
+sys.path.insert(0, str(ROOT / "benchmarks"))
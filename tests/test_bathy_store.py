@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from bathy_store import BathyStore, app_rows, survey_key, survey_rows
+
+
+@pytest.fixture
+def seeded(tmp_path):
+    # clean_bathymetry.csv minus one survey, which comes back through the pipeline path
+    df = pd.read_csv(ROOT / "clean_bathymetry.csv")
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")])
+    row = df.iloc[0]
+    store = BathyStore(tmp_path / "store")
+    store.merge(survey_rows(df.iloc[1:], id_col="file"))
+    return store, row
+
+
+def summary_row(row):
+    # what process_survey writes for the survey behind a clean_bathymetry.csv row
+    return pd.DataFrame([{
+        "survey_id": survey_key([row["file"]])[0],
+        "segment_id": row["segment_id"],
+        "river_mile": row["milemarker"],
+        "bathym_mean": row["bathym_mean"],
+        "bathym_q25": row["bathym_q25"],
+        "bathym_q10": row["bathym_q10"],
+        "geometry": row["geometry"],
+    }])
+
+
+def test_summary_row_gets_the_seeded_depth(seeded):
+    store, row = seeded
+    rows, held = app_rows(summary_row(row), store.water_profile())
+    assert held.empty
+    assert rows["water_elev"].iloc[0] == pytest.approx(row["water_elev"])
+    assert rows["depth"].iloc[0] == pytest.approx(row["depth"])
+
+
+def test_merge_stores_the_row_and_marks_it_done(seeded, tmp_path):
+    store, row = seeded
+    done = {"LM": tmp_path / "lm_ids_done.csv", "UM": tmp_path / "um_ids_done.csv"}
+    rows, _ = app_rows(summary_row(row), store.water_profile())
+    sid = rows["survey_id"].iloc[0]
+
+    added = store.merge(survey_rows(rows), done_files=done)
+    assert list(added["survey_id"]) == [sid]
+    stored = store.read(years=[added["year"].iloc[0]])
+    assert sid in set(stored["survey_id"])
+    assert list(pd.read_csv(done["LM"])["ID"]) == [sid]
+    assert not done["UM"].exists()
+
+    # a rerun stores nothing new and leaves the id recorded once
+    assert store.merge(survey_rows(rows), done_files=done).empty
+    assert list(pd.read_csv(done["LM"])["ID"]) == [sid]
+
+
+def test_survey_outside_the_profile_is_held_back(seeded):
+    store, row = seeded
+    summary = summary_row(row).assign(river_mile=np.nanmax(store.water_profile()[0]) + 100)
+    rows, held = app_rows(summary, store.water_profile())
+    assert rows.empty
+    assert len(held) == 1
@@ -0,0 +1,32 @@
+import numpy as np
+
+import synthetic
+from bench_climatology import merged_bands
+from climatology import Climatology
+
+STAGE = synthetic.series(list(range(2016, 2026)))[1]
+
+
+def test_bands_match_the_groupby_merge():
+    clim = Climatology.from_series(STAGE["date"], STAGE["stage"])
+    merged = merged_bands(STAGE).sort_values("date")
+    mean, lower, upper = clim.lookup(merged["date"])
+    assert np.allclose(mean, merged["avg_stage"])
+    assert np.allclose(upper, merged["plusone"])
+    assert np.allclose(lower, merged["minusone"])
+
+
+def test_last_years_only():
+    clim = Climatology.from_series(STAGE["date"], STAGE["stage"])
+    recent = STAGE[STAGE["year"] >= STAGE["year"].max() - 4]
+    want = Climatology.from_series(recent["date"], recent["stage"]).lookup(STAGE["date"])[0]
+    assert np.allclose(clim.lookup(STAGE["date"], 5)[0], want, equal_nan=True)
+
+
+def test_appended_rows_match_a_rebuild():
+    old, new = STAGE.iloc[:-7], STAGE.iloc[-7:]
+    want = Climatology.from_series(STAGE["date"], STAGE["stage"]).lookup(STAGE["date"])[2]
+    base = Climatology.from_series(old["date"], old["stage"])
+    base.bands()
+    assert np.allclose(base.append(new["date"], new["stage"]).lookup(STAGE["date"])[2], want, equal_nan=True)
+    assert np.allclose(base.updated(STAGE["date"], STAGE["stage"]).lookup(STAGE["date"])[2], want, equal_nan=True)
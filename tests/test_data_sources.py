@@ -0,0 +1,16 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from bench_wkt_loading import synthetic_boxes
+from data_sources import representative_xy
+
+
+def test_representative_points_match_geopandas():
+    geoms = shapely.from_wkt(synthetic_boxes(500)["geometry"].to_numpy())
+    # and one polygon that isn't a box
+    geoms = np.append(geoms, shapely.Polygon([(-90, 33), (-89.9, 33), (-89.95, 33.1)]))
+    x, y = representative_xy(geoms, shapely.bounds(geoms))
+    want = gpd.GeoSeries(geoms, crs="EPSG:4326").representative_point()
+    assert np.allclose(x, want.x)
+    assert np.allclose(y, want.y)
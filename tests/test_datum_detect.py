@@ -0,0 +1,28 @@
+from datum_detect import DatumDetector
+
+
+def tiers(xyz=None, pdf=None):
+    # stand-in tiers: (name, function of the open ZipFile, datum_source)
+    return [("xyz", lambda z: xyz, "XYZ"), ("pdf_stream", lambda z: pdf, "PDF")]
+
+
+def test_xyz_and_pdf_disagreeing_is_a_mismatch(capsys):
+    detector = DatumDetector(tiers=tiers(xyz="NAVD88", pdf="LWRP2007"))
+    assert detector.detect("S1", None, "abc") == ("Mismatch: NAVD88/LWRP2007", "Both")
+    assert "WARNING: Datum mismatch for S1" in capsys.readouterr().out
+
+
+def test_xyz_confirmed_by_pdf():
+    detector = DatumDetector(tiers=tiers(xyz="NAVD88", pdf="NAVD88"))
+    assert detector.detect("S1", None, "abc") == ("NAVD88", "Both")
+    detector = DatumDetector(tiers=tiers(xyz="NAVD88"))
+    assert detector.detect("S1", None, "abc") == ("NAVD88", "XYZ")
+
+
+def test_unknown_is_not_cached(tmp_path):
+    detector = DatumDetector(tmp_path / "datum_cache.json", tiers=tiers())
+    assert detector.detect("S1", None, "abc") == ("Unknown", "")
+    detector.save()
+    # a later run with a tier that can read it gets the answer
+    detector = DatumDetector(tmp_path / "datum_cache.json", tiers=tiers(pdf="LWRP2014"))
+    assert detector.detect("S1", None, "abc") == ("LWRP2014", "PDF")
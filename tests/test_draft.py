@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from conftest import ROOT
+from draft import BED_COLUMN, DraftEngine, _survey_events
+
+BATHY_COLUMNS = ["date", "segment_id", "water_elev", "bathym_fixed", "LON", "LAT", "milemarker"]
+
+
+def test_no_surveys_and_no_stage():
+    eng = DraftEngine.from_frames(pd.DataFrame(columns=BATHY_COLUMNS),
+                                  pd.DataFrame(columns=["date", "stage"]))
+    assert eng.n_days == 1
+    assert eng.shallowest(eng.latest()) is None
+    assert eng.worst(0, eng.n_days).shape == (0,)
+
+
+def test_surveys_without_stage():
+    bathy = pd.DataFrame({"date": ["2024-05-01", "2024-06-01"], "segment_id": [3, 3],
+                          "water_elev": [100.0, 100.0], "bathym_fixed": [88.0, 90.0],
+                          "LON": [-91.0, -91.0], "LAT": [33.0, 33.0], "milemarker": [530.0, 530.0]})
+    eng = DraftEngine.from_frames(bathy, pd.DataFrame(columns=["date", "stage"]))
+    assert eng.n_days == 32
+    assert eng.shallowest(eng.n_days - 1) == 3
+    # no stage, so no available depth yet
+    assert np.isnan(eng.on(eng.n_days - 1)).all()
+
+
+def test_stage_update_matches_a_rebuild():
+    import synthetic
+
+    years = [2023, 2024, 2025]
+    bathy = synthetic.bathy(2000, years)
+    bathy["segment_id"] = np.random.default_rng(5).integers(0, 40, len(bathy))
+    stage = synthetic.series(years)[1]
+    cut = stage["date"].max() - pd.Timedelta(days=7)
+
+    eng = DraftEngine.from_frames(bathy, stage[stage["date"] <= cut])
+    new = stage[stage["date"] > cut]
+    updated = eng.with_stage(new["date"], new["stage"])
+    full = DraftEngine.from_frames(bathy, stage)
+    assert np.allclose(full.available(), updated.available(), equal_nan=True)
+
+
+def test_reference_depth_is_the_shallowest_real_survey():
+    # each segment survey day's reference depth is its shallowest row's depth
+    bathy = pd.read_csv(ROOT / "clean_bathymetry.csv")
+    seg, day, ref = _survey_events(bathy, BED_COLUMN)
+    ok = bathy[["segment_id", "depth"]].notna().all(axis=1)
+    days = pd.to_datetime(bathy["date"], utc=True).dt.tz_localize(None).dt.floor("D")
+    want = (bathy[ok].assign(day=(days[ok] - pd.Timestamp("1970-01-01")).dt.days)
+            .groupby(["segment_id", "day"])["depth"].min())
+    got = pd.Series(ref, index=pd.MultiIndex.from_arrays([seg, day]))
+    assert len(got) == len(want)
+    assert np.allclose(got.sort_index().to_numpy(), want.sort_index().to_numpy(), atol=1e-3)
@@ -0,0 +1,76 @@
+import os
+import threading
+import tracemalloc
+
+import pytest
+import requests
+
+from ehydro_download import EHydroDownloader
+from bench_ehydro_download import DISTRICTS, MockBlobStore, synthetic_blobs
+
+
+@pytest.fixture
+def store():
+    ids, blobs = synthetic_blobs(4, 4096)
+    server = MockBlobStore(blobs, 0)
+    server.ids = ids
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_503s_are_retried(store, tmp_path):
+    sid = store.ids[1]
+    path = f"/{DISTRICTS[1]}{sid}.ZIP"
+    # on both the probe and the download
+    store.fail = {path: 2}
+    dl = EHydroDownloader(store.url, backoff=0, cache_file=tmp_path / "districts.json")
+    _, content = dl.fetch(sid, DISTRICTS)
+    assert content == store.blobs[path]
+    assert not store.fail[path]
+
+
+def test_gives_up_after_the_retries(store):
+    sid = store.ids[1]
+    store.fail = {f"/{DISTRICTS[1]}{sid}.ZIP": 10}
+    # reported missing rather than raised
+    assert EHydroDownloader(store.url, retries=1, backoff=0).fetch(sid, DISTRICTS) == (None, None)
+
+
+def test_cached_district_is_probed_first(store, tmp_path):
+    sid = store.ids[1]
+    dl = EHydroDownloader(store.url, backoff=0, cache_file=tmp_path / "districts.json")
+    dl.probe(sid, DISTRICTS)
+    store.hits = 0
+    dl.probe(sid, DISTRICTS)
+    assert store.hits == 1
+    # and the cache is kept for the next run
+    assert EHydroDownloader(store.url, cache_file=tmp_path / "districts.json").cache.get(sid) == DISTRICTS[1]
+
+
+def test_ranged_get_when_head_is_refused(store):
+    store.allow_head = False
+    sid = store.ids[2]
+    assert EHydroDownloader(store.url, backoff=0).probe(sid, DISTRICTS) == f"{store.url}{DISTRICTS[2]}{sid}.ZIP"
+
+
+def test_download_streams_to_disk(store, tmp_path):
+    big = os.urandom(1 << 20) * 16
+    store.blobs["/mvn/BIG.ZIP"] = big
+    dl = EHydroDownloader(store.url, backoff=0)
+    tracemalloc.start()
+    try:
+        tmp_zip = dl.download_to(f"{store.url}mvn/BIG.ZIP", tmp_path, chunk_size=1 << 16)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert tmp_zip.read_bytes() == big
+    # memory bounded by the chunk size, not the 16 MB body
+    assert peak < 4 * 2**20
+
+
+def test_failed_download_leaves_no_temp_file(store, tmp_path):
+    dl = EHydroDownloader(store.url, backoff=0)
+    with pytest.raises(requests.HTTPError):
+        dl.download_to(f"{store.url}mvn/MISSING.ZIP", tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,26 @@
+import os
+import time
+
+from figure_cache import FileBackend
+
+
+def test_file_backend_drops_least_recently_used_over_the_cap(tmp_path):
+    backend = FileBackend(tmp_path, max_bytes=350, prune_every=0)
+    now = time.time()
+    for i, digest in enumerate(["a", "b", "c"]):
+        backend.set(digest, "x" * 100)
+        os.utime(tmp_path / f"{digest}.json", (now - 30 + i, now - 30 + i))
+    # a hit makes "a" the most recently used
+    assert backend.get("a") is not None
+    backend.set("d", "x" * 100)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json", "c.json", "d.json"]
+
+
+def test_file_backend_expires_old_files(tmp_path):
+    backend = FileBackend(tmp_path, ttl=60, prune_every=0)
+    backend.set("old", "{}")
+    stale = time.time() - 120
+    os.utime(tmp_path / "old.json", (stale, stale))
+    backend.set("new", "{}")
+    assert backend.get("old") is None
+    assert backend.get("new") == "{}"
@@ -0,0 +1,41 @@
+import pytest
+import requests
+
+from safe_io import atomic_write, replacing, with_retries
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / "table.csv"
+    atomic_write(path, "old")
+    with pytest.raises(ValueError):
+        with replacing(path) as tmp:
+            assert tmp.suffix == ".csv"
+            tmp.write_text("half")
+            raise ValueError("writer failed")
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["table.csv"]
+
+
+def test_retries_until_a_definite_status():
+    sent = [Response(503), Response(429), Response(404)]
+    calls = iter(sent)
+    assert with_retries(lambda: next(calls), retries=3, backoff=0) is sent[2]
+    assert sent[0].closed and sent[1].closed
+
+
+def test_last_attempt_is_returned_or_raised():
+    assert with_retries(lambda: Response(503), retries=1, backoff=0).status_code == 503
+
+    def refuse():
+        raise requests.ConnectionError("refused")
+    with pytest.raises(requests.ConnectionError):
+        with_retries(refuse, retries=1, backoff=0)
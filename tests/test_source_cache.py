@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from source_cache import CachedSource
+from bench_source_cache import StandIn, parse_rows
+
+GOOD = b"week,rate\n1,20.5\n2,21.0\n"
+
+
+@pytest.fixture
+def server():
+    server = StandIn(GOOD)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def source(tmp_path, url="http://127.0.0.1:9/rates.csv"):
+    return CachedSource("rates", url, parse_rows, suffix=".csv", cache_dir=tmp_path, fresh_for=3600)
+
+
+def test_fresh_copy_is_served_without_a_request(server, tmp_path):
+    src = source(tmp_path, server.url)
+    assert len(src.get()) == 2
+    server.hits = 0
+    assert len(src.get()) == 2
+    assert server.hits == 0
+
+
+def test_stale_copy_is_served_at_once_and_revalidated(server, tmp_path):
+    src = source(tmp_path, server.url)
+    src.get()
+    src.fresh_for = 0
+    server.latency = 0.5
+    assert len(src.get()) == 2
+    # answered before the slow server did
+    assert server.not_modified == 0
+    src._thread.join()
+    assert server.not_modified == 1
+
+
+def test_new_etag_stores_a_new_copy(server, tmp_path):
+    src = source(tmp_path, server.url)
+    src.get()
+    server.body = GOOD + b"3,22.3\n"
+    assert src.revalidate()
+    assert len(src.cached()) == 3
+
+
+def test_failing_server_keeps_the_last_good_copy(server, tmp_path):
+    src = source(tmp_path, server.url)
+    src.get()
+    server.status = 503
+    src.refresh_in_background().join()
+    assert len(src.get()) == 2
+
+
+def test_bad_download_leaves_the_cache_alone(server, tmp_path):
+    src = source(tmp_path, server.url)
+    src.get()
+    raw, meta = src.raw_path.read_bytes(), src.meta()
+    server.body = b"<html>maintenance</html>"
+    with pytest.raises(ValueError):
+        src.revalidate()
+    assert src.raw_path.read_bytes() == raw
+    assert src.meta()["etag"] == meta["etag"]
+    assert len(src.cached()) == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["rates.csv", "rates.json", "rates.pkl"]
+
+    # once the server is fixed the next revalidate repairs it
+    server.body = GOOD + b"3,22.3\n"
+    assert src.revalidate()
+    assert len(src.cached()) == 3
+
+
+def test_unloadable_pickle_is_parsed_again_from_the_raw_file(tmp_path):
+    src = source(tmp_path)
+    src.raw_path.write_text("week,rate\n1,20.5\n")
+    # e.g. pickled by a pandas version this interpreter can't import
+    src.parsed_path.write_bytes(b"cnope\nX\n.")
+    assert src.cached() == [["1", "20.5"]]
+    # and the pickle is repaired
+    assert src.cached() == [["1", "20.5"]]
+    assert src.parsed_path.read_bytes().startswith(b"\x80")
+
+
+def test_unloadable_pickle_without_raw_file_is_a_miss(tmp_path):
+    src = source(tmp_path)
+    src.parsed_path.write_bytes(b"junk")
+    assert src.cached() is None
+    # so the next revalidate can't be answered with a 304
+    assert not src.parsed_path.exists()
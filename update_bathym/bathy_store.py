@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# shared helpers one level up, as for river_miles.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from safe_io import atomic_write, replacing  # noqa: E402
+
+# partitioned bathymetry history: <root>/year=<y>/reach=<r>/part-*.parquet,
+# listed in <root>/manifest.json.  Parts are only ever added; the manifest
+# rename is the commit point of a merge.
+STORE_DIR = os.environ.get("BATHY_STORE", "bathy_store")
+MANIFEST = "manifest.json"
+FORMAT = 1
+# a row is already stored when either of these matches, compared as
+# survey ids (see survey_key)
+KEY_COLUMNS = ("file", "survey_id")
+# file-name endings the same eHydro survey id appears with: the seeded
+# clean_bathymetry.csv rows, the pipeline's inputs and its NAVD88 outputs
+ID_SUFFIXES = ("_w_datum.gpkg", "_SurveyPoint.gpkg", "_NAVD88.gpkg", ".gpkg", ".ZIP", ".zip")
+# columns the app reads from every stored row (the clean_bathymetry.csv schema)
+APP_COLUMNS = ("file", "date", "bathym_mean", "bathym_q25", "bathym_q10", "milemarker",
+               "segment_id", "water_elev", "bathym_fixed", "depth", "geometry")
+# ... plus what survey_rows adds for partitioning and dedupe
+STORED_COLUMNS = APP_COLUMNS + ("survey_id", "year", "reach")
+
+
+# FUNCTION FOR THE SURVEY ID IN A FILE NAME (..._w_datum.gpkg -> ...)
+def survey_key(names):
+    ids = pd.Series(names, dtype="string").str.replace(r"^.*[\\/]", "", regex=True)
+    for suffix in ID_SUFFIXES:
+        ids = ids.str.removesuffix(suffix)
+    return ids.to_numpy()
+
+
+# FUNCTION FOR THE REACH OF A SURVEY ID (LM_26_HIK_20150315_... -> LM)
+def survey_reach(ids):
+    return pd.Series(ids, dtype="string").str.split("_", n=1).str[0].str.upper().fillna("XX").to_numpy()
+
+
+# FUNCTION FOR THE SURVEY DATE IN A SURVEY ID (4th token, YYYYMMDD)
+def survey_date(ids):
+    token = pd.Series(ids, dtype="string").str.split("_").str[3]
+    return pd.to_datetime(token, format="%Y%m%d", errors="coerce", utc=True)
+
+
+def _key_values(df):
+    keys = set()
+    for col in KEY_COLUMNS:
+        if col in df:
+            keys.update(survey_key(df[col].dropna().astype(str)))
+    return keys
+
+
+class BathyStore:
+    """Append-only, year/reach partitioned Parquet store for survey rows."""
+
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        self._manifest = None
+        self._stamp = None
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.path, MANIFEST)
+
+    def _manifest_stamp(self):
+        try:
+            st = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @property
+    def manifest(self):
+        # re-read whenever another process (process_surveys) commits a merge
+        stamp = self._manifest_stamp()
+        if self._manifest is None or stamp != self._stamp:
+            self._manifest = self._read_manifest()
+            self._stamp = stamp
+        return self._manifest
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"format": FORMAT, "version": 0, "partitions": []}
+        if manifest.get("format") != FORMAT:
+            raise ValueError(f"{self.manifest_path}: unsupported store format {manifest.get('format')}")
+        return manifest
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    def partitions(self, years=None, reaches=None):
+        parts = self.manifest["partitions"]
+        if years is not None:
+            years = {int(y) for y in years}
+            parts = [p for p in parts if p["year"] in years]
+        if reaches is not None:
+            reaches = set(reaches)
+            parts = [p for p in parts if p["reach"] in reaches]
+        return parts
+
+    # ---- READ ----
+    def read(self, years=None, reaches=None, columns=None):
+        """Rows of the selected partitions, geometry decoded to shapely."""
+        parts = self.partitions(years, reaches)
+        if columns is not None:
+            columns = list(columns)
+        frames = [pd.read_parquet(os.path.join(self.path, p["path"]), columns=columns) for p in parts]
+        if not frames:
+            # no matching partitions: still the columns a caller expects
+            return pd.DataFrame(columns=columns or list(STORED_COLUMNS))
+        df = pd.concat(frames, ignore_index=True)
+        if "geometry" in df:
+            df["geometry"] = shapely.from_wkb(df["geometry"].to_numpy())
+        return df
+
+    def stored_keys(self, years=None, reaches=None):
+        # only the key columns of the touched partitions are read
+        keys = set()
+        for p in self.partitions(years, reaches):
+            path = os.path.join(self.path, p["path"])
+            keys.update(_key_values(pd.read_parquet(path, columns=p["keys"])))
+        return keys
+
+    def water_profile(self):
+        """(miles, water_elev) of the stored rows, sorted by mile.
+
+        water_elev is the reference-plane elevation at a survey's river mile
+        (the same for every survey at that mile), so the stored rows give the
+        profile new surveys are read against.
+        """
+        df = self.read(columns=["milemarker", "water_elev"])
+        df = df.astype(float).dropna().drop_duplicates("milemarker").sort_values("milemarker")
+        return df["milemarker"].to_numpy(), df["water_elev"].to_numpy()
+
+    # ---- WRITE ----
+    def merge(self, rows, done_files=None):
+        """Add new survey rows as new partitions; rows already stored are dropped.
+
+        `rows` needs survey_id or file, year and reach columns (see
+        survey_rows); geometry may be shapely objects or WKT.  `done_files`
+        maps reach -> ids_done CSV, each rewritten atomically with the ids
+        merged here once the manifest is committed.  Returns the rows kept.
+        """
+        rows = pd.DataFrame(rows).reset_index(drop=True)
+        if rows.empty:
+            return rows
+        key_cols = [c for c in KEY_COLUMNS if c in rows]
+        if not key_cols:
+            raise ValueError(f"rows need one of {KEY_COLUMNS}")
+        # the same survey under either column or file name is one row
+        keys = pd.Series(survey_key(rows[key_cols[-1]]))
+        is_new = ~keys.duplicated().to_numpy()
+
+        stored = self.stored_keys(rows["year"].unique(), rows["reach"].unique())
+        is_new &= ~keys.isin(stored).to_numpy()
+        rows = rows[is_new].reset_index(drop=True)
+        if rows.empty:
+            # all stored already (a rerun after a crash): the ids may still
+            # be missing from the ids_done files
+            if done_files:
+                record_done(done_files, keys)
+            return rows
+
+        if "geometry" in rows:
+            geoms = rows["geometry"].to_numpy()
+            if len(geoms) and isinstance(geoms[0], str):
+                geoms = shapely.from_wkt(geoms)
+            rows["geometry"] = shapely.to_wkb(geoms)
+
+        version = self.version + 1
+        added = []
+        for (year, reach), part in rows.groupby(["year", "reach"], sort=True):
+            rel = os.path.join(f"year={int(year)}", f"reach={reach}", f"part-{version:06d}-{uuid.uuid4().hex[:8]}.parquet")
+            path = os.path.join(self.path, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with replacing(path) as tmp:
+                part.to_parquet(tmp, index=False)
+            added.append({"path": rel, "year": int(year), "reach": str(reach),
+                          "rows": len(part), "keys": key_cols, "version": version})
+
+        manifest = dict(self.manifest, version=version, updated=time.time(),
+                        partitions=self.manifest["partitions"] + added)
+        os.makedirs(self.path, exist_ok=True)
+        atomic_write(self.manifest_path, json.dumps(manifest, indent=1))
+        self._manifest, self._stamp = manifest, self._manifest_stamp()
+
+        # a crash before this point leaves the ids_done files behind the
+        # store, which is safe: the next merge drops the already-stored rows
+        # and records them then
+        if done_files:
+            record_done(done_files, keys)
+        return rows
+
+
+# FUNCTION FOR ADDING IDS TO AN ids_done CSV, all or nothing
+def mark_done(path, ids):
+    ids = pd.Series(ids, dtype="string").dropna()
+    if ids.empty:
+        return
+    old = pd.read_csv(path)["ID"] if os.path.exists(path) else pd.Series([], dtype="string")
+    done = pd.concat([old.astype("string"), ids[~ids.isin(old.astype(str))]], ignore_index=True)
+    atomic_write(path, pd.DataFrame({"ID": done}).to_csv())
+
+
+# FUNCTION FOR ADDING SURVEY IDS TO THE ids_done CSV OF THEIR REACH
+def record_done(done_files, ids):
+    ids = pd.Series(survey_key(ids), dtype="string").drop_duplicates()
+    reaches = survey_reach(ids)
+    for reach, path in done_files.items():
+        mark_done(path, ids[reaches == reach])
+
+
+# FUNCTION FOR PIPELINE ROWS -> STORE ROWS (partition columns from the id)
+def survey_rows(df, id_col="survey_id"):
+    df = df.copy()
+    ids = df[id_col]
+    # one id form for dedupe and the ids_done lists, whatever the file name
+    df["survey_id"] = survey_key(ids)
+    # one date dtype in every partition
+    df["date"] = pd.to_datetime(df["date"], utc=True, errors="coerce") if "date" in df else survey_date(ids)
+    if "year" not in df:
+        df["year"] = df["date"].dt.year
+    df["reach"] = survey_reach(ids if "file" not in df else df["file"])
+    df = df[df["year"].notna()]
+    df["year"] = df["year"].astype(int)
+    return df
+
+
+# FUNCTION FOR PIPELINE SUMMARY ROWS -> THE COLUMNS THE APP READS
+def app_rows(summary, water_profile=None):
+    """process_surveys summary rows in the clean_bathymetry.csv schema.
+
+    Geometry must already be EPSG:4326 (process_survey writes it that way).
+    water_elev comes from `water_profile` (BathyStore.water_profile) at the
+    survey's river mile.  Returns (rows, held_back): a survey without a
+    water elevation (outside the profile) has no depth, and would show on
+    the map without one, so it is held back.
+    """
+    df = summary.copy()
+    df["file"] = df["survey_id"].astype(str) + "_NAVD88.gpkg"
+    df["milemarker"] = df["river_mile"]
+    if "water_elev" not in df:
+        df["water_elev"] = np.nan
+    if water_profile is not None and len(water_profile[0]):
+        miles, elev = water_profile
+        # only between the profile's end miles; nothing to hold flat against
+        df["water_elev"] = df["water_elev"].fillna(pd.Series(
+            np.interp(df["milemarker"].to_numpy(dtype=float), miles, elev, left=np.nan, right=np.nan),
+            index=df.index))
+    # bed elevation, positive up: some surveys report it sign-flipped, as
+    # the seeded rows' bathym_fixed corrects
+    df["bathym_fixed"] = df["bathym_mean"].abs()
+    df["depth"] = df["water_elev"] - df["bathym_fixed"]
+    df = df[[c for c in APP_COLUMNS if c in df] + ["survey_id"]]
+    held = df["depth"].isna().to_numpy()
+    return df[~held].reset_index(drop=True), df[held].reset_index(drop=True)
+
+
+# FUNCTION FOR SEEDING THE STORE FROM clean_bathymetry.csv
+def import_csv(csv_path, path=STORE_DIR):
+    df = pd.read_csv(csv_path)
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")])
+    store = BathyStore(path)
+    added = store.merge(survey_rows(df, id_col="file"))
+    print(f"Imported {len(added)} rows from {csv_path} into {path} (version {store.version})")
+    return store
+
+
+if __name__ == "__main__":
+    import sys
+    import_csv(sys.argv[1] if len(sys.argv) > 1 else "clean_bathymetry.csv",
+               sys.argv[2] if len(sys.argv) > 2 else STORE_DIR)
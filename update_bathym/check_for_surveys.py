@@ -1,38 +1,63 @@
-import requests
+import os
+import argparse
 import pandas as pd
 from pathlib import Path
+from survey_sync import FeatureServerSync, SyncState, FEATURESERVER_URL, ID_FIELD
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 
-# GET ALL IDS 
-url = "https://services7.arcgis.com/n1YM8pTrFmm7L4hs/arcgis/rest/services/eHydro_Survey_Data/FeatureServer/0/query"
-params = {"f": "json","where": "1=1", 
-    "outFields": "surveyjobidpk","resultOffset": 0,
-    "resultRecordCount": 2000,
-    "returnGeometry": "false"}
-all_ids = []
-while True:
-    r = requests.get(url, params=params)
-    r.raise_for_status()
-    data = r.json()
-    feats = data.get("features", [])
-    if not feats:
-        break
-    all_ids.extend([f["attributes"]["surveyjobidpk"] for f in feats])
-    params["resultOffset"] += params["resultRecordCount"]    
-lm_ids_all = [i for i in all_ids if str(i).startswith("LM")]
-um_ids_all = [i for i in all_ids if str(i).startswith("UM")]
-
-# SEE IF ANY IDS ARE NEW 
-old_lm = pd.read_csv(SCRIPT_DIR / 'lm_ids_done.csv')
-old_um = pd.read_csv(SCRIPT_DIR / 'um_ids_done.csv')
-old_lm_set = set(old_lm['ID'])
-old_um_set = set(old_um['ID'])
-new_lm_ids = [i for i in lm_ids_all if i not in old_lm_set]
-new_um_ids = [i for i in um_ids_all if i not in old_um_set]
-
-pd.DataFrame({"ID": new_lm_ids}).to_csv(SCRIPT_DIR / "new_lm_ids.csv",index=False)
-pd.DataFrame({"ID": new_um_ids}).to_csv(SCRIPT_DIR / "new_um_ids.csv",index=False)
-
-print(f'there are {len(new_lm_ids)} new lower mspi river surveys') 
-print(f'there are {len(new_um_ids)} new upper mspi river surveys')
+# --- CONFIG -----------------
+# EHYDRO_FEATURESERVER_URL can point at a local mock service
+URL = os.environ.get("EHYDRO_FEATURESERVER_URL", FEATURESERVER_URL)
+SYNC_WORKERS = int(os.environ.get("EHYDRO_SYNC_WORKERS", 4))
+STATE_FILE = SCRIPT_DIR / "survey_sync_state.json"
+PREFIXES = ("LM", "UM")
+
+
+# FUNCTION FOR IDS NOT DONE YET, keeping ones found by earlier runs
+def pending_ids(found, done_file, new_file, keep_previous):
+    done = set(pd.read_csv(done_file)["ID"])
+    ids = []
+    if keep_previous and new_file.exists():
+        # an incremental run only sees newer records; earlier finds that
+        # were never processed stay on the list
+        ids = pd.read_csv(new_file)["ID"].tolist()
+    seen = set(ids)
+    for i in found:
+        if i not in seen:
+            ids.append(i)
+            seen.add(i)
+    return [i for i in ids if i not in done]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find eHydro surveys that are not processed yet.")
+    parser.add_argument("--full", action="store_true",
+                        help="scan the whole catalog instead of records newer than the last sync")
+    args = parser.parse_args()
+
+    # GET IDS (only records added since the last sync unless --full)
+    state = SyncState(STATE_FILE)
+    sync = FeatureServerSync(URL, max_workers=SYNC_WORKERS)
+    full = args.full or state.mark(URL, PREFIXES) is None
+    rows = sync.sync(PREFIXES, state=state, full=full)
+    all_ids = [r[ID_FIELD] for r in rows]
+    print(f"{len(all_ids)} {'records' if full else 'new records'} in {sync.requests_made} requests")
+    lm_ids_all = [i for i in all_ids if str(i).startswith("LM")]
+    um_ids_all = [i for i in all_ids if str(i).startswith("UM")]
+
+    # SEE IF ANY IDS ARE NEW
+    new_lm_ids = pending_ids(lm_ids_all, SCRIPT_DIR / 'lm_ids_done.csv', SCRIPT_DIR / "new_lm_ids.csv", not full)
+    new_um_ids = pending_ids(um_ids_all, SCRIPT_DIR / 'um_ids_done.csv', SCRIPT_DIR / "new_um_ids.csv", not full)
+
+    pd.DataFrame({"ID": new_lm_ids}).to_csv(SCRIPT_DIR / "new_lm_ids.csv",index=False)
+    pd.DataFrame({"ID": new_um_ids}).to_csv(SCRIPT_DIR / "new_um_ids.csv",index=False)
+    # the ids are on disk, so the next run can start after these records
+    state.advance(URL, PREFIXES, rows)
+
+    print(f'there are {len(new_lm_ids)} new lower mspi river surveys')
+    print(f'there are {len(new_um_ids)} new upper mspi river surveys')
+
+
+if __name__ == "__main__":
+    main()
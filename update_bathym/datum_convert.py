@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+
+def datum_key(datum):
+    return str(datum).strip().upper()
+
+
+class DatumOffsets:
+    """NAVD88 elevation of each reference plane along the river, by river mile.
+
+    Each plane is a sorted (mile, elevation) profile from its gauges, so a
+    survey converts with one np.interp over all of its points: long surveys
+    that span several gauges get the local plane at every point.
+    """
+
+    def __init__(self, profiles):
+        # datum -> (miles, NAVD88 ft), any order
+        self.profiles = {}
+        for datum, (miles, elev) in profiles.items():
+            miles = np.asarray(miles, dtype=float)
+            elev = np.asarray(elev, dtype=float)
+            ok = ~(np.isnan(miles) | np.isnan(elev))
+            order = np.argsort(miles[ok], kind="stable")
+            if ok.any():
+                self.profiles[datum_key(datum)] = (miles[ok][order], elev[ok][order])
+
+    @classmethod
+    def from_table(cls, table, miles, datum_col="datum", value_col="NAVD88_ft"):
+        miles = np.asarray(miles, dtype=float)
+        datums = table[datum_col].map(datum_key).to_numpy()
+        values = table[value_col].to_numpy(dtype=float)
+        return cls({d: (miles[datums == d], values[datums == d]) for d in pd.unique(datums)})
+
+    @property
+    def supported(self):
+        return {"NAVD88", *self.profiles}
+
+    def plane(self, datum, miles):
+        # elevation of the plane at each mile; held flat past the end gauges
+        gauge_miles, elev = self.profiles[datum_key(datum)]
+        return np.interp(np.asarray(miles, dtype=float), gauge_miles, elev)
+
+    def to_navd88(self, datum, z, miles):
+        """Survey values -> NAVD88 elevations, one vectorized pass."""
+        z = np.asarray(z, dtype=float)
+        datum = datum_key(datum)
+        if datum == "NAVD88":
+            return z
+        if datum not in self.profiles:
+            raise KeyError(f"no reference-plane profile for datum {datum}")
+        return self.plane(datum, miles) - z
@@ -0,0 +1,264 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import hashlib
+from pathlib import Path
+
+try:
+    import pdfplumber
+except ImportError:  # only the last tier needs it
+    pdfplumber = None
+
+# shared helpers one level up, as for river_miles.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from safe_io import atomic_write  # noqa: E402
+
+# the datum line sits in the XYZ header, so only this much of the file is read
+XYZ_HEADER_BYTES = 16 * 1024
+# raw PDF / GDB bytes scanned before giving up on a tier
+PDF_SCAN_BYTES = 32 * 1024 * 1024
+GDB_SCAN_BYTES = 8 * 1024 * 1024
+# decompressed bytes kept per PDF content stream
+STREAM_MAX_BYTES = 4 * 1024 * 1024
+
+# datum -> phrase, compared with whitespace removed and lower-cased so text
+# split across PDF drawing operators still matches
+DATUM_PHRASES = {
+    "NAVD88": "navd88",
+    "DredgingRef": "dredgingreferenceplane",
+    "LWRP2014": "2014lowwaterreferenceplane",
+    "LWRP2007": "2007lowwaterreferenceplane",
+}
+
+
+# FUNCTION FOR A CONFIDENT DATUM IN A BLOCK OF TEXT
+def match_datum(text):
+    # exactly one datum named, or None
+    squashed = re.sub(r"\s+", "", text.lower())
+    found = [d for d, phrase in DATUM_PHRASES.items() if phrase in squashed]
+    return found[0] if len(found) == 1 else None
+
+
+# ---------------------------
+# FUNCTION FOR XYZ FILE DATUM
+def get_datum_from_xyz(text: str):
+    for line in text.splitlines():
+        if "datum" in line.lower():
+            text_line = line.strip()
+            if "NAVD88" in text_line.upper():
+                return "NAVD88"
+            elif "2014 Low Water Reference Plane" in text_line:
+                return "LWRP2014"
+            elif "2007 Low Water Reference Plane" in text_line:
+                return "LWRP2007"
+            elif "Dredging Reference Plane" in text_line:
+                return "DredgingRef"
+            else:
+                return f"Unknown (found: {text_line})"
+    return "Unknown"
+
+# FUNCTION FOR THE HEADER OF AN XYZ FILE
+def read_xyz_header(fobj, max_bytes=XYZ_HEADER_BYTES):
+    head = fobj.read(max_bytes)
+    if len(head) == max_bytes:
+        # drop the partial last line
+        head = head[:head.rfind(b"\n") + 1] or head
+    return head.decode(errors="ignore")
+
+# FUNCTION FOR PDF FILE DATUM (full layout, bottom-right title block)
+def get_datum_from_pdf(fobj):
+    try:
+        with pdfplumber.open(fobj) as pdf:
+            page = pdf.pages[0]
+            width, height = page.width, page.height
+            crop_box = (width * 0.7, height * 0.7, width, height)
+            cropped = page.crop(crop_box)
+            text = cropped.extract_text() or ""
+            text = text.lower()
+        if "navd88" in text:
+            return "NAVD88"
+        elif "dredging reference plane" in text:
+            return "DredgingRef"
+        elif "2014 low water reference plane" in text:
+            return "LWRP2014"
+        elif "2007 low water reference plane" in text:
+            return "LWRP2007"
+        else:
+            return "Unknown"
+    except Exception as e:
+        print(f"PDF reading error: {e}")
+        return "Unknown"
+
+
+# ---------------------------
+# RAW PDF TEXT, no layout: the string operands of every content stream
+_STREAM = re.compile(rb"stream\r?\n(.*?)endstream", re.S)
+_TEXT = re.compile(rb"\(((?:\\.|[^\\)])*)\)")
+
+
+def pdf_stream_text(data, max_stream=STREAM_MAX_BYTES):
+    parts = []
+    for m in _STREAM.finditer(data):
+        raw = m.group(1)
+        try:
+            raw = zlib.decompressobj().decompress(raw, max_stream)
+        except zlib.error:
+            pass  # not Flate (images, or already plain)
+        parts.extend(_TEXT.findall(raw))
+    return b"".join(parts).decode("latin-1")
+
+
+# FUNCTION FOR THE CACHE KEY OF A DOWNLOADED ZIP (path or bytes)
+def zip_digest(source, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    if isinstance(source, (bytes, bytearray)):
+        h.update(source)
+        return h.hexdigest()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _members(z, suffix):
+    return [n for n in z.namelist() if n.lower().endswith(suffix)]
+
+
+# ---------------------------
+# TIERS, cheapest first: each returns a datum or None to fall through
+def tier_xyz(z):
+    for name in _members(z, ".xyz")[:1]:
+        with z.open(name) as f:
+            datum = get_datum_from_xyz(read_xyz_header(f))
+        if not datum.startswith("Unknown"):
+            return datum
+    return None
+
+
+def tier_gdb(z):
+    # metadata and attribute tables of the file geodatabase, as raw bytes
+    budget = GDB_SCAN_BYTES
+    for name in _members(z, ".gdbtable"):
+        if ".gdb/" not in name or budget <= 0:
+            continue
+        with z.open(name) as f:
+            data = f.read(budget)
+        budget -= len(data)
+        datum = match_datum(data.decode("utf-8", errors="ignore"))
+        if datum:
+            return datum
+    return None
+
+
+def tier_pdf_stream(z):
+    for name in _members(z, ".pdf")[:1]:
+        with z.open(name) as f:
+            datum = match_datum(pdf_stream_text(f.read(PDF_SCAN_BYTES)))
+        if datum:
+            return datum
+    return None
+
+
+def tier_pdf_layout(z):
+    if pdfplumber is None:
+        return None
+    for name in _members(z, ".pdf")[:1]:
+        with z.open(name) as f:
+            datum = get_datum_from_pdf(f)
+        if datum != "Unknown":
+            return datum
+    return None
+
+
+# (tier name, function, datum_source written to the metadata)
+TIERS = [
+    ("xyz", tier_xyz, "XYZ"),
+    ("gdb", tier_gdb, "GDB"),
+    ("pdf_stream", tier_pdf_stream, "PDF"),
+    ("pdf_layout", tier_pdf_layout, "PDF"),
+]
+
+
+class DatumDetector:
+    """Runs the tiers in order until one is sure; caches by survey id + ZIP hash.
+
+    An XYZ answer is checked against the raw PDF text (the cheap PDF tier),
+    as the XYZ/PDF reconciliation always was: a disagreement is reported as
+    "Mismatch: <xyz>/<pdf>" with a warning.  "Unknown" is never cached, so
+    a survey no tier could read is tried again on the next run.
+    """
+
+    # (tier that answered, tier it is checked against)
+    CROSS_CHECK = ("xyz", "pdf_stream")
+
+    def __init__(self, cache_file=None, tiers=TIERS):
+        self.tiers = tiers
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.cache = {}
+        if self.cache_file and self.cache_file.exists():
+            try:
+                self.cache = json.loads(self.cache_file.read_text())
+            except ValueError:
+                self.cache = {}
+        self.stats = {name: {"tried": 0, "hits": 0, "seconds": 0.0} for name, *_ in tiers}
+        self.stats["cache"] = {"tried": 0, "hits": 0, "seconds": 0.0}
+
+    def _try(self, name, fn, survey_id, z):
+        st = self.stats[name]
+        st["tried"] += 1
+        t0 = time.perf_counter()
+        try:
+            found = fn(z)
+        except Exception as e:
+            print(f"Datum tier {name} failed for {survey_id}: {e}")
+            found = None
+        st["seconds"] += time.perf_counter() - t0
+        if found:
+            st["hits"] += 1
+        return found
+
+    def detect(self, survey_id, z, digest):
+        """(datum, datum_source) for an open ZipFile; ("Unknown", "") if no tier is sure."""
+        key = f"{survey_id}:{digest}"
+        self.stats["cache"]["tried"] += 1
+        if key in self.cache:
+            self.stats["cache"]["hits"] += 1
+            hit = self.cache[key]
+            return hit["datum"], hit["source"]
+
+        datum, source = "Unknown", ""
+        for name, fn, label in self.tiers:
+            found = self._try(name, fn, survey_id, z)
+            if found:
+                datum, source = found, label
+                break
+        else:
+            return datum, source
+
+        answered, against = self.CROSS_CHECK
+        check = next(((fn, label) for n, fn, label in self.tiers if n == against), None)
+        if name == answered and check is not None:
+            other = self._try(against, check[0], survey_id, z)
+            if other and other != datum:
+                print(f"WARNING: Datum mismatch for {survey_id}: {source} says {datum}, {check[1]} says {other}")
+                datum, source = f"Mismatch: {datum}/{other}", "Both"
+            elif other:
+                source = "Both"
+        self.cache[key] = {"datum": datum, "source": source}
+        return datum, source
+
+    def save(self):
+        if not self.cache_file:
+            return
+        atomic_write(self.cache_file, json.dumps(self.cache, indent=1, sort_keys=True))
+
+    def report(self):
+        print(f"{'tier':12s} {'tried':>6} {'hits':>6} {'hit %':>6} {'total s':>8} {'ms/try':>7}")
+        for name, st in self.stats.items():
+            tried = st["tried"]
+            rate = 100 * st["hits"] / tried if tried else 0
+            per = 1000 * st["seconds"] / tried if tried else 0
+            print(f"{name:12s} {tried:6d} {st['hits']:6d} {rate:6.1f} {st['seconds']:8.2f} {per:7.1f}")
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# shared helpers one level up, as for river_miles.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from safe_io import atomic_write, with_retries  # noqa: E402
+
+BASE_URL = "https://ehydroprod.blob.core.usgovcloudapi.net/ehydro-surveys/"
+
+# bytes per read when streaming a ZIP to disk
+CHUNK_SIZE = 1 << 20
+
+
+# FUNCTION FOR THE CACHE KEY OF A SURVEY ID
+def survey_pattern(survey_id: str):
+    # LM_26_HIK_20150315_CS_... -> LM_26_HIK (river, district number, project)
+    return "_".join(str(survey_id).split("_")[:3])
+
+
+class DistrictCache:
+    """Survey-id pattern -> district prefix that served it, persisted as JSON."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._map = {}
+        if self.path and self.path.exists():
+            try:
+                self._map = json.loads(self.path.read_text())
+            except ValueError:
+                self._map = {}
+
+    def get(self, survey_id):
+        with self._lock:
+            return self._map.get(survey_pattern(survey_id))
+
+    def put(self, survey_id, district):
+        with self._lock:
+            key = survey_pattern(survey_id)
+            if self._map.get(key) == district:
+                return
+            self._map[key] = district
+            if self.path:
+                atomic_write(self.path, json.dumps(self._map, indent=1, sort_keys=True))
+
+    def ordered(self, survey_id, districts):
+        # cached prefix first, then the rest in their configured order
+        hit = self.get(survey_id)
+        if hit in districts:
+            return [hit] + [d for d in districts if d != hit]
+        return list(districts)
+
+
+class EHydroDownloader:
+    """Probes district prefixes with HEAD and downloads survey ZIPs over a pooled session."""
+
+    def __init__(self, base_url=BASE_URL, max_workers=4, retries=3, backoff=1.0,
+                 timeout=60, cache_file=None):
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = DistrictCache(cache_file)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url_for(self, district, survey_id):
+        return f"{self.base_url}{district}{survey_id}.ZIP"
+
+    def _request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return with_retries(lambda: self.session.request(method, url, **kwargs),
+                            self.retries, self.backoff)
+
+    def _exists(self, url):
+        r = self._request("HEAD", url, allow_redirects=True)
+        if r.status_code in (403, 405, 501):
+            # store doesn't allow HEAD: ask for the first byte only
+            r = self._request("GET", url, headers={"Range": "bytes=0-0"}, stream=True)
+            r.close()
+            return r.status_code in (200, 206)
+        return r.status_code == 200
+
+    def probe(self, survey_id, districts):
+        for dist in self.cache.ordered(survey_id, districts):
+            url = self.url_for(dist, survey_id)
+            try:
+                if self._exists(url):
+                    self.cache.put(survey_id, dist)
+                    return url
+            except requests.RequestException as e:
+                print(f"Error probing {url}: {e}")
+        return None
+
+    def download(self, url):
+        r = self._request("GET", url)
+        r.raise_for_status()
+        return r.content
+
+    def download_to(self, url, dest_dir, chunk_size=CHUNK_SIZE):
+        # stream the body to a temp file so memory stays at one chunk per download
+        fd, path = tempfile.mkstemp(suffix=".zip", dir=dest_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                r = self._request("GET", url, stream=True)
+                with r:
+                    r.raise_for_status()
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        out.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return Path(path)
+
+    def fetch(self, survey_id, districts, dest_dir=None):
+        # returns (url, zip bytes) -- or (url, temp file path) when dest_dir is
+        # given -- and (None, None) if no district has it
+        url = self.probe(survey_id, districts)
+        if url is None:
+            return None, None
+        try:
+            if dest_dir is None:
+                content = self.download(url)
+            else:
+                content = self.download_to(url, dest_dir)
+        except requests.RequestException as e:
+            print(f"Error downloading {url}: {e}")
+            return url, None
+        print(f"Downloaded: {url}")
+        return url, content
+
+    def fetch_all(self, survey_ids, districts, dest_dir=None):
+        """Yield (survey_id, url, content) in input order, at most max_workers in flight."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = deque()
+            ids = iter(survey_ids)
+            for survey_id in ids:
+                pending.append((survey_id, pool.submit(self.fetch, survey_id, districts, dest_dir)))
+                if len(pending) >= self.max_workers:
+                    break
+            while pending:
+                survey_id, fut = pending.popleft()
+                url, content = fut.result()
+                # refill before handing the result over so downloads overlap processing
+                nxt = next(ids, None)
+                if nxt is not None:
+                    pending.append((nxt, pool.submit(self.fetch, nxt, districts, dest_dir)))
+                yield survey_id, url, content
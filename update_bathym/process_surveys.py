@@ -1,129 +1,257 @@
 import os
+import sys
 import glob
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import geopandas as gpd
-import numpy as np
-from shapely.ops import unary_union
+from vessel_sampling import SurveyDepthSampler, depth_summary
+from reference_layers import ReferenceLayers
+from bathy_store import BathyStore, survey_rows, app_rows, record_done
+from projection import WGS84, project
+from datum_convert import datum_key
+
+# shared helpers one level up, as for river_miles.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from safe_io import atomic_write, replacing  # noqa: E402
 
 # ---------------- CONFIG ----------------
 BASE_DIR = "BathymetryData"
 SURVEYPOINT_DIR = os.path.join(BASE_DIR, "SurveyPointLayers")
 FIXED_DIR = os.path.join(BASE_DIR, "BathymetryLayers_FIXED_NAVD88")
-os.makedirs(FIXED_DIR, exist_ok=True)
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "checkpoints")
+SUMMARY_FILE = os.path.join(BASE_DIR, "Bathymetry_Vessel_Summary.csv")
 
 # Vessel data
 VESSEL_FILE = "october_data_5min.csv"
 
 # Datum transformation files (LWRP2007, LWRP2014, etc.)
 LWRP7_FILE = "lwrp_info.csv"
+# extra reference-plane gauges: datum, LON, LAT, NAVD88_ft (LWRP2014, DredgingRef, ...)
+PLANES_FILE = "datum_planes.csv"
 
 # River segments
 SEGMENTS_FILE = "10_mile_river_segments.geojson"
 
+# Mississippi centerline for river-mile positions
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CENTERLINE_FILE = os.path.join(SCRIPT_DIR, "..", "rivers_shapefile", "rivers.shp")
+
+# partitioned history the app reads, and the ids it already holds
+STORE_DIR = os.environ.get("BATHY_STORE", os.path.join(SCRIPT_DIR, "..", "bathy_store"))
+IDS_DONE = {"LM": os.path.join(SCRIPT_DIR, "lm_ids_done.csv"),
+            "UM": os.path.join(SCRIPT_DIR, "um_ids_done.csv")}
+
 # max survey points per survey to process
 MAX_POINTS = 2000
 
-# ---------------- LOAD SUPPORT DATA ----------------
-segments = gpd.read_file(SEGMENTS_FILE).to_crs("EPSG:4326")
-vessels = pd.read_csv(VESSEL_FILE)
-vessels = gpd.GeoDataFrame(vessels,
-                           geometry=gpd.points_from_xy(vessels["LON"], vessels["LAT"]),
-                           crs="EPSG:4326")
-vessels['BaseDateTime'] = pd.to_datetime(vessels['BaseDateTime'], errors='coerce')
 utm_crs = "EPSG:26915"
-vessels_utm = vessels.to_crs(utm_crs)
 
-# LWRP2007 lookup
-lwrp7 = pd.read_csv(LWRP7_FILE)
-lwrp7_gdf = gpd.GeoDataFrame(lwrp7,
-                              geometry=gpd.points_from_xy(lwrp7["LON"], lwrp7["LAT"]),
-                              crs="EPSG:4326")
+# bump when the per-survey output changes so old checkpoints are redone
+CHECKPOINT_VERSION = 4
+
 
-# ---------------- GET FILES TO PROCESS ----------------
-files = glob.glob(os.path.join(SURVEYPOINT_DIR, "*SurveyPoint.gpkg"))
-files = sorted(files)
-print(f"Found {len(files)} SurveyPoint files.")
+# ---------------- LOAD SUPPORT DATA ----------------
+def load_support_data():
+    # read and project every reference layer once for the whole run
+    return ReferenceLayers.load(utm_crs, SEGMENTS_FILE, LWRP7_FILE, VESSEL_FILE, CENTERLINE_FILE,
+                                planes_file=PLANES_FILE)
 
-# ---------------- PROCESS EACH SURVEY ----------------
-output_rows = []
 
-for fpath in files:
+# ---------------- PROCESS ONE SURVEY ----------------
+def process_survey(fpath, layers):
     base = os.path.basename(fpath).replace("_SurveyPoint.gpkg","")
     gdf = gpd.read_file(fpath)
-    
+
+    # --- project survey once and index its points ---
+    sampler = SurveyDepthSampler(gdf, utm_crs)
+
+    # --- river mile of the survey centroid ---
+    survey_mile = float(layers.mile_index.miles([sampler.centroid()])[0])
+
     # --- datum check ---
     datum = gdf.get("Datum", ["Unknown"])[0] if "Datum" in gdf.columns else "Unknown"
-    datum = str(datum).upper()
-    
-    # --- convert to NAVD88 if needed ---
-    if datum == "NAVD88":
-        gdf["Z_navd88"] = gdf["Z_use"]
-    elif datum == "LWRP2007":
-        # find nearest milemarker in LWRP7 and apply conversion
-        midpoint = unary_union(gdf.geometry).centroid
-        lwrp7_gdf["dist"] = lwrp7_gdf.geometry.distance(midpoint)
-        nearest = lwrp7_gdf.loc[lwrp7_gdf["dist"].idxmin()]
-        navd88_val = nearest["NAVD88_ft"]
-        gdf["Z_navd88"] = navd88_val - gdf["Z_use"]
-    else:
+    datum = datum_key(datum)
+
+    # --- convert to NAVD88: reference plane interpolated at every point's river mile ---
+    offsets = layers.datum_offsets
+    if datum not in offsets.supported:
         # Unknown or other datums: skip or save separately
         print(f"{base} has unknown datum {datum}, skipping...")
-        continue
-    
-    # --- assign segment ---
-    midpoint = unary_union(gdf.geometry).centroid
-    midpoint_gdf = gpd.GeoDataFrame(geometry=[midpoint], crs="EPSG:4326")
-    midpoint_proj = midpoint_gdf.to_crs(utm_crs)
-    segments_proj = segments.to_crs(utm_crs)
-    segments_proj["dist"] = segments_proj.geometry.distance(midpoint_proj.geometry.iloc[0])
-    nearest_idx = segments_proj["dist"].idxmin()
-    segment_id = segments_proj.loc[nearest_idx, "segment_id"]
-    
+        return {"survey_id": base, "status": "skipped", "datum": datum}
+    point_miles = layers.mile_index.miles(sampler.points)
+    gdf["Z_navd88"] = offsets.to_navd88(datum, gdf["Z_use"].to_numpy(), point_miles)
+
+    # --- assign segment: the one whose mile range holds the survey ---
+    segment_id = layers.segment_miles.containing(survey_mile)
+
     # --- subsample if too many points ---
     subset = gdf
     if len(subset) > MAX_POINTS:
         subset = subset.sample(MAX_POINTS, random_state=1)
-    
-    # --- compute convex hull ---
-    poly = subset.unary_union.convex_hull
-    
+
+    # --- compute convex hull; the summary row carries it in EPSG:4326 like the app's rows ---
+    hull_utm = sampler.hull(gdf.index.get_indexer(subset.index))
+    poly = project([hull_utm], utm_crs, WGS84)[0]
+
     # --- get vessels in survey area ---
-    vessels_in = vessels_utm[vessels_utm.within(poly.to_crs(utm_crs))]
-    
-    vessel_bathyms = []
-    for pt in vessels_in.geometry:
-        buf = pt.buffer(50)  # 50m buffer
-        intersecting = gdf.to_crs(utm_crs)[gdf.to_crs(utm_crs).intersects(buf)]
-        if not intersecting.empty:
-            vessel_bathyms.append(intersecting["Z_navd88"].mean())
-    
-    if vessel_bathyms:
-        bathym_mean = np.mean(vessel_bathyms)
-        bathym_q25 = np.percentile(vessel_bathyms,25)
-        bathym_q10 = np.percentile(vessel_bathyms,10)
-        bathym_q75 = np.percentile(vessel_bathyms,75)
-        bathym_q90 = np.percentile(vessel_bathyms,90)
-    else:
-        bathym_mean = bathym_q25 = bathym_q10 = bathym_q75 = bathym_q90 = np.nan
-    
-    output_rows.append({
-        "survey_id": base,
-        "segment_id": segment_id,
-        "bathym_mean": bathym_mean,
-        "bathym_q25": bathym_q25,
-        "bathym_q10": bathym_q10,
-        "bathym_q75": bathym_q75,
-        "bathym_q90": bathym_q90,
-        "geometry": poly.wkt
-    })
-    
+    vessels_in = layers.vessel_index.within(hull_utm)
+
+    # --- mean depth within 50m of each vessel, one batched query ---
+    vessel_bathyms = sampler.vessel_means(vessels_in, gdf["Z_navd88"], radius=50)
+    stats = depth_summary(vessel_bathyms)
+
     # --- save fixed NAVD88 GPKG ---
     out_file = os.path.join(FIXED_DIR, f"{base}_NAVD88.gpkg")
-    gdf.to_file(out_file, driver="GPKG")
+    # a checkpoint trusts any out_file that exists, so never a half-written one
+    with replacing(out_file) as tmp:
+        gdf.to_file(tmp, driver="GPKG")
     print(f"Saved {out_file}")
 
-# --- save summary CSV ---
-summary_file = os.path.join(BASE_DIR, "Bathymetry_Vessel_Summary.csv")
-summary_df = pd.DataFrame(output_rows)
-summary_df.to_csv(summary_file, index=False)
-print(f"Saved summary to {summary_file}")
+    return {
+        "survey_id": base,
+        "status": "ok",
+        "row": {
+            "survey_id": base,
+            "segment_id": segment_id,
+            "river_mile": survey_mile,
+            **stats,
+            "geometry": poly.wkt
+        },
+        "out_file": out_file,
+    }
+
+
+# ---------------- CHECKPOINTS ----------------
+def checkpoint_path(fpath):
+    base = os.path.basename(fpath).replace("_SurveyPoint.gpkg","")
+    return os.path.join(CHECKPOINT_DIR, f"{base}.json")
+
+
+def _source_stamp(fpath):
+    st = os.stat(fpath)
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def _json_default(o):
+    # numpy scalars from pandas/np.percentile
+    if hasattr(o, "item"):
+        return o.item()
+    return str(o)
+
+
+def write_checkpoint(fpath, result):
+    result = dict(result, version=CHECKPOINT_VERSION, source=_source_stamp(fpath))
+    atomic_write(checkpoint_path(fpath), json.dumps(result, default=_json_default))
+
+
+def read_checkpoint(fpath):
+    # a checkpoint is only valid for the exact source file that produced it
+    path = checkpoint_path(fpath)
+    try:
+        with open(path) as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if result.get("version") != CHECKPOINT_VERSION or result.get("source") != _source_stamp(fpath):
+        return None
+    if result.get("status") == "ok" and not os.path.exists(result.get("out_file", "")):
+        return None
+    if result.get("status") not in ("ok", "skipped"):
+        return None
+    return result
+
+
+# ---------------- WORKERS ----------------
+_layers = None
+
+def _init_worker(layers):
+    # layers arrive pickled once per worker; the indexes rebuild on unpickle
+    global _layers
+    _layers = layers
+
+def _run_one(fpath):
+    return process_survey(fpath, _layers)
+
+
+def run_pipeline(files, workers=1, force=False):
+    results = {}
+    todo = []
+    for fpath in files:
+        done = None if force else read_checkpoint(fpath)
+        if done is not None:
+            results[fpath] = done
+        else:
+            todo.append(fpath)
+    print(f"{len(results)} surveys already processed, {len(todo)} to go.")
+    if not todo:
+        return results
+
+    def _finish(fpath, run):
+        # the same handling for the serial and pool paths: a bad survey is
+        # reported and skipped, the rest still get their checkpoints
+        try:
+            result = run()
+            write_checkpoint(fpath, result)
+        except Exception as e:
+            # no checkpoint, so the next run retries this survey
+            print(f"Error processing {fpath}: {e}")
+            return
+        results[fpath] = result
+
+    layers = load_support_data()
+    if workers <= 1:
+        for fpath in todo:
+            _finish(fpath, lambda: process_survey(fpath, layers))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(layers,)) as pool:
+        futures = {pool.submit(_run_one, fpath): fpath for fpath in todo}
+        for fut in as_completed(futures):
+            _finish(futures[fut], fut.result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fix survey datums and summarize vessel-track depths.")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SURVEY_WORKERS", 1)),
+                        help="worker processes (default 1 = serial)")
+    parser.add_argument("--force", action="store_true", help="ignore existing checkpoints")
+    args = parser.parse_args()
+
+    os.makedirs(FIXED_DIR, exist_ok=True)
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+
+    # ---------------- GET FILES TO PROCESS ----------------
+    files = glob.glob(os.path.join(SURVEYPOINT_DIR, "*SurveyPoint.gpkg"))
+    files = sorted(files)
+    print(f"Found {len(files)} SurveyPoint files.")
+
+    results = run_pipeline(files, workers=args.workers, force=args.force)
+
+    # --- save summary CSV from every checkpointed survey ---
+    output_rows = [results[f]["row"] for f in files
+                   if f in results and results[f]["status"] == "ok"]
+    summary_df = pd.DataFrame(output_rows)
+    summary_df.to_csv(SUMMARY_FILE, index=False)
+    print(f"Saved summary to {SUMMARY_FILE}")
+
+    # --- merge new surveys into the store ---
+    if not summary_df.empty:
+        store = BathyStore(STORE_DIR)
+        # water_elev from the stored surveys' reference-plane profile by river mile
+        rows, held = app_rows(summary_df, store.water_profile())
+        if len(held):
+            # no water elevation, so no depth to map: they stay in SUMMARY_FILE only
+            print(f"Held back {len(held)} surveys without a water elevation from {STORE_DIR}")
+        added = store.merge(survey_rows(rows), done_files=IDS_DONE)
+        print(f"Merged {len(added)} new surveys into {STORE_DIR} (version {store.version})")
+
+    # --- mark every checkpointed survey done, merged or not, so it isn't queued again ---
+    record_done(IDS_DONE, [results[f]["survey_id"] for f in files if f in results])
+
+
+if __name__ == "__main__":
+    main()
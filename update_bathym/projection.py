@@ -0,0 +1,25 @@
+from functools import lru_cache
+
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+
+WGS84 = "EPSG:4326"
+
+
+# one Transformer per (source, target) pair per process; building one costs
+# far more than using it
+@lru_cache(maxsize=None)
+def transformer(src, dst):
+    return Transformer.from_crs(CRS.from_user_input(src), CRS.from_user_input(dst), always_xy=True)
+
+
+def project(geoms, src, dst):
+    """Reproject an array of shapely geometries with a cached Transformer."""
+    geoms = np.asarray(geoms, dtype=object)
+    src = CRS.from_user_input(src or WGS84)
+    dst = CRS.from_user_input(dst)
+    if src == dst:
+        return geoms
+    t = transformer(src.to_wkt(), dst.to_wkt())
+    return shapely.transform(geoms, lambda xy: np.column_stack(t.transform(xy[:, 0], xy[:, 1])))
@@ -0,0 +1,107 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+from projection import WGS84, project
+from vessel_sampling import VesselIndex
+from datum_convert import DatumOffsets
+
+# the river-mile index is shared with the app, one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from river_miles import RiverMileIndex  # noqa: E402
+
+# columns that hold a known river mile, used to calibrate the centerline
+MILE_COLUMNS = ("milemarker", "river_mile", "RM", "Mile", "MILE")
+
+
+def _frozen(arr):
+    arr = np.asarray(arr)
+    arr.flags.writeable = False
+    return arr
+
+
+def _mile_column(df):
+    return next((c for c in MILE_COLUMNS if c in df.columns), None)
+
+
+# FUNCTION FOR THE REFERENCE-PLANE GAUGE TABLE
+def load_planes(lwrp7_file, planes_file=None):
+    # lwrp_info.csv holds the LWRP2007 gauges; planes_file (datum, LON, LAT,
+    # NAVD88_ft) adds LWRP2014, the Dredging Reference Plane or newer gauges
+    planes = pd.read_csv(lwrp7_file).assign(datum="LWRP2007")
+    if planes_file and os.path.exists(planes_file):
+        planes = pd.concat([planes, pd.read_csv(planes_file)], ignore_index=True)
+    return planes
+
+
+# ---------------------------
+# REFERENCE LAYERS, loaded and projected once per run
+class ReferenceLayers:
+    """Segments, datum reference gauges, vessel pings and the centerline in one CRS.
+
+    Everything is read and projected once; survey jobs only get read-only
+    arrays and the indexes built on them.  Pickling sends the projected
+    coordinates and rebuilds the indexes on the other side, so a pool can
+    receive one loaded instance instead of every worker rereading files.
+    """
+
+    def __init__(self, crs, segment_geoms, segment_ids, planes, plane_geoms,
+                 vessel_geoms, centerline, segment_marks=None):
+        self.crs = crs
+        self.segment_geoms = _frozen(segment_geoms)
+        self.segment_ids = _frozen(segment_ids)
+        self.segment_marks = None if segment_marks is None else _frozen(segment_marks)
+        # reference-plane gauges: datum, NAVD88_ft (+ optional mile column)
+        self.planes = planes
+        self.plane_geoms = _frozen(plane_geoms)
+        self.vessel_geoms = _frozen(vessel_geoms)
+        self.centerline = centerline
+        self._build_indexes()
+
+    @classmethod
+    def load(cls, crs, segments_file, lwrp7_file, vessel_file, centerline_file, planes_file=None):
+        segments = gpd.read_file(segments_file)
+        planes = load_planes(lwrp7_file, planes_file)
+        vessels = pd.read_csv(vessel_file, usecols=["LON", "LAT"])
+        rivers = gpd.read_file(centerline_file)
+        mississippi = rivers[rivers["PNAME"] == "MISSISSIPPI R"]
+        marks = _mile_column(segments)
+        return cls(
+            crs,
+            segment_geoms=project(segments.geometry.array, segments.crs, crs),
+            segment_ids=segments["segment_id"].to_numpy(),
+            segment_marks=segments[marks].to_numpy() if marks else None,
+            planes=planes,
+            plane_geoms=project(shapely.points(planes["LON"], planes["LAT"]), WGS84, crs),
+            vessel_geoms=project(shapely.points(vessels["LON"], vessels["LAT"]), WGS84, crs),
+            centerline=shapely.union_all(project(mississippi.geometry.array, rivers.crs, crs)),
+        )
+
+    def _build_indexes(self):
+        self.vessel_index = VesselIndex(self.vessel_geoms)
+        # gauges carry their own mile when the table has one, otherwise
+        # the segments' milemarkers (if any) calibrate the line
+        anchor_col = _mile_column(self.planes)
+        anchor_geoms, anchor_miles = None, None
+        if anchor_col:
+            anchor_geoms, anchor_miles = self.plane_geoms, self.planes[anchor_col].to_numpy()
+        elif self.segment_marks is not None:
+            anchor_geoms, anchor_miles = self.segment_geoms, self.segment_marks
+        self.mile_index = RiverMileIndex(self.centerline, anchor_geoms, anchor_miles)
+        self.segment_miles = self.mile_index.ranges(self.segment_geoms, self.segment_ids)
+        self.datum_offsets = DatumOffsets.from_table(self.planes, self.mile_index.miles(self.plane_geoms))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ("vessel_index", "mile_index", "segment_miles", "datum_offsets"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for key in ("segment_geoms", "segment_ids", "plane_geoms", "vessel_geoms"):
+            self.__dict__[key] = _frozen(self.__dict__[key])
+        self._build_indexes()
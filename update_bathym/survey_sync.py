@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# shared helpers one level up, as for river_miles.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from safe_io import atomic_write, with_retries  # noqa: E402
+
+FEATURESERVER_URL = ("https://services7.arcgis.com/n1YM8pTrFmm7L4hs/arcgis/rest/services/"
+                     "eHydro_Survey_Data/FeatureServer/0/query")
+
+ID_FIELD = "surveyjobidpk"
+OID_FIELD = "OBJECTID"
+DATE_FIELD = "surveydatestart"
+
+# records per page; the service caps this at its maxRecordCount anyway
+PAGE_SIZE = 2000
+
+
+# FUNCTION FOR THE SERVER-SIDE FILTER
+def where_clause(prefixes=("LM", "UM"), after_oid=None):
+    like = " OR ".join(f"{ID_FIELD} LIKE '{p}%'" for p in prefixes)
+    where = f"({like})" if prefixes else "1=1"
+    if after_oid is not None:
+        where += f" AND {OID_FIELD} > {int(after_oid)}"
+    return where
+
+
+class SyncState:
+    """High-water mark of the last sync, persisted as JSON."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            self.data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.data = {}
+
+    def mark(self, url, prefixes):
+        # only valid for the same service and the same filter
+        if self.data.get("url") != url or self.data.get("prefixes") != list(prefixes):
+            return None
+        return self.data.get("max_oid")
+
+    def advance(self, url, prefixes, rows):
+        # call after the new ids are stored, so a failed run is fetched again
+        after = self.mark(url, prefixes)
+        oids = [r[OID_FIELD] for r in rows if r.get(OID_FIELD) is not None]
+        dates = [r[DATE_FIELD] for r in rows if r.get(DATE_FIELD) is not None]
+        if after is not None:
+            oids.append(after)
+            if self.data.get("max_date") is not None:
+                dates.append(self.data["max_date"])
+        if not oids:
+            return
+        self.data = {"url": url, "prefixes": list(prefixes), "max_oid": max(oids),
+                     "max_date": max(dates, default=None), "synced": time.time()}
+        atomic_write(self.path, json.dumps(self.data, indent=1))
+
+
+class FeatureServerSync:
+    """Survey ids from the eHydro FeatureServer: count first, then pages in parallel."""
+
+    def __init__(self, url=FEATURESERVER_URL, page_size=PAGE_SIZE, max_workers=4,
+                 retries=3, backoff=1.0, timeout=60):
+        self.url = url
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.requests_made = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _query(self, **params):
+        params = dict(params, f="json")
+
+        def send():
+            self.requests_made += 1
+            return self.session.get(self.url, params=params, timeout=self.timeout)
+
+        r = with_retries(send, self.retries, self.backoff)
+        r.raise_for_status()
+        data = r.json()
+        # ArcGIS reports errors with a 200 and an "error" body
+        if "error" in data:
+            raise requests.HTTPError(f"{self.url}: {data['error']}")
+        return data
+
+    def count(self, where):
+        return int(self._query(where=where, returnCountOnly="true")["count"])
+
+    def _page(self, where, offset, n):
+        # one page; if the service returns fewer than asked (lower
+        # maxRecordCount) keep reading from where it stopped
+        rows = []
+        while len(rows) < n:
+            data = self._query(
+                where=where, outFields=f"{ID_FIELD},{OID_FIELD},{DATE_FIELD}",
+                orderByFields=f"{OID_FIELD} ASC", returnGeometry="false",
+                resultOffset=offset + len(rows), resultRecordCount=n - len(rows))
+            feats = [f["attributes"] for f in data.get("features", [])]
+            rows.extend(feats)
+            if not feats or not data.get("exceededTransferLimit"):
+                break
+        return rows
+
+    def fetch(self, where):
+        """Attribute dicts of every record matching `where`, in object-id order."""
+        total = self.count(where)
+        if total == 0:
+            return []
+        offsets = range(0, total, self.page_size)
+        if len(offsets) == 1:
+            return self._page(where, 0, total)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pages = pool.map(lambda o: self._page(where, o, min(self.page_size, total - o)), offsets)
+            return [row for page in pages for row in page]
+
+    def sync(self, prefixes=("LM", "UM"), state=None, full=False):
+        """Records newer than the stored high-water mark (every record if `full`)."""
+        after = None if (full or state is None) else state.mark(self.url, prefixes)
+        return self.fetch(where_clause(prefixes, after))
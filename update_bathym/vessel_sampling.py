@@ -0,0 +1,77 @@
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+from projection import project
+
+# search radius around each vessel ping (m, in the projected CRS)
+VESSEL_RADIUS = 50.0
+
+
+# ---------------------------
+# VESSEL PINGS, indexed once per run
+class VesselIndex:
+    """STRtree over projected vessel pings so each survey hull is one query."""
+
+    def __init__(self, vessel_geoms):
+        self.geoms = np.asarray(vessel_geoms, dtype=object)
+        self.tree = STRtree(self.geoms)
+
+    def __len__(self):
+        return len(self.geoms)
+
+    def within(self, hull):
+        # same as vessels.within(hull): points on the hull boundary are excluded
+        idx = self.tree.query(hull, predicate="contains")
+        return self.geoms[np.sort(idx)]
+
+
+# ---------------------------
+# SURVEY POINTS, projected and indexed once per survey
+class SurveyDepthSampler:
+    """Batched radius queries of vessel pings against one survey's points."""
+
+    def __init__(self, gdf, crs):
+        self.points = project(gdf.geometry.array, gdf.crs, crs)
+        self.tree = STRtree(self.points)
+
+    def centroid(self):
+        return shapely.centroid(shapely.multipoints(self.points))
+
+    def hull(self, positions=None):
+        pts = self.points if positions is None else self.points[positions]
+        return shapely.convex_hull(shapely.multipoints(pts))
+
+    def vessel_means(self, vessel_geoms, values, radius=VESSEL_RADIUS):
+        """Mean survey value within `radius` of each ping, for pings that hit any point.
+
+        Matches the old per-ping `gdf.intersects(pt.buffer(50))` loop except that
+        the radius is an exact circle instead of the buffer's polygon approximation.
+        """
+        vessel_geoms = np.asarray(vessel_geoms, dtype=object)
+        n = len(vessel_geoms)
+        if n == 0 or len(self.points) == 0:
+            return np.empty(0)
+        v_idx, p_idx = self.tree.query(vessel_geoms, predicate="dwithin", distance=radius)
+        hits = np.bincount(v_idx, minlength=n)
+        vals = np.asarray(values, dtype=float)[p_idx]
+        ok = ~np.isnan(vals)
+        sums = np.bincount(v_idx[ok], weights=vals[ok], minlength=n)
+        counts = np.bincount(v_idx[ok], minlength=n)
+        hit = hits > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums[hit] / counts[hit]
+
+
+# FUNCTION FOR SUMMARY STATS OVER VESSEL MEANS
+def depth_summary(vessel_bathyms):
+    if len(vessel_bathyms) == 0:
+        return {k: np.nan for k in ("bathym_mean", "bathym_q25", "bathym_q10", "bathym_q75", "bathym_q90")}
+    q10, q25, q75, q90 = np.percentile(vessel_bathyms, [10, 25, 75, 90])
+    return {
+        "bathym_mean": np.mean(vessel_bathyms),
+        "bathym_q25": q25,
+        "bathym_q10": q10,
+        "bathym_q75": q75,
+        "bathym_q90": q90,
+    }
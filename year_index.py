@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+
+def _naive_datetimes(s: pd.Series):
+    # survey dates are text with a UTC offset; compare everything as naive UTC
+    if not pd.api.types.is_datetime64_any_dtype(s):
+        s = pd.to_datetime(s, errors="coerce", utc=True)
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        s = s.dt.tz_convert("UTC").dt.tz_localize(None)
+    return s
+
+
+def year_order(df, year_col="year", order_col=None):
+    # stable row order by year, then by `order_col` inside each year
+    years = df[year_col].to_numpy()
+    if order_col is None:
+        return np.argsort(years, kind="stable")
+    return np.lexsort((df[order_col].to_numpy(), years))
+
+
+def _in_order(order):
+    return bool((order == np.arange(len(order))).all())
+
+
+class YearIndex:
+    """Year -> contiguous slice of a frame, plus one precomputed date window.
+
+    Rows are stable-sorted by year once, so each year is a single iloc
+    slice and lookups never scan the frame.  With `order_col` the rows of
+    each slice are also sorted by that column (e.g. river mile) so callers
+    can binary-search inside a year.
+    """
+
+    def __init__(self, df, year_col="year", date_col=None, window=None, order_col=None):
+        years = df[year_col].to_numpy()
+        order = year_order(df, year_col, order_col)
+        plain_index = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+        if plain_index and _in_order(order):
+            # already sorted (frames from the data store): keep the rows where
+            # they are, so slices stay views of the mapped columns
+            self.frame = df
+        else:
+            self.frame = df.iloc[order].reset_index(drop=True)
+        years = years[order]
+        uniq, starts = np.unique(years, return_index=True)
+        ends = np.append(starts[1:], len(years))
+        self._slices = {int(y): (int(s), int(e)) for y, s, e in zip(uniq, starts, ends)}
+        self._empty = self.frame.iloc[0:0]
+
+        self._recent = self._empty
+        self.recent_mask = np.zeros(len(self.frame), dtype=bool)
+        if window is not None and date_col in self.frame:
+            start, end = window
+            dates = _naive_datetimes(self.frame[date_col])
+            self.recent_mask = ((dates >= start) & (dates <= end)).to_numpy()
+            self._recent = self.frame[self.recent_mask]
+            if order_col is not None:
+                self._recent = self._recent.sort_values(order_col, kind="stable")
+
+    @property
+    def years(self):
+        return sorted(self._slices)
+
+    def get(self, year):
+        bounds = self._slices.get(int(year))
+        if bounds is None:
+            return self._empty
+        return self.frame.iloc[bounds[0]:bounds[1]]
+
+    def recent(self):
+        return self._recent
+
+
+# depth -> marker size on the map (shallower water gets bigger markers)
+def depth_marker_size(depth):
+    depth = np.asarray(depth, dtype=float)
+    conditions = [
+        depth > 30, (depth > 25) & (depth <= 30),
+        (depth > 20) & (depth <= 25), (depth > 15) & (depth <= 20),
+        depth <= 15]
+    sizes = [8, 10, 12, 15, 18]
+    return np.select(conditions, sizes)